@@ -6,8 +6,13 @@ import cv2
 from PyQt5.QtCore import QObject, QPointF
 from ultralytics import SAM
 
+from utility import EColorOrder
+
 
 class USam2Net(QObject):
+    # Ultralytics принимает матрицы numpy в порядке BGR
+    color_order = EColorOrder.BGR
+
     def __init__(self, model_path: str, parent=None):
         super().__init__(parent)
         self.device = self._get_cuda_devices()
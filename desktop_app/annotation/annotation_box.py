@@ -118,8 +118,6 @@ class UAnnotationBox(UAnnotationItem):
                 int(self.height()),
                 1,
                 int(self.class_id),
-                str(self.class_name),
-                QColor(self.color),
                 int(self.parentItem().boundingRect().width()),
                 int(self.parentItem().boundingRect().height())
             )
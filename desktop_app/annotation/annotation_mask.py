@@ -127,8 +127,6 @@ class UAnnotationMask(UAnnotationItem):
             box.height(),
             self.annotation_id,
             self.class_id,
-            self.class_name,
-            self.color,
             parent_bounds.width(),
             parent_bounds.height(),
         )
@@ -440,8 +440,6 @@ class UAnnotationPolygon(UAnnotationItem):
             [(point.x(), point.y()) for point in self.graphic_points],
             1,
             self.class_id,
-            self.class_name,
-            self.color,
             self.parentItem().boundingRect().width(),
             self.parentItem().boundingRect().height()
         )
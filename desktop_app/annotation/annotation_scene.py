@@ -1,12 +1,10 @@
 from typing import Optional
 
-import cv2
-import numpy as np
 from PyQt5.QtWidgets import (
     QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QAction, QApplication,
     QVBoxLayout, QWidget, QHBoxLayout, QLabel, QListWidget, QListWidgetItem, QMessageBox
 )
-from PyQt5.QtGui import QColor, QPainter, QTransform, QFont, QPixmap, QIcon, QImage
+from PyQt5.QtGui import QColor, QPainter, QTransform, QFont, QPixmap, QIcon
 from PyQt5.QtCore import Qt, QRectF, pyqtSignal, pyqtSlot, QPointF
 from cv2 import Mat
 
@@ -15,13 +13,15 @@ from annotation.annotation_box import UAnnotationBox
 from annotation.annotation_item import UAnnotationItem
 from annotation.annotation_mask import UAnnotationMask
 from annotation.annotation_polygon import UAnnotationPolygon
+from annotation.frame_prefetch import UFramePrefetcher, load_frame
 from annotation.modes.abstract import EWorkMode, UBaseAnnotationMode
 from annotation.modes.sam2_annotate import USam2Annotation
 from annotation.modes.segmentation import UMaskAnnotationMode
 from annotation.modes.bounding_box import UBoxAnnotationMode
 from annotation.modes.viewer import UViewerMode, UForceDragAnnotationMode
 
-from utility import FAnnotationData, FDetectAnnotationData, EAnnotationStatus, FPolygonAnnotationData, UMessageBox
+from utility import FAnnotationData, FDetectAnnotationData, EAnnotationStatus, FPolygonAnnotationData, UMessageBox, \
+    EColorOrder
 from commander import UAnnotationSignalHolder
 
 class UAnnotationGraphicsView(QGraphicsView):
@@ -53,26 +53,24 @@ class UAnnotationGraphicsView(QGraphicsView):
 
         self.commander: Optional[UAnnotationSignalHolder] = None
         self.sam2: Optional[USam2Net] = None
+        self.frame_prefetcher: Optional[UFramePrefetcher] = None
 
         self.annotate_mods: dict[EWorkMode, UBaseAnnotationMode] = dict()
         self.current_work_mode = EWorkMode.Viewer
 
         self.message_box: Optional[QMessageBox] = None
 
-    def get_selectable_matrix(self):
-        if self.current_display_thumbnail is None:
+    def get_selectable_matrix(self, color_order: EColorOrder = EColorOrder.BGR):
+        # Представление display_matrix только для чтения без копирования: матрица общая с кэшем кадров
+        if self.current_display_thumbnail is None or self.display_matrix is None:
             return None, None
-        else:
-            t_id, *_ = self.current_display_thumbnail
-
-            image = self.current_image.pixmap().toImage()
-            image = image.convertToFormat(QImage.Format_RGB888)
-            width, height = image.width(), image.height()
-            buffer = image.bits()
-            buffer.setsize(height * width * 3)
-            matrix = np.array(buffer, dtype=np.uint8).reshape((height, width, 3))
+        t_id, *_ = self.current_display_thumbnail
 
-            return t_id, matrix
+        matrix = self.display_matrix.view()
+        matrix.flags.writeable = False
+        if color_order == EColorOrder.RGB:
+            matrix = matrix[..., ::-1]
+        return t_id, matrix
 
     def get_current_mode(self):
         return self.annotate_mods[self.current_work_mode]
@@ -92,6 +90,9 @@ class UAnnotationGraphicsView(QGraphicsView):
                 EWorkMode.SAM2: USam2Annotation(sam2, self, self.commander),
             }
 
+    def set_frame_prefetcher(self, frame_prefetcher: UFramePrefetcher):
+        self.frame_prefetcher = frame_prefetcher
+
     def display_image(self, thumbnail: tuple[int, str, list[FAnnotationData]], thumb_status: int):
         if self.check_work_done() is False:
             return
@@ -106,24 +107,22 @@ class UAnnotationGraphicsView(QGraphicsView):
         self.current_display_thumbnail = thumbnail
         image_path = self._get_current_thumb_image_path()
         try:
-            self.display_matrix = cv2.imread(image_path)
+            # Соседние изображения карусели декодируются заранее, в главном потоке только подменяется QPixmap
+            if self.frame_prefetcher:
+                frame = self.frame_prefetcher.get_frame(image_path)
+            else:
+                frame = load_frame(image_path)
         except Exception as e:
             self._clear_display_image()
             print(f"Ошибка: {str(e)}")
             return
-
-        try:
-            image_t = cv2.cvtColor(self.display_matrix, cv2.COLOR_BGR2RGB)
-            height, width, channel = image_t.shape
-            bytes_per_line = 3 * width
-            qimg = QImage(image_t.data, width, height, bytes_per_line, QImage.Format_RGB888)
-            pixmap = QPixmap.fromImage(qimg)
-        except Exception as e:
-            print(f"Ошибка: {str(e)}")
+        if frame is None:
             self._clear_display_image()
+            print(f"Ошибка: не удалось загрузить изображение {image_path}")
             return
 
-        self.current_image = QGraphicsPixmapItem(pixmap)
+        self.display_matrix = frame.matrix
+        self.current_image = QGraphicsPixmapItem(frame.get_pixmap())
         self.annotate_scene.addItem(self.current_image)
         self.current_image.setPos(16000 - self.current_image.boundingRect().width() // 2,
                                   16000 - self.current_image.boundingRect().height() // 2)
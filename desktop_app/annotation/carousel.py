@@ -1,38 +1,101 @@
+import math
 from typing import Optional
 
-from PyQt5.QtCore import Qt, pyqtSignal, QObject, QRectF, QThread, QRect, pyqtSlot, QPointF
-from PyQt5.QtGui import QPixmap, QPen, QColor, QBrush, QFont, QPainter
+from PyQt5.QtCore import Qt, pyqtSignal, QObject, QRectF, QRect, pyqtSlot, QPointF, QTimer
+from PyQt5.QtGui import QPixmap, QPen, QColor, QBrush, QFont, QPainter, QImage, QGuiApplication
 from PyQt5.QtWidgets import (
     QGraphicsView, QGraphicsScene, QGraphicsPixmapItem,
     QWidget, QVBoxLayout
 )
 
 from annotation.annotation_box import UAnnotationBox
+from annotation.frame_prefetch import UFramePrefetcher
 from commander import UAnnotationSignalHolder
+from dataset.decode_pool import UPriorityWorkerPool
+from dataset.pixmap_cache import UPixmapCache
+from dataset.thumbnail_cache import load_scaled_image
 from utility import FAnnotationData, EAnnotationStatus, FAnnotationClasses, FAnnotationItem, FDetectAnnotationData, \
     FPolygonAnnotationData
 
 
-class ImageLoaderThread(QThread):
-    image_loaded = pyqtSignal(QPixmap)
-
-    def __init__(self, image_path, width: int, height: int):
-        super().__init__()
-        self.width = width
-        self.height = height
-        self.image_path = image_path
-
-    def run(self):
-        try:
-            pixmap = QPixmap(self.image_path).scaled(self.width, self.height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.image_loaded.emit(pixmap)
-        except Exception:
-            self.image_loaded.emit(None)
+class UCarouselImageLoader(QObject):
+    """
+    Загрузка миниатюр карусели фиксированным пулом потоков вместо потока на каждую миниатюру.
+    Очередь упорядочена по расстоянию от выбранной миниатюры, готовые изображения хранятся в общем LRU кэше
+    """
+    def __init__(self, parent=None, workers: int | None = None, budget_mb: float = 64):
+        super().__init__(parent)
+        self.pool = UPriorityWorkerPool(self.load_image, workers)
+        self.pixmap_cache = UPixmapCache(budget_mb)
+        # Ключ изображения -> миниатюры, ожидающие его загрузки
+        self.waiting: dict[tuple[str, int, int], list['UAnnotationThumbnail']] = dict()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(16)
+        self.timer.timeout.connect(self.send_loaded_images)
+
+    @staticmethod
+    def get_key(thumbnail: 'UAnnotationThumbnail') -> tuple[str, int, int]:
+        return thumbnail.get_image_path(), thumbnail.get_width(), thumbnail.get_height()
+
+    @staticmethod
+    def load_image(payload: tuple[str, int, int]) -> QImage:
+        # QImage: QPixmap можно создавать только в главном потоке
+        image_path, width, height = payload
+        return load_scaled_image(image_path, width, height)
+
+    def request(self, thumbnail: 'UAnnotationThumbnail', priority: float):
+        key = self.get_key(thumbnail)
+        waiting = self.waiting.get(key)
+        if waiting is None or thumbnail not in waiting:
+            pixmap = self.pixmap_cache.get(key)
+            if pixmap is not None:
+                thumbnail.set_pixmap(pixmap)
+                return
+            self.waiting.setdefault(key, list()).append(thumbnail)
+        # Повторный запрос меняет приоритет ожидающей загрузки
+        self.pool.submit(key, key, priority)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def cancel(self, thumbnail: 'UAnnotationThumbnail'):
+        key = self.get_key(thumbnail)
+        waiting = self.waiting.get(key)
+        if not waiting or thumbnail not in waiting:
             return
+        waiting.remove(thumbnail)
+        if not waiting:
+            del self.waiting[key]
+            self.pool.cancel([key])
+
+    @pyqtSlot()
+    def send_loaded_images(self):
+        for key, image in self.pool.take_results():
+            thumbnails = self.waiting.pop(key, list())
+            if image is None or image.isNull():
+                if thumbnails:
+                    print(f"Не удалось загрузить изображение {key[0]}")
+                continue
+            # Изображения, загрузка которых была отменена во время декодирования, тоже попадают в кэш
+            pixmap = QPixmap.fromImage(image)
+            self.pixmap_cache.put(key, pixmap)
+            for thumbnail in thumbnails:
+                thumbnail.set_pixmap(pixmap)
+        if self.pool.is_idle():
+            self.timer.stop()
+
+    def clear(self):
+        # Кэш изображений сохраняется: повторное открытие тех же изображений не требует декодирования
+        self.timer.stop()
+        self.pool.clear()
+        self.waiting.clear()
+
+    def shutdown(self):
+        self.clear()
+        self.pool.shutdown()
 
 class UPixmapSignalEmitter(QObject):
     clicked = pyqtSignal(object)
-    changed_status = pyqtSignal(int, EAnnotationStatus, EAnnotationStatus)
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -77,42 +140,12 @@ class UAnnotationThumbnail(QGraphicsPixmapItem):
     def get_annotation_data(self):
         return self.annotation_data_list
 
-    def add_annotation(self, data: FAnnotationData):
-        self.annotation_data_list.append(data)
-        if len(self.annotation_data_list) > 0:
-            self.set_annotated_status(EAnnotationStatus.Annotated)
-        self.update()
-
-    def clear_annotations(self):
-        self.annotation_data_list.clear()
-        self.set_annotated_status(EAnnotationStatus.NoAnnotation)
-        self.update()
-
-    def delete_annotation(self, index: int):
-        if index < 0 or index >= len(self.annotation_data_list):
-            return
-        self.annotation_data_list.pop(index)
-        if len(self.annotation_data_list) <= 0 and self.annotation_status.value != EAnnotationStatus.MarkedDrop.value:
-             self.set_annotated_status(EAnnotationStatus.NoAnnotation)
-        self.update()
-
-    def update_annotation(self, index: int, data: FAnnotationData):
-        if index < 0 or index >= len(self.annotation_data_list):
-            return
-        self.annotation_data_list[index] = data
-        self.set_annotated_status(EAnnotationStatus.Annotated)
-        self.update()
-
-    def upload_image(self):
+    def upload_image(self, image_loader: UCarouselImageLoader, priority: float = 0):
         if self.uploaded is True:
             return
-        if hasattr(self, 'loader_thread') and self.loader_thread.isRunning():
-            return
-        self.loader_thread = ImageLoaderThread(self.image_path, self._width, self._height)
-        self.loader_thread.image_loaded.connect(self._set_pixmap)
-        self.loader_thread.start()
+        image_loader.request(self, priority)
 
-    def _set_pixmap(self, pixmap: QPixmap):
+    def set_pixmap(self, pixmap: QPixmap):
         self.setPixmap(pixmap)
         self.setOffset(
             (self.width() - pixmap.width()) / 2,
@@ -208,12 +241,9 @@ class UAnnotationThumbnail(QGraphicsPixmapItem):
         return self.annotation_status
 
     def set_annotated_status(self, status: EAnnotationStatus):
-        if self.annotation_status.value == status.value:
-            pass
-        else:
-            self.emitter.changed_status.emit(self.index, self.annotation_status, status)
-            self.annotation_status = status
-            self.update()
+        # Статус хранится в карусели, элемент сцены только отображает его
+        self.annotation_status = status
+        self.update()
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -226,6 +256,12 @@ class UAnnotationThumbnail(QGraphicsPixmapItem):
     def height(self):
         return self.sceneBoundingRect().height()
 
+    def get_width(self) -> int:
+        return self._width
+
+    def get_height(self) -> int:
+        return self._height
+
     def set_index(self, index):
         self.index = index
 
@@ -239,8 +275,6 @@ class UAnnotationThumbnail(QGraphicsPixmapItem):
         return self.dataset
 
 class UThumbnailCarousel(QGraphicsView):
-    view_changed = pyqtSignal(QRectF)
-
     def __init__(
             self,
             parent = None,
@@ -251,8 +285,17 @@ class UThumbnailCarousel(QGraphicsView):
         self.setLayout(self.main_layout)
 
         self.commander: Optional[UAnnotationSignalHolder] = None
-        self.thumbnails : list [UAnnotationThumbnail] = []
-        self.current_selected : Optional[UAnnotationThumbnail] = None
+
+        # Состояние миниатюр по индексу. Источник - путь к изображению или FAnnotationItem,
+        # статус хранится только для измененных миниатюр, аннотации копируются при первом обращении
+        self.sources: list[str | FAnnotationItem] = list()
+        self.statuses: dict[int, EAnnotationStatus] = dict()
+        self.annotations: dict[int, list[FAnnotationData]] = dict()
+        self.selected_index: int | None = None
+
+        # Элементы сцены создаются только для видимых миниатюр и запаса по краям
+        self.items: dict[int, UAnnotationThumbnail] = dict()
+        self.window_margin = 5
 
         self.annotated_thumbnails_indexes: set[int] = set()
         self.dropped_thumbnails_indexes: set[int] = set()
@@ -265,33 +308,64 @@ class UThumbnailCarousel(QGraphicsView):
 
         #self.main_layout.addWidget(self.view)
 
-        self.y_position = 0
+        self.thumbnail_width = 200
+        self.thumbnail_height = 175
         self.thumbnail_spacing = 10
-        self.x_position = self.thumbnail_spacing
 
         self.scale_not_selected = 0.75
 
-        self.view_changed.connect(self.display_images)
-        self.last_displayed_images: list[UAnnotationThumbnail] = list()
-
-    def get_view_bound_box(self):
-        return QRectF(
-            self.mapToScene(self.viewport().rect().topLeft()).x() - 400,
-            self.mapToScene(self.viewport().rect().topLeft()).y(),
-            self.viewport().rect().width() + 800,
-            self.viewport().rect().height()
-        )
+        # Индексы миниатюр, изображения которых отображаются
+        self.displayed_indexes: set[int] = set()
+        # Запас по краям видимой области, в котором изображения уже загружаются
+        self.display_margin = 400
+
+        # События прокрутки приходят чаще кадров экрана, видимая область пересчитывается не чаще раза в кадр
+        screen = QGuiApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen and screen.refreshRate() > 0 else 60
+        self.view_timer = QTimer(self)
+        self.view_timer.setSingleShot(True)
+        self.view_timer.setInterval(max(1, int(1000 / refresh_rate)))
+        self.view_timer.timeout.connect(self.update_view)
+
+        # Общий загрузчик миниатюр карусели
+        self.image_loader = UCarouselImageLoader(self)
+        # Полноразмерные изображения соседних миниатюр для сцены разметки
+        self.frame_prefetcher = UFramePrefetcher(self)
+
+    def get_display_range(self) -> range:
+        # Миниатюры стоят на полосе с постоянным шагом: пересекающиеся с областью индексы считаются из смещения
+        if not self.sources:
+            return range(0)
+        pitch = self.get_pitch()
+        left = self.mapToScene(self.viewport().rect().topLeft()).x() - self.display_margin
+        right = left + self.viewport().width() + self.display_margin * 2
+        first = max(0, math.ceil((left - self.thumbnail_width) / pitch))
+        last = min(len(self.sources) - 1, math.floor(right / pitch))
+        return range(first, last + 1)
 
     def wheelEvent(self, event):
         delta = event.angleDelta().y()
         self.horizontalScrollBar().setValue(
             self.horizontalScrollBar().value() - delta
         )
-        self.view_changed.emit(self.get_view_bound_box())
+        self.request_view_update()
 
     def scrollContentsBy(self, dx, dy):
         super().scrollContentsBy(dx, dy)
-        self.view_changed.emit(self.get_view_bound_box())
+        self.request_view_update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.request_view_update()
+
+    def request_view_update(self):
+        if not self.view_timer.isActive():
+            self.view_timer.start()
+
+    @pyqtSlot()
+    def update_view(self):
+        self.update_window()
+        self.display_images()
 
     def keyPressEvent(self, event):
         pass
@@ -306,62 +380,121 @@ class UThumbnailCarousel(QGraphicsView):
         self.commander.updated_annotation.connect(self.handle_signal_on_update_annotation)
 
     def clear_thumbnails(self):
+        self.image_loader.clear()
+        self.frame_prefetcher.clear()
         self.scene.clear()  # удаляет все элементы со сцены
 
-        self.thumbnails.clear()
-        self.last_displayed_images.clear()
+        self.items.clear()
+        self.sources = list()
+        self.statuses.clear()
+        self.annotations.clear()
+        self.displayed_indexes.clear()
         self.annotated_thumbnails_indexes.clear()
         self.dropped_thumbnails_indexes.clear()
 
-        self.current_selected = None
-        self.x_position = 0
-        self.y_position = 0
-
-    # direction: left или right
-    def select_thumbnail_by_direction(self, direction: str):
-        if not self.thumbnails:
-            return
-
-        if self.current_selected is None:
-            self.select_thumbnail(self.thumbnails[0])
-            return
+        self.selected_index = None
 
-        index = self.current_selected.get_index()
-        if index < 0 or index >= len(self.thumbnails):
+    def add_sources(self, sources: list[str] | list[FAnnotationItem]):
+        # Добавление изображений без создания элементов сцены: время не зависит от размера пачки
+        self.sources.extend(sources)
+        self.update()
+        if self.selected_index is None and self.sources:
+            self.select_index(0)
+        self.request_view_update()
+
+    def get_count(self) -> int:
+        return len(self.sources)
+
+    def get_pitch(self) -> int:
+        return self.thumbnail_width + self.thumbnail_spacing
+
+    def get_image_path(self, index: int) -> str:
+        source = self.sources[index]
+        return source if isinstance(source, str) else source.get_image_path()
+
+    def get_dataset(self, index: int) -> str | None:
+        source = self.sources[index]
+        return None if isinstance(source, str) else source.get_dataset_name()
+
+    def get_annotation_data(self, index: int) -> list[FAnnotationData]:
+        annotations = self.annotations.get(index)
+        if annotations is None:
+            source = self.sources[index]
+            annotations = [] if isinstance(source, str) else [annotation.copy() for annotation in source.get_annotation_data()]
+            self.annotations[index] = annotations
+        return annotations
+
+    def get_status(self, index: int) -> EAnnotationStatus:
+        return self.statuses.get(index, EAnnotationStatus.NoAnnotation)
+
+    def set_status(self, index: int, status: EAnnotationStatus):
+        previous = self.get_status(index)
+        if previous.value == status.value:
             return
-
-        if direction == 'left' and index > 0:
-            self.select_thumbnail(self.thumbnails[index - 1])
-        elif direction == 'right' and index < len(self.thumbnails) - 1:
-            self.select_thumbnail(self.thumbnails[index + 1])
-
-    def add_thumbnail(self, thumbnail: UAnnotationThumbnail):
+        self.statuses[index] = status
+        self.handle_on_thumbnail_status_changed(index, previous, status)
+        self._update_item(index)
+
+    def update_window(self):
+        # Элементы сцены для видимого диапазона индексов и запаса по краям, остальные удаляются
+        count = len(self.sources)
+        pitch = self.get_pitch()
+        left = self.mapToScene(self.viewport().rect().topLeft()).x()
+        first = max(0, int(left // pitch) - self.window_margin)
+        last = min(count - 1, int((left + self.viewport().width()) // pitch) + self.window_margin)
+
+        for index in [index for index in self.items if not first <= index <= last]:
+            thumbnail = self.items.pop(index)
+            self.image_loader.cancel(thumbnail)
+            self.displayed_indexes.discard(index)
+            self.scene.removeItem(thumbnail)
+        for index in range(first, last + 1):
+            if index not in self.items:
+                self._create_item(index)
+
+    def _create_item(self, index: int) -> UAnnotationThumbnail:
+        thumbnail = UAnnotationThumbnail(
+            self.thumbnail_width,
+            self.thumbnail_height,
+            self.get_image_path(index),
+            self.get_dataset(index),
+            self.get_annotation_data(index)
+        )
+        thumbnail.set_index(index)
+        thumbnail.set_annotated_status(self.get_status(index))
         thumbnail.setTransformationMode(Qt.SmoothTransformation)
-
         thumbnail.emitter.clicked.connect(self.on_thumbnail_clicked)
-        thumbnail.emitter.changed_status.connect(self.handle_on_thumbnail_status_changed)
 
         self.scene.addItem(thumbnail)
-        thumbnail.setPos(self.x_position, self.y_position)
+        thumbnail.setPos(index * self.get_pitch(), 0)
+        thumbnail.setSelected(index == self.selected_index)
+        self.items[index] = thumbnail
+        return thumbnail
 
-        self.x_position += thumbnail.width() + self.thumbnail_spacing
+    def _update_item(self, index: int):
+        thumbnail = self.items.get(index)
+        if thumbnail:
+            thumbnail.set_annotated_status(self.get_status(index))
 
-        thumbnail.set_index(len(self.thumbnails))
-        self.thumbnails.append(thumbnail)
-        if thumbnail.get_annotated_status().value == EAnnotationStatus.Annotated.value:
-            self.annotated_thumbnails_indexes.add(thumbnail.get_index())
-        elif thumbnail.get_annotated_status().value == EAnnotationStatus.MarkedDrop.value:
-            self.dropped_thumbnails_indexes.add(thumbnail.get_index())
+    # direction: left или right
+    def select_thumbnail_by_direction(self, direction: str):
+        if not self.sources:
+            return
 
-        if len(self.thumbnails) == 1 and self.current_selected is None:
-            self.select_thumbnail(self.thumbnails[0])
-        return thumbnail
+        if self.selected_index is None:
+            self.select_index(0)
+            return
+
+        index = self.selected_index
+        if direction == 'left' and index > 0:
+            self.select_index(index - 1)
+        elif direction == 'right' and index < len(self.sources) - 1:
+            self.select_index(index + 1)
 
     def get_annotation_data_by_index(self, index: int) -> list[FAnnotationData] | None:
-        if 0 <= index < len(self.thumbnails):
-            return self.thumbnails[index].get_annotation_data()
+        if 0 <= index < len(self.sources):
+            return self.get_annotation_data(index)
 
-    @pyqtSlot(int, EAnnotationStatus, EAnnotationStatus)
     def handle_on_thumbnail_status_changed(self, index: int, previous: EAnnotationStatus, current: EAnnotationStatus):
         if current.value == EAnnotationStatus.Annotated.value:
             self.annotated_thumbnails_indexes.add(index)
@@ -377,33 +510,60 @@ class UThumbnailCarousel(QGraphicsView):
         if self.commander:
             self.commander.change_status_thumbnail.emit(previous, current)
 
-    def display_images(self, display_bounds: QRectF):
-        items = self.scene.items(display_bounds, Qt.IntersectsItemBoundingRect)
-        selected_thumbnails: list[UAnnotationThumbnail] = list()
-        for thumbnail in items:
-            if isinstance(thumbnail, UAnnotationThumbnail):
-                selected_thumbnails.append(thumbnail)
+    def display_images(self):
+        display_indexes = set(self.get_display_range())
 
-        # Отображение картинок в карусели
-        for thumb in selected_thumbnails:
-            if thumb not in self.last_displayed_images:
-                thumb.upload_image()
+        # Скрытие картинок, вышедших из области
+        for index in self.displayed_indexes - display_indexes:
+            thumbnail = self.items.get(index)
+            if thumbnail:
+                self.image_loader.cancel(thumbnail)
+                thumbnail.clear_image()
 
-        # Скрытие картинок:
-        for thumb in self.last_displayed_images:
-            if thumb not in selected_thumbnails:
-                thumb.clear_image()
+        # Отображение картинок в карусели. Ближайшие к выбранной миниатюре загружаются первыми,
+        # повторный запрос уже ожидающих миниатюр обновляет их приоритет
+        selected_index = self.selected_index or 0
+        for index in display_indexes:
+            thumbnail = self.items.get(index)
+            if thumbnail:
+                thumbnail.upload_image(self.image_loader, abs(index - selected_index))
 
-        self.last_displayed_images.clear()
-        self.last_displayed_images = [item for item in selected_thumbnails]
+        self.displayed_indexes = display_indexes
 
     def add_class(self, name: str):
         return self.available_classes.add_class_by_name(name)
 
     def on_thumbnail_clicked(self, thumbnail: UAnnotationThumbnail):
-        if self.current_selected is thumbnail:
+        if self.selected_index == thumbnail.get_index():
+            return
+        self.select_index(thumbnail.get_index())
+
+    def add_annotation(self, index: int, data: FAnnotationData):
+        self.get_annotation_data(index).append(data)
+        self.set_status(index, EAnnotationStatus.Annotated)
+        self._update_item(index)
+
+    def clear_annotations(self, index: int):
+        self.get_annotation_data(index).clear()
+        self.set_status(index, EAnnotationStatus.NoAnnotation)
+        self._update_item(index)
+
+    def delete_annotation(self, index: int, index_annotation: int):
+        annotations = self.get_annotation_data(index)
+        if index_annotation < 0 or index_annotation >= len(annotations):
+            return
+        annotations.pop(index_annotation)
+        if len(annotations) <= 0 and self.get_status(index).value != EAnnotationStatus.MarkedDrop.value:
+            self.set_status(index, EAnnotationStatus.NoAnnotation)
+        self._update_item(index)
+
+    def update_annotation(self, index: int, index_annotation: int, data: FAnnotationData):
+        annotations = self.get_annotation_data(index)
+        if index_annotation < 0 or index_annotation >= len(annotations):
             return
-        self.select_thumbnail(thumbnail)
+        annotations[index_annotation] = data
+        self.set_status(index, EAnnotationStatus.Annotated)
+        self._update_item(index)
 
     @pyqtSlot(int, int, object, object)
     def handle_signal_on_update_annotation(
@@ -412,58 +572,62 @@ class UThumbnailCarousel(QGraphicsView):
             index_annotation: int,
             prev_annotation: None | FAnnotationData,
             annotation_data):
-        if not 0 <= index_thumb < len(self.thumbnails):
+        if not 0 <= index_thumb < len(self.sources):
             return
         if isinstance(annotation_data, FAnnotationData):
-            self.thumbnails[index_thumb].update_annotation(index_annotation, annotation_data)
+            self.update_annotation(index_thumb, index_annotation, annotation_data)
 
     @pyqtSlot(int, int, object)
     def handle_signal_on_delete_annotation(self, index_thumb: int, index_annotation: int, data: FAnnotationData):
-        if not 0 <= index_thumb < len(self.thumbnails):
+        if not 0 <= index_thumb < len(self.sources):
             return
-        self.thumbnails[index_thumb].delete_annotation(index_annotation)
+        self.delete_annotation(index_thumb, index_annotation)
 
     @pyqtSlot(int, object)
     def handle_signal_on_added_annotation(self, index_thumb: int, annotation_data):
-        if not 0 <= index_thumb < len(self.thumbnails):
+        if not 0 <= index_thumb < len(self.sources):
             return
         if isinstance(annotation_data, FAnnotationData):
-            self.thumbnails[index_thumb].add_annotation(annotation_data)
+            self.add_annotation(index_thumb, annotation_data)
 
     @pyqtSlot(int)
     def handle_on_adding_thumb_to_model(self, index: int):
-        if 0 <= index <= len(self.thumbnails):
-            self.thumbnails[index].set_annotated_status(EAnnotationStatus.PerformingAnnotation)
+        if 0 <= index < len(self.sources):
+            self.set_status(index, EAnnotationStatus.PerformingAnnotation)
 
     @pyqtSlot(int, list)
     def handle_on_getting_result_from_model(self, index: int, ann_list: list[FAnnotationData]):
-        if 0 <= index <= len(self.thumbnails):
-            self.thumbnails[index].clear_annotations()
+        if 0 <= index < len(self.sources):
+            self.clear_annotations(index)
             if len(ann_list) > 0:
                 for annotation in ann_list:
-                    self.thumbnails[index].add_annotation(annotation)
+                    self.add_annotation(index, annotation)
             else:
-                self.thumbnails[index].set_annotated_status(EAnnotationStatus.MarkedDrop)
+                self.set_status(index, EAnnotationStatus.MarkedDrop)
 
     def set_thumbnail_dropped(self):
-        if self.current_selected:
-            self.current_selected.set_annotated_status(EAnnotationStatus.MarkedDrop)
+        if self.selected_index is not None:
+            self.set_status(self.selected_index, EAnnotationStatus.MarkedDrop)
 
-    def select_thumbnail(self, thumbnail: UAnnotationThumbnail):
-        if thumbnail is None:
+    def select_index(self, index: int):
+        if not 0 <= index < len(self.sources):
             return
 
-        self.current_selected = thumbnail
+        self.selected_index = index
         self.scene.clearSelection()
-        self.current_selected.setSelected(True)
-        self.centerOn(self.current_selected.sceneBoundingRect().center())
+        self.centerOn(QPointF(index * self.get_pitch() + self.thumbnail_width / 2, self.thumbnail_height / 2))
+        # Элемент выбранной миниатюры создается при пересчете видимой области уже выделенным
+        if index in self.items:
+            self.items[index].setSelected(True)
+        self.request_view_update()
+        self.frame_prefetcher.prefetch_around(index, len(self.sources), self.get_image_path)
         self.commander.selected_thumbnail.emit(
             (
-                thumbnail.get_index(),
-                thumbnail.get_image_path(),
-                thumbnail.get_annotation_data()
+                index,
+                self.get_image_path(index),
+                self.get_annotation_data(index)
             ),
-            thumbnail.get_annotated_status().value
+            self.get_status(index).value
         )
 
     def get_annotations(self):
@@ -476,17 +640,16 @@ class UThumbnailCarousel(QGraphicsView):
             (self.dropped_thumbnails_indexes, EAnnotationStatus.MarkedDrop, list_annotations_to_delete),
         ]:
             for i in index:
-                thumb = self.thumbnails[i]
-                if thumb.get_annotated_status().value != status_check.value:
+                if self.get_status(i).value != status_check.value:
                     continue
 
-                dataset = thumb.get_dataset()
+                dataset = self.get_dataset(i)
                 if target_list is list_annotations_to_delete and dataset is None:
                     continue
 
                 ann_item = FAnnotationItem(
-                    list(thumb.get_annotation_data()),
-                    thumb.get_image_path(),
+                    list(self.get_annotation_data(i)),
+                    self.get_image_path(i),
                     dataset
                 )
                 if target_list is list_annotation_items and dataset is None:
@@ -497,15 +660,15 @@ class UThumbnailCarousel(QGraphicsView):
         return list_annotation_items, list_annotation_none_dataset, list_annotations_to_delete
 
     def get_current_thumbnail_status(self):
-        if self.current_selected:
-            return self.current_selected.get_annotated_status()
+        if self.selected_index is not None:
+            return self.get_status(self.selected_index)
 
     def update(self):
         super().update()
         self.scene.setSceneRect(
             0,
             0,
-            self.thumbnail_spacing + len(self.thumbnails) * (200 + self.thumbnail_spacing),
+            self.thumbnail_spacing + len(self.sources) * self.get_pitch(),
             self.scene.height()
         )
-        self.viewport().update()
\ No newline at end of file
+        self.viewport().update()
@@ -0,0 +1,174 @@
+import time
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer, pyqtSlot
+from PyQt5.QtGui import QImage, QPixmap
+
+from dataset.decode_pool import UPriorityWorkerPool
+from dataset.pixmap_cache import UPixmapCache, FCacheStats, get_pixmap_bytes
+
+
+class FDecodedFrame:
+    """
+    Полноразмерное изображение, готовое к отображению на сцене разметки.
+    Матрица BGR только для чтения - единственная копия пикселей: QImage ссылается на ее буфер,
+    модели получают ее представления без копирования
+    """
+    def __init__(self, matrix: np.ndarray, image: QImage, decode_time: float):
+        self.matrix = matrix
+        self.image: Optional[QImage] = image
+        self.decode_time = decode_time
+        # QPixmap создается в главном потоке, когда кадр забирается из пула
+        self.pixmap: Optional[QPixmap] = None
+
+    def get_pixmap(self) -> QPixmap:
+        if self.pixmap is None:
+            self.pixmap = QPixmap.fromImage(self.image)
+            self.image = None
+        return self.pixmap
+
+    def get_size(self) -> int:
+        if self.pixmap is None:
+            return self.matrix.nbytes
+        return self.matrix.nbytes + get_pixmap_bytes(self.pixmap)
+
+
+def load_frame(image_path: str) -> FDecodedFrame | None:
+    start = time.perf_counter()
+    matrix = cv2.imread(image_path)
+    if matrix is None:
+        return None
+    matrix.flags.writeable = False
+    height, width, _ = matrix.shape
+    image = QImage(matrix.data, width, height, matrix.strides[0], QImage.Format_BGR888)
+    return FDecodedFrame(matrix, image, time.perf_counter() - start)
+
+
+class FFramePrefetchStats(FCacheStats):
+    def __init__(self):
+        super().__init__()
+        # Декодирования в пуле и в главном потоке при промахе
+        self.decoded = 0
+        self.decode_seconds = 0.0
+        self.decode_max = 0.0
+        self.stalls = 0
+        self.stall_seconds = 0.0
+
+    def add_decode(self, seconds: float):
+        self.decoded += 1
+        self.decode_seconds += seconds
+        self.decode_max = max(self.decode_max, seconds)
+
+    def add_stall(self, seconds: float):
+        self.stalls += 1
+        self.stall_seconds += seconds
+
+    def get_decode_latency(self) -> float:
+        return self.decode_seconds / self.decoded if self.decoded else 0.0
+
+    def get_stall_latency(self) -> float:
+        return self.stall_seconds / self.stalls if self.stalls else 0.0
+
+    def __str__(self):
+        return (f"{super().__str__()}, декодировано: {self.decoded}, "
+                f"среднее время декодирования: {self.get_decode_latency() * 1e3:.1f} мс "
+                f"(макс. {self.decode_max * 1e3:.1f} мс), "
+                f"ожиданий в главном потоке: {self.stalls} по {self.get_stall_latency() * 1e3:.1f} мс")
+
+
+class UFramePrefetcher(QObject):
+    """
+    Предварительное декодирование соседних с выбранным изображений карусели.
+    Готовые кадры хранятся в LRU кэше с ограничением по объему (матрица и QPixmap кадра), сцена разметки
+    при выборе изображения только подменяет QPixmap. При промахе кадр декодируется в главном потоке, как раньше.
+    Пул потоков свой, а не пул миниатюр карусели: очистка карусели и отмена соседей не мешают друг другу
+    """
+    def __init__(self, parent=None, radius: int = 2, workers: int | None = 2, budget_mb: float = 512):
+        super().__init__(parent)
+        self.radius = radius
+        self.pool = UPriorityWorkerPool(load_frame, workers)
+        self.frames = UPixmapCache(budget_mb, get_size=FDecodedFrame.get_size)
+        self.stats = FFramePrefetchStats()
+        self.frames.stats = self.stats
+
+        self.last_index: int | None = None
+        # Пути изображений, декодирование которых поставлено в очередь
+        self.requested: set[str] = set()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(16)
+        self.timer.timeout.connect(self.take_loaded_frames)
+
+    def prefetch_around(self, index: int, count: int, get_image_path: Callable[[int], str]):
+        # Соседи в направлении перемещения по карусели загружаются раньше
+        direction = 1 if self.last_index is None or index >= self.last_index else -1
+        self.last_index = index
+
+        wanted: dict[str, float] = dict()
+        for distance in range(1, self.radius + 1):
+            for neighbor, priority in ((index + direction * distance, distance - 0.5),
+                                       (index - direction * distance, distance)):
+                if 0 <= neighbor < count:
+                    wanted.setdefault(get_image_path(neighbor), priority)
+
+        # Выбранное изображение декодирует сцена, соседи прежнего изображения больше не нужны
+        current_path = get_image_path(index) if 0 <= index < count else None
+        self.pool.cancel([path for path in self.requested if path not in wanted or path == current_path])
+        self.requested = set()
+        for image_path, priority in wanted.items():
+            if image_path == current_path:
+                continue
+            if image_path in self.frames:
+                self.frames.touch(image_path)
+                continue
+            self.requested.add(image_path)
+            self.pool.submit(image_path, image_path, priority)
+        if self.requested and not self.timer.isActive():
+            self.timer.start()
+
+    def set_budget_mb(self, budget_mb: float):
+        self.frames.set_budget_mb(budget_mb)
+
+    def get_frame(self, image_path: str) -> FDecodedFrame | None:
+        self.take_loaded_frames()
+        frame = self.frames.get(image_path)
+        if frame is not None:
+            return frame
+
+        start = time.perf_counter()
+        frame = load_frame(image_path)
+        if frame is None:
+            return None
+        frame.get_pixmap()
+        self.stats.add_decode(frame.decode_time)
+        self.stats.add_stall(time.perf_counter() - start)
+        self.frames.put(image_path, frame)
+        return frame
+
+    @pyqtSlot()
+    def take_loaded_frames(self):
+        for image_path, frame in self.pool.take_results():
+            self.requested.discard(image_path)
+            if frame is None:
+                print(f"Не удалось загрузить изображение {image_path}")
+                continue
+            self.stats.add_decode(frame.decode_time)
+            frame.get_pixmap()
+            # Кадр, открытый раньше, чем закончилось его декодирование в пуле, уже есть в кэше
+            if image_path not in self.frames:
+                self.frames.put(image_path, frame)
+        if self.pool.is_idle():
+            self.timer.stop()
+
+    def clear(self):
+        self.timer.stop()
+        self.pool.clear()
+        self.frames.clear()
+        self.requested.clear()
+        self.last_index = None
+
+    def shutdown(self):
+        self.clear()
+        self.pool.shutdown()
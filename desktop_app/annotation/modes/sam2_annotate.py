@@ -100,7 +100,7 @@ class USam2Annotation(UBaseAnnotationMode):
 
         cursor_pos_image = get_clamped_pos(self.scene, event.pos(), image)
 
-        _, matrix = self.scene.get_selectable_matrix()
+        _, matrix = self.scene.get_selectable_matrix(self.sam2.color_order)
         if matrix is None:
             return
 
@@ -154,7 +154,8 @@ class USam2Annotation(UBaseAnnotationMode):
 
     def on_release_mouse(self, event: QMouseEvent | None):
         if event.button() == Qt.LeftButton and self.box:
-            image, current_class, (_, matrix) = self.scene.get_image(), self.scene.get_current_class(), self.scene.get_selectable_matrix()
+            image, current_class, (_, matrix) = self.scene.get_image(), self.scene.get_current_class(), \
+                self.scene.get_selectable_matrix(self.sam2.color_order)
 
             if matrix is None or not image or not current_class:
                 self._delete_box()
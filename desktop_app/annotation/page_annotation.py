@@ -10,9 +10,9 @@ from annotation.modes.abstract import EWorkMode
 from annotation.annotation_scene import UAnnotationBox
 from design.annotation_page import Ui_annotataion_page
 from commander import UGlobalSignalHolder, UAnnotationSignalHolder
-from annotation.carousel import UAnnotationThumbnail
 from design.diag_create_dataset import Ui_diag_create_dataset
-from dataset.loader import UOverlayLoader
+from dataset.annotation_table import count_item_classes
+from dataset.loader import UOverlayLoader, UDatasetLazyLoader
 from project import UTrainProject, UMergeAnnotationThread, DATASETS
 from utility import EAnnotationStatus, UMessageBox, FAnnotationData, FAnnotationItem
 
@@ -31,7 +31,7 @@ class UTextInputDialog(QDialog, Ui_diag_create_dataset):
 
 
 class UPageAnnotation(QWidget, Ui_annotataion_page):
-    def __init__(self, commander: UGlobalSignalHolder, project: UTrainProject):
+    def __init__(self, commander: UGlobalSignalHolder, project: UTrainProject, lazy_loader: UDatasetLazyLoader):
         super().__init__()
         self.setupUi(self)
 
@@ -53,6 +53,9 @@ class UPageAnnotation(QWidget, Ui_annotataion_page):
         # Инициализация потоков
         self.overlay: Optional[UOverlayLoader] = None
         self.merge_thread: Optional[UMergeAnnotationThread] = None
+        self.lazy_loader = lazy_loader
+        # Слияние ждет загрузки целевых датасетов: до его начала новые изображения и повторное слияние запрещены
+        self.is_merge_pending = False
 
         self.current_annotated_count: int = 0
         self.current_dropped_count: int = 0
@@ -122,6 +125,8 @@ class UPageAnnotation(QWidget, Ui_annotataion_page):
         self._load_classes()
         self.thumbnail_carousel.set_commander(self.annotate_commander)
         self.annotation_scene.set_scene_parameters(self.annotate_commander, self.project.sam2_worker)
+        self.thumbnail_carousel.frame_prefetcher.set_budget_mb(self.project.frame_cache_mb)
+        self.annotation_scene.set_frame_prefetcher(self.thumbnail_carousel.frame_prefetcher)
 
     def handle_on_updated_classes(self):
         self._load_classes()
@@ -143,11 +148,17 @@ class UPageAnnotation(QWidget, Ui_annotataion_page):
 
     @pyqtSlot(list)
     def handle_on_annotation_data_get(self, annotation_data_list: list[FAnnotationItem]):
+        if self.is_merge_pending:
+            UMessageBox.show_error("Дождитесь добавления аннотаций в проект!")
+            return
         self.list_total_annotations.clear()
         self.load_images(annotation_data_list)
 
     @pyqtSlot()
     def handle_on_button_load_clicked(self):
+        if self.is_merge_pending:
+            UMessageBox.show_error("Дождитесь добавления аннотаций в проект!")
+            return
         file_paths, _ = QFileDialog.getOpenFileNames(None, "Select Images", "",
                                                      "Image Files (*.png *.jpg *.jpeg *.bmp)")
         if file_paths:
@@ -183,7 +194,7 @@ class UPageAnnotation(QWidget, Ui_annotataion_page):
 
     @pyqtSlot()
     def handle_clicked_add_to_project(self):
-        if self.overlay or (self.merge_thread and self.merge_thread.isRunning()):
+        if self.is_merge_pending or self.overlay or (self.merge_thread and self.merge_thread.isRunning()):
             return
         list_annotations, list_nones, list_to_delete = self.thumbnail_carousel.get_annotations()
         if len(list_annotations) == 0 and len(list_nones) == 0 and len(list_to_delete) == 0:
@@ -203,14 +214,33 @@ class UPageAnnotation(QWidget, Ui_annotataion_page):
                     ann_item.set_dataset_name(dataset_name)
                 list_annotations.extend(list_nones)
 
+        # Перед слиянием аннотации целевых датасетов должны быть загружены в память
+        target_datasets = list(dict.fromkeys(
+            ann_item.get_dataset_name() for ann_item in list_annotations + list_to_delete
+        ))
+        # Блокировка снимается, когда датасеты загружены и слияние запущено, или при ошибке загрузки
+        self.is_merge_pending = True
+        self.commander.set_block(True)
+        self.lazy_loader.ensure_loaded(
+            target_datasets,
+            DATASETS,
+            lambda: self.start_merge_annotations(list_annotations, list_to_delete),
+            on_error=self.release_merge_block,
+            overlay_parent=self.display_scene
+        )
+
+    def release_merge_block(self):
+        self.is_merge_pending = False
+        self.commander.set_block(False)
+
+    def start_merge_annotations(self, list_annotations: list[FAnnotationItem], list_to_delete: list[FAnnotationItem]):
+        self.release_merge_block()
         self.overlay = UOverlayLoader(self.display_scene)
         self.merge_thread = UMergeAnnotationThread(self.project, list_annotations, list_to_delete, DATASETS)
         self.merge_thread.signal_on_loaded_image.connect(self.overlay.update_progress)
         self.merge_thread.signal_on_ended.connect(self.handle_on_ended_adding_dataset)
         self.merge_thread.start()
 
-        self.commander.set_block(False)
-
     @pyqtSlot(str)
     def handle_on_ended_adding_dataset(self, dataset_name: str):
         UMessageBox.show_ok("Добавлены аннотации в проект!")
@@ -349,51 +379,23 @@ class UPageAnnotation(QWidget, Ui_annotataion_page):
             UMessageBox.show_error("Не удалось выполнить загрузку изображений!")
             return
 
-        self.overlay = UOverlayLoader(self)
-
         if len(files) == 0:
             UMessageBox.show_error("В списке нет изображений!")
-            self.overlay = UOverlayLoader.delete_overlay(self.overlay)
             return
 
-        for index in range(len(files)):
-            file = files[index]
-            if isinstance(file, str):
-                thumb = UAnnotationThumbnail(
-                    200,
-                    175,
-                    files[index],
-                    None,
-                    []
-                )
-            elif isinstance(file, FAnnotationItem):
-                ann_data = file.get_annotation_data()
-                thumb = UAnnotationThumbnail(
-                    200,
-                    175,
-                    file.get_image_path(),
-                    file.get_dataset_name(),
-                    [annotation.copy() for annotation in ann_data]
-                )
-                for annotation in ann_data:
-                    self.list_total_annotations.increase_class(
-                        annotation.get_id(),
-                        annotation.get_class_name(),
-                        annotation.get_color()
-                    )
-            else:
-                continue
-            thumb = self.thumbnail_carousel.add_thumbnail(thumb)
-            self.update_labels_by_status(thumb.annotation_status, True)
-            self.label_count_images.setText(str(len(self.thumbnail_carousel.thumbnails)))
-            self.overlay.update_progress(
-                file.get_image_path() if isinstance(file, FAnnotationItem) else file,
-                index + 1,
-                len(files)
+        # Карусель хранит только состояние по индексам, элементы сцены создаются для видимых миниатюр
+        self.thumbnail_carousel.add_sources(files)
+        self.update_labels_by_status(EAnnotationStatus.NoAnnotation, True, len(files))
+        for class_id, count in count_item_classes(files).items():
+            self.list_total_annotations.increase_class(
+                class_id,
+                self.project.classes.get_name(class_id),
+                self.project.classes.get_color(class_id),
+                count
             )
+        self.label_count_images.setText(str(self.thumbnail_carousel.get_count()))
 
         UMessageBox.show_ok("Изображения загружены!")
-        self.overlay = UOverlayLoader.delete_overlay(self.overlay)
         self.annotation_scene.center_on_selected()
 
     def set_label_work_mode(self, mode: int):
@@ -419,8 +421,8 @@ class UPageAnnotation(QWidget, Ui_annotataion_page):
         self.update_labels_by_status(prev, False)
         self.update_labels_by_status(current, True)
 
-    def update_labels_by_status(self, status: EAnnotationStatus, to_increase: bool):
-        value = 1 if to_increase is True else -1
+    def update_labels_by_status(self, status: EAnnotationStatus, to_increase: bool, count: int = 1):
+        value = count if to_increase is True else -count
         if status.value == EAnnotationStatus.Annotated.value:
             self.current_annotated_count += value
             self.label_count_annotated.setText(str(self.current_annotated_count))
@@ -432,12 +434,14 @@ class UPageAnnotation(QWidget, Ui_annotataion_page):
             self.label_count_dropped.setText(str(self.current_dropped_count))
 
     def _annotate_image(self):
-        thumb_id, matrix = self.annotation_scene.get_selectable_matrix()
+        if not self.project.model_worker:
+            return
+        thumb_id, matrix = self.annotation_scene.get_selectable_matrix(self.project.model_worker.color_order)
         if thumb_id is None or matrix is None:
             return
         if self.thumbnail_carousel.get_current_thumbnail_status() == EAnnotationStatus.PerformingAnnotation:
             return
-        if self.project.model_worker and self.project.model_worker.is_running():
+        if self.project.model_worker.is_running():
             self.project.model_worker.add_to_queue(
                 thumb_id,
                 matrix
@@ -0,0 +1,54 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_load_annotations import collect_tasks
+from benchmarks.synthetic import create_dataset
+from dataset.annotation_index import UAnnotationIndex
+from dataset.label_parser import parse_label_file
+
+# Сравнение первого открытия датасета (разбор и заполнение индекса) с повторным открытием без изменений.
+# Запуск из папки desktop_app: python -m benchmarks.bench_annotation_index --images 20000
+
+
+def open_dataset(dataset_path: str, tasks: list):
+    index = UAnnotationIndex(dataset_path)
+    index.open()
+    results = list()
+    for label_path, image_path, label_kind in tasks:
+        label_stat, image_stat = os.stat(label_path), os.stat(image_path)
+        cached = index.get(label_path, label_stat, image_path, image_stat)
+        if cached is None:
+            image_path, label_kind, resolution, rows, error = parse_label_file(label_path, image_path, label_kind)
+            index.put(label_path, label_stat, image_path, image_stat, label_kind, resolution, rows)
+        else:
+            resolution, rows = cached
+        results.append((image_path, label_kind, resolution, rows))
+    index.commit()
+    index.close()
+    return results, index.hits, index.misses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dataset_path = os.path.join(temp_dir, "dataset").replace('\\', '/')
+        create_dataset(dataset_path, args.images)
+        tasks = collect_tasks(dataset_path)
+
+        for title in ("Первое открытие", "Повторное открытие"):
+            start = time.perf_counter()
+            results, hits, misses = open_dataset(dataset_path, tasks)
+            print(f"{title}: {time.perf_counter() - start:.2f} с, из индекса {hits}, разобрано {misses}")
+            if title == "Первое открытие":
+                first_results = results
+            else:
+                assert results == first_results, "Результат из индекса отличается от разбора файлов!"
+
+
+if __name__ == "__main__":
+    main()
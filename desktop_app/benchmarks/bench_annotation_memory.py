@@ -0,0 +1,98 @@
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from PyQt5.QtGui import QColor
+
+from dataset.annotation_table import FAnnotationTable
+from dataset.label_parser import LABEL_BOX
+from utility import FAnnotationClasses, FAnnotationData, FDetectAnnotationData
+
+# Память на аннотации проекта: прежние объекты с именем и QColor, объекты со __slots__ и колоночная таблица.
+# Запуск из папки desktop_app: python -m benchmarks.bench_annotation_memory --boxes 1000000
+
+
+class FLegacyDetectAnnotationData:
+    # Прежний формат: имя класса и копия QColor в каждом объекте
+    def __init__(self, x, y, width, height, object_id, class_id, class_name, color, res_w, res_h):
+        self.object_id = object_id
+        self.class_id = class_id
+        self.class_name = class_name
+        self.color = QColor(color)
+        self.w_resolution = res_w
+        self.h_resolution = res_h
+        self.X = x
+        self.Y = y
+        self.Width = width
+        self.Height = height
+
+
+def generate_rows(boxes_count: int, classes_count: int, seed: int = 0):
+    generator = random.Random(seed)
+    return [
+        (generator.randint(0, 1800), generator.randint(0, 1000), generator.randint(8, 120),
+         generator.randint(8, 120), index % 8 + 1, generator.randrange(classes_count))
+        for index in range(boxes_count)
+    ]
+
+
+def measure(name: str, build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name}: {current / 2 ** 20:.1f} МБ, {elapsed:.2f} с")
+    return result, current
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--boxes", type=int, default=1000000)
+    parser.add_argument("--classes", type=int, default=20)
+    parser.add_argument("--per-image", type=int, default=8)
+    args = parser.parse_args()
+
+    classes = FAnnotationClasses()
+    classes.add_classes_from_strings([f"class_{index}" for index in range(args.classes)])
+    FAnnotationData.set_classes(classes)
+
+    rows = generate_rows(args.boxes, args.classes)
+    images = [rows[i:i + args.per_image] for i in range(0, len(rows), args.per_image)]
+    print(f"Рамок: {len(rows)}, изображений: {len(images)}")
+
+    legacy, legacy_memory = measure("Объекты с именем и QColor", lambda: [
+        FLegacyDetectAnnotationData(
+            x, y, w, h, object_id, class_id, classes.get_name(class_id), classes.get_color(class_id), 1920, 1080
+        ) for x, y, w, h, object_id, class_id in rows
+    ])
+    del legacy
+
+    slotted, slotted_memory = measure("Объекты со __slots__", lambda: [
+        FDetectAnnotationData(x, y, w, h, object_id, class_id, 1920, 1080)
+        for x, y, w, h, object_id, class_id in rows
+    ])
+    del slotted
+
+    def build_table():
+        table = FAnnotationTable()
+        items = [table.add_parsed_item("", "", LABEL_BOX, (1920, 1080), image_rows) for image_rows in images]
+        return table, items
+    (table, items), table_memory = measure("Колоночная таблица", build_table)
+
+    print(f"__slots__: в {legacy_memory / slotted_memory:.1f} раз меньше, "
+          f"таблица: в {legacy_memory / table_memory:.1f} раз меньше")
+
+    # Переименование класса не затрагивает аннотации
+    start = time.perf_counter()
+    classes.rename_class(0, "renamed")
+    print(f"Переименование класса: {(time.perf_counter() - start) * 1e6:.1f} мкс")
+    assert items[0].annotation_list[0].get_class_name() == classes.get_name(images[0][0][5])
+
+
+if __name__ == "__main__":
+    main()
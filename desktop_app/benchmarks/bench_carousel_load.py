@@ -0,0 +1,65 @@
+import argparse
+import time
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QGraphicsScene
+
+from annotation.carousel import UThumbnailCarousel, UAnnotationThumbnail
+from benchmarks.bench_gallery_filter import create_items
+from commander import UAnnotationSignalHolder
+from utility import FAnnotationClasses, FAnnotationData
+
+# Загрузка изображений на страницу разметки: элемент сцены с копией аннотаций на каждое изображение
+# и виртуальная карусель с состоянием по индексам.
+# Запуск из папки desktop_app: python -m benchmarks.bench_carousel_load --images 20000
+
+
+def legacy_load(items: list) -> float:
+    # Прежняя загрузка: UAnnotationThumbnail с копией аннотаций для каждого изображения
+    scene = QGraphicsScene()
+    start = time.perf_counter()
+    x_position = 0
+    for index, item in enumerate(items):
+        thumbnail = UAnnotationThumbnail(
+            200, 175, item.get_image_path(), item.get_dataset_name(),
+            [annotation.copy() for annotation in item.get_annotation_data()]
+        )
+        thumbnail.setTransformationMode(Qt.SmoothTransformation)
+        scene.addItem(thumbnail)
+        thumbnail.setPos(x_position, 0)
+        thumbnail.set_index(index)
+        x_position += 210
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=20000)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    classes = FAnnotationClasses()
+    classes.add_classes_from_strings([f"class_{index}" for index in range(20)])
+    FAnnotationData.set_classes(classes)
+    items = create_items(args.images, 20, 6)
+
+    print(f"Изображений: {args.images}")
+    print(f"Элемент сцены на изображение: {legacy_load(items):.2f} с")
+
+    carousel = UThumbnailCarousel()
+    carousel.set_commander(UAnnotationSignalHolder())
+    carousel.resize(1280, 240)
+    carousel.show()
+    app.processEvents()
+    start = time.perf_counter()
+    carousel.add_sources(items)
+    elapsed = time.perf_counter() - start
+    # Элементы сцены создаются при первом пересчете видимой области
+    carousel.update_view()
+    print(f"Виртуальная карусель: {elapsed * 1e3:.1f} мс, элементов сцены {len(carousel.items)}")
+    carousel.image_loader.shutdown()
+    del app
+
+
+if __name__ == "__main__":
+    main()
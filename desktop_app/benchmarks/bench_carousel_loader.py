@@ -0,0 +1,90 @@
+import argparse
+import tempfile
+import time
+
+from PyQt5.QtWidgets import QApplication
+
+from annotation.carousel import UThumbnailCarousel, UCarouselImageLoader
+from benchmarks.bench_thumbnail_cache import create_images
+from commander import UAnnotationSignalHolder
+from dataset.pixmap_cache import FCacheStats
+from utility import FAnnotationClasses, FAnnotationData
+
+# Загрузка миниатюр карусели при быстрой прокрутке: сколько изображений декодируется и сколько ждать
+# видимые миниатюры после остановки. Прежде каждая показанная миниатюра запускала свой QThread.
+# Запуск из папки desktop_app: python -m benchmarks.bench_carousel_loader --images 300
+
+
+def wait_visible(app: QApplication, carousel: UThumbnailCarousel, timeout: float = 30) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        app.processEvents()
+        if all(carousel.items[index].uploaded for index in carousel.displayed_indexes):
+            break
+        time.sleep(0.001)
+    return time.perf_counter() - start
+
+
+def scroll(app: QApplication, carousel: UThumbnailCarousel, start: int, end: int, steps: int) -> set[int]:
+    # Прокрутка без ожидания загрузки: через карусель проходят все миниатюры между позициями, шаг - один кадр
+    passed = set()
+    scrollbar = carousel.horizontalScrollBar()
+    for step in range(steps + 1):
+        scrollbar.setValue(start + (end - start) * step // steps)
+        carousel.update_view()
+        app.processEvents()
+        passed.update(carousel.displayed_indexes)
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--steps", type=int, default=60)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    classes = FAnnotationClasses()
+    classes.add_classes_from_strings(["class_0", "class_1"])
+    FAnnotationData.set_classes(classes)
+
+    decoded = list()
+
+    def load_image(payload):
+        decoded.append(payload[0])
+        return UCarouselImageLoader.load_image(payload)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        items = create_images(temp_dir, args.images, args.width, args.height)
+        carousel = UThumbnailCarousel()
+        carousel.set_commander(UAnnotationSignalHolder())
+        carousel.image_loader.pool.task = load_image
+        carousel.resize(1280, 240)
+        carousel.show()
+        carousel.add_sources([item.get_image_path() for item in items])
+        carousel.update_view()
+        wait_visible(app, carousel)
+        decoded.clear()
+
+        maximum = carousel.horizontalScrollBar().maximum()
+        passed = scroll(app, carousel, 0, maximum, args.steps)
+        settle = wait_visible(app, carousel)
+        print(f"Прокрутка через {len(passed)} миниатюр: прежде {len(passed)} потоков и декодирований, "
+              f"сейчас {carousel.image_loader.pool.workers} потоков и {len(decoded)} декодирований, "
+              f"видимые загружены через {settle * 1e3:.0f} мс")
+
+        # Возврат к уже просмотренным миниатюрам в начале карусели
+        decoded.clear()
+        carousel.image_loader.pixmap_cache.stats = FCacheStats()
+        scroll(app, carousel, maximum, 0, args.steps)
+        settle = wait_visible(app, carousel)
+        print(f"Возврат к началу: {len(decoded)} декодирований, видимые загружены через {settle * 1e3:.1f} мс")
+        print(carousel.image_loader.pixmap_cache.stats)
+        carousel.image_loader.shutdown()
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import time
+
+from PyQt5.QtCore import QRectF, Qt
+from PyQt5.QtGui import QImage
+from PyQt5.QtWidgets import QApplication, QGraphicsScene
+
+from annotation.carousel import UThumbnailCarousel, UAnnotationThumbnail
+from commander import UAnnotationSignalHolder
+
+# Пересчет видимых миниатюр карусели при прокрутке: прежний scene.items(bounds) с проверками по спискам
+# и диапазон индексов из смещения прокрутки с разностями множеств.
+# Запуск из папки desktop_app: python -m benchmarks.bench_carousel_scroll --images 20000
+
+
+def legacy_display(scene: QGraphicsScene, bounds: QRectF, last_displayed: list) -> list:
+    selected_thumbnails = [item for item in scene.items(bounds, Qt.IntersectsItemBoundingRect)
+                           if isinstance(item, UAnnotationThumbnail)]
+    shown = [thumb for thumb in selected_thumbnails if thumb not in last_displayed]
+    hidden = [thumb for thumb in last_displayed if thumb not in selected_thumbnails]
+    assert len(shown) >= 0 and len(hidden) >= 0
+    return selected_thumbnails
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=20000)
+    parser.add_argument("--events", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    pitch, width = 210, 200
+    viewport_width = 1280
+
+    # Прежняя карусель: элемент сцены на каждое изображение
+    scene = QGraphicsScene()
+    for index in range(args.images):
+        thumbnail = UAnnotationThumbnail(width, 175, f"image_{index}.jpg", None, [])
+        thumbnail.setPos(index * pitch, 0)
+        scene.addItem(thumbnail)
+    last_displayed = list()
+    start = time.perf_counter()
+    for event in range(args.events):
+        left = (args.images * pitch - viewport_width) * event / args.events
+        last_displayed = legacy_display(scene, QRectF(left - 400, 0, viewport_width + 800, 175), last_displayed)
+    legacy_time = (time.perf_counter() - start) / args.events
+
+    carousel = UThumbnailCarousel()
+    carousel.set_commander(UAnnotationSignalHolder())
+    carousel.resize(viewport_width, 240)
+    carousel.show()
+    carousel.add_sources([f"image_{index}.jpg" for index in range(args.images)])
+    # Файлов изображений нет: загрузчик возвращает пустую миниатюру
+    carousel.image_loader.pool.task = lambda payload: QImage(8, 8, QImage.Format_RGB32)
+    scrollbar = carousel.horizontalScrollBar()
+    displayed = set()
+    start = time.perf_counter()
+    for event in range(args.events):
+        scrollbar.setValue(scrollbar.maximum() * event // args.events)
+        display_indexes = set(carousel.get_display_range())
+        shown, hidden = display_indexes - displayed, displayed - display_indexes
+        displayed = display_indexes
+    range_time = (time.perf_counter() - start) / args.events
+    print(f"Изображений {args.images}, видимых с запасом {len(displayed)}")
+    print(f"Поиск видимых миниатюр: прежде {legacy_time * 1e3:.3f} мс, сейчас {range_time * 1e3:.3f} мс на событие")
+
+    # Серия событий прокрутки в пределах одного кадра дает один пересчет
+    passes = list()
+    carousel.view_timer.timeout.connect(lambda: passes.append(1))
+    for event in range(100):
+        scrollbar.setValue(scrollbar.value() - 5)
+    app.processEvents()
+    time.sleep(carousel.view_timer.interval() / 1000 * 2)
+    app.processEvents()
+    print(f"100 событий прокрутки за кадр: {len(passes)} пересчет видимой области")
+    carousel.image_loader.shutdown()
+    del app
+
+
+if __name__ == "__main__":
+    main()
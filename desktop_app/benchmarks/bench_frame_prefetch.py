@@ -0,0 +1,88 @@
+import argparse
+import tempfile
+import time
+
+from PyQt5.QtWidgets import QApplication
+
+from annotation.annotation_scene import UAnnotationGraphicsView
+from annotation.carousel import UThumbnailCarousel
+from benchmarks.bench_thumbnail_cache import create_images
+from commander import UAnnotationSignalHolder
+from utility import FAnnotationClasses, FAnnotationData
+
+# Листание изображений на странице разметки: время display_image в главном потоке на одно изображение.
+# Прежде каждое изображение декодировалось через cv2.imread и cvtColor в главном потоке при выборе.
+# Запуск из папки desktop_app: python -m benchmarks.bench_frame_prefetch --images 40 --pause 500
+
+
+def idle(app: QApplication, seconds: float):
+    # Пауза пользователя между нажатиями клавиш: главный поток обрабатывает события
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def browse(app: QApplication, carousel: UThumbnailCarousel, times: list[float], pause: float) -> list[float]:
+    times.clear()
+    for index in range(1, carousel.get_count()):
+        carousel.select_index(index)
+        idle(app, pause)
+    return times
+
+
+def report(name: str, times: list[float]):
+    times = sorted(times)
+    print(f"{name}: среднее {sum(times) / len(times) * 1e3:.1f} мс, "
+          f"медиана {times[len(times) // 2] * 1e3:.1f} мс, макс. {times[-1] * 1e3:.1f} мс")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--pause", type=float, default=500, help="пауза между изображениями, мс")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    classes = FAnnotationClasses()
+    classes.add_classes_from_strings(["class_0", "class_1"])
+    FAnnotationData.set_classes(classes)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        items = create_images(temp_dir, args.images, args.width, args.height)
+        commander = UAnnotationSignalHolder()
+        carousel = UThumbnailCarousel()
+        carousel.set_commander(commander)
+        carousel.resize(1280, 240)
+        scene = UAnnotationGraphicsView()
+        scene.set_scene_parameters(commander, None)
+
+        times = list()
+
+        def display_image(thumbnail, status):
+            start = time.perf_counter()
+            scene.display_image(thumbnail, status)
+            times.append(time.perf_counter() - start)
+
+        commander.selected_thumbnail.disconnect()
+        commander.selected_thumbnail.connect(display_image)
+
+        carousel.add_sources([item.get_image_path() for item in items])
+        report("Без предварительной загрузки", browse(app, carousel, times, args.pause / 1000))
+
+        carousel.clear_thumbnails()
+        scene.set_frame_prefetcher(carousel.frame_prefetcher)
+        carousel.add_sources([item.get_image_path() for item in items])
+        idle(app, args.pause / 1000)
+        report("С предварительной загрузкой", browse(app, carousel, times, args.pause / 1000))
+        print(carousel.frame_prefetcher.stats)
+
+        carousel.frame_prefetcher.shutdown()
+        carousel.image_loader.shutdown()
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import tempfile
+import time
+
+from PyQt5.QtWidgets import QApplication
+
+from benchmarks.bench_thumbnail_cache import create_images
+from dataset.decode_pool import UPriorityWorkerPool, get_default_workers
+from dataset.image_gallery import UGalleryImageLoader
+from utility import FAnnotationClasses, FAnnotationData
+
+# Пропускная способность декодирования миниатюр галереи: прежний один поток и пул с очередью по приоритету.
+# Запуск из папки desktop_app: python -m benchmarks.bench_gallery_decode --images 200
+
+
+def measure(items: list, cell_size: int, workers: int) -> float:
+    pool = UPriorityWorkerPool(UGalleryImageLoader.render_image, workers)
+    start = time.perf_counter()
+    for index, item in enumerate(items):
+        pool.submit(index, (item, cell_size, None), index)
+    loaded = 0
+    while loaded < len(items):
+        results = pool.take_results()
+        assert all(not image.isNull() for _, image in results)
+        loaded += len(results)
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    return len(items) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--cell-size", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=get_default_workers())
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    classes = FAnnotationClasses()
+    classes.add_classes_from_strings(["class_0", "class_1"])
+    FAnnotationData.set_classes(classes)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        items = create_images(temp_dir, args.images, args.width, args.height)
+        print(f"Изображений {len(items)} размером {args.width}x{args.height}")
+        print(f"Один поток: {measure(items, args.cell_size, 1):.0f} миниатюр/с")
+        print(f"Пул из {args.workers} потоков: {measure(items, args.cell_size, args.workers):.0f} миниатюр/с")
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import random
+import time
+
+from PyQt5.QtWidgets import QApplication
+
+from dataset.annotation_table import FAnnotationTable
+from dataset.gallery_index import UGalleryIndex
+from dataset.label_parser import LABEL_BOX, LABEL_POLYGON
+from utility import FAnnotationClasses, FAnnotationData, FDetectAnnotationData, EAnnotationType
+
+# Фильтрация галереи по классам: проход по аннотациям каждого изображения и инвертированный индекс таблиц.
+# Запуск из папки desktop_app: python -m benchmarks.bench_gallery_filter --images 200000
+
+
+def create_items(images: int, classes: int, per_image: int, seed: int = 0) -> list:
+    generator = random.Random(seed)
+    table = FAnnotationTable()
+    items = list()
+    for index in range(images):
+        count = generator.randint(0, per_image)
+        if index % 5 == 4:
+            rows = [([(1, 1), (5, 1), (5, 5)], box, generator.randrange(classes)) for box in range(count)]
+            items.append(table.add_parsed_item(f"image_{index}.jpg", "bench", LABEL_POLYGON, (640, 480), rows))
+        else:
+            rows = [(10, 10, 20, 20, box, generator.randrange(classes)) for box in range(count)]
+            items.append(table.add_parsed_item(f"image_{index}.jpg", "bench", LABEL_BOX, (640, 480), rows))
+    return items
+
+
+def legacy_filter(items: list, image_filter: dict[int, bool], type_list: list[EAnnotationType]) -> dict[int, int]:
+    # Прежний алгоритм: объекты аннотаций каждого изображения и set(class_list) на каждое переключение фильтра
+    available_annotations = set(index for index, is_available in image_filter.items() if is_available)
+    filtered_indexes: dict[int, int] = dict()
+    for index, item in enumerate(items):
+        class_list = []
+        for annotation in item.annotation_list:
+            if annotation.get_annotation_type() in type_list:
+                class_list.append(annotation.class_id)
+        if (set(class_list) & available_annotations and index not in filtered_indexes) or len(item.annotation_list) == 0:
+            filtered_indexes[index] = len(filtered_indexes)
+    return filtered_indexes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=200000)
+    parser.add_argument("--classes", type=int, default=20)
+    parser.add_argument("--per-image", type=int, default=6)
+    parser.add_argument("--legacy-images", type=int, default=20000, help="Размер замера прежнего алгоритма")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    classes = FAnnotationClasses()
+    classes.add_classes_from_strings([f"class_{index}" for index in range(args.classes)])
+    FAnnotationData.set_classes(classes)
+
+    items = create_items(args.images, args.classes, args.per_image)
+    type_list = [EAnnotationType.BoundingBox, EAnnotationType.Segmentation]
+    image_filter = {class_id: class_id % 3 == 0 for class_id in range(args.classes)}
+
+    gallery_index = UGalleryIndex()
+    gallery_index.set_annotations(items)
+
+    start = time.perf_counter()
+    gallery_index.filter(image_filter, type_list)
+    print(f"Первая фильтрация {len(items)} изображений с построением индекса: {time.perf_counter() - start:.3f} с")
+
+    toggles = 10
+    start = time.perf_counter()
+    for toggle in range(toggles):
+        image_filter[toggle % args.classes] = not image_filter[toggle % args.classes]
+        gallery_index.filter(image_filter, type_list)
+    print(f"Переключение класса: {(time.perf_counter() - start) / toggles * 1000:.1f} мс")
+
+    # Изменение аннотаций обновляет индекс на месте
+    items[0].update_annotation_data([FDetectAnnotationData(1, 1, 5, 5, 1, 1, 640, 480)])
+    gallery_index.filter(image_filter, type_list)
+    assert gallery_index.filtered_indexes == legacy_filter(items, image_filter, type_list)
+
+    legacy_items = items[:args.legacy_images]
+    start = time.perf_counter()
+    legacy_filter(legacy_items, image_filter, type_list)
+    legacy_time = (time.perf_counter() - start) * len(items) / len(legacy_items)
+    print(f"Прежний алгоритм (оценка для {len(items)} изображений): {legacy_time * 1000:.0f} мс")
+
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+
+from PyQt5.QtGui import QImage, QColor
+from PyQt5.QtWidgets import QApplication
+
+from dataset.image_gallery import UImageGallery, UGraphicsAnnotationGalleryItem
+from dataset.pixmap_cache import get_pixmap_bytes, FCacheStats
+from utility import FAnnotationItem, EAnnotationType
+
+# Память декодированных миниатюр галереи при прокрутке: прежний кэш на 500 виджетов и кэш с бюджетом в мегабайтах.
+# Запуск из папки desktop_app: python -m benchmarks.bench_gallery_memory --images 2000 --cell-size 600 --budget 256
+
+
+def scroll_through(gallery: UImageGallery, images: int, cell_size: int) -> int:
+    # Прокрутка всей галереи: каждое изображение создает виджет и получает декодированную миниатюру
+    image = QImage(cell_size, cell_size, QImage.Format_ARGB32_Premultiplied)
+    image.fill(QColor(128, 128, 128))
+    peak = 0
+    for index in range(images):
+        gallery.add_item(UGraphicsAnnotationGalleryItem(gallery.annotation_data[index], index, False, cell_size))
+        gallery.set_images([(index, image.copy())])
+        held = sum(get_pixmap_bytes(widget.pixmap) for widget in gallery.widget_cache.values() if widget.pixmap)
+        peak = max(peak, held)
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=2000)
+    parser.add_argument("--cell-size", type=int, default=600)
+    parser.add_argument("--budget", type=float, default=256)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    items = [FAnnotationItem([], f"image_{index}.jpg", "bench", (640, 480)) for index in range(args.images)]
+
+    gallery = UImageGallery()
+    # Миниатюры подаются напрямую, загрузчик галереи не используется
+    gallery.signal_changed_viewport.disconnect()
+    gallery.set_cell_size(args.cell_size)
+    gallery.set_dataset_annotations(items)
+    gallery.filter_images({0: True}, [EAnnotationType.BoundingBox])
+    # Прежнее поведение: изображения живут столько же, сколько виджеты сцены
+    gallery.set_pixmap_cache_budget(2 ** 20)
+    legacy_peak = scroll_through(gallery, args.images, args.cell_size)
+    print(f"Ячейка {args.cell_size}px, изображений {args.images}")
+    print(f"Кэш на {gallery.cache_size} виджетов: пик {legacy_peak / 2 ** 20:.0f} МБ миниатюр")
+
+    gallery.clear_scene()
+    gallery.filter_images({0: True}, [EAnnotationType.BoundingBox])
+    gallery.set_pixmap_cache_budget(args.budget)
+    peak = scroll_through(gallery, args.images, args.cell_size)
+    print(f"Кэш с бюджетом {args.budget:.0f} МБ: пик {peak / 2 ** 20:.0f} МБ миниатюр, "
+          f"в кэше {len(gallery.pixmap_cache)} изображений")
+
+    # Обратная прокрутка: виджеты пересоздаются, миниатюры берутся из кэша, пока они не вытеснены
+    gallery.pixmap_cache.stats = FCacheStats()
+    for index in range(args.images - 1, -1, -1):
+        gallery.add_item(UGraphicsAnnotationGalleryItem(gallery.annotation_data[index], index, False, args.cell_size))
+    print(gallery.pixmap_cache.stats)
+
+    gallery.loader_thread.quit()
+    gallery.loader_thread.wait()
+    del app
+
+
+if __name__ == "__main__":
+    main()
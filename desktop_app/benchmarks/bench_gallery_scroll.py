@@ -0,0 +1,68 @@
+import argparse
+import time
+
+from PyQt5.QtWidgets import QApplication
+
+from dataset.image_gallery import UImageGallery
+from utility import FAnnotationItem, EAnnotationType
+
+# Задержка пересчета видимой области галереи при прокрутке: срез порядка отфильтрованных изображений
+# и прежний list(filtered_indexes.keys())[index] на каждую ячейку.
+# Запуск из папки desktop_app: python -m benchmarks.bench_gallery_scroll --images 500000
+
+
+def legacy_visible(filtered_indexes: dict[int, int], index_first: int, index_last: int) -> set[int]:
+    current_visible = [i for i in range(index_first, index_last + 1) if len(filtered_indexes) > i >= 0]
+    return set([list(filtered_indexes.keys())[index] for index in current_visible])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=500000)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--legacy-steps", type=int, default=5)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    gallery = UImageGallery()
+    gallery.resize(1280, 900)
+    gallery.show()
+    app.processEvents()
+    # Замеряется только пересчет видимой области, без создания виджетов и загрузки изображений
+    gallery.signal_changed_viewport.disconnect()
+    visible_sets = list()
+    gallery.signal_changed_viewport.connect(lambda indexes, force: visible_sets.append(indexes))
+
+    items = [FAnnotationItem([], f"image_{index}.jpg", "bench", (640, 480)) for index in range(args.images)]
+    gallery.set_dataset_annotations(items)
+    gallery.filter_images({0: True}, [EAnnotationType.BoundingBox])
+    print(f"Изображений в галерее: {len(gallery.filtered_order)}")
+
+    scrollbar = gallery.verticalScrollBar()
+    positions = [scrollbar.maximum() * step // args.steps for step in range(args.steps)]
+    latencies = list()
+    for position in positions:
+        scrollbar.setValue(position)
+        start = time.perf_counter()
+        gallery.update_visibility()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(f"Пересчет видимой области: медиана {latencies[len(latencies) // 2] * 1e3:.3f} мс, "
+          f"максимум {latencies[-1] * 1e3:.3f} мс")
+
+    visible_count = len(visible_sets[-1])
+    start = time.perf_counter()
+    for step in range(args.legacy_steps):
+        index_first = len(gallery.filtered_order) * step // args.legacy_steps
+        assert legacy_visible(gallery.filtered_indexes, index_first, index_first + visible_count - 1) == \
+            set(gallery.filtered_order[index_first:index_first + visible_count])
+    print(f"Прежний алгоритм ({visible_count} видимых ячеек): "
+          f"{(time.perf_counter() - start) / args.legacy_steps * 1e3:.0f} мс на событие прокрутки")
+
+    gallery.loader_thread.quit()
+    gallery.loader_thread.wait()
+    del app
+
+
+if __name__ == "__main__":
+    main()
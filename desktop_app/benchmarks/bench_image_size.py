@@ -0,0 +1,55 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import write_png
+from supporting.image_size import get_image_size, clear_image_size_cache
+
+# Сравнение чтения разрешения из заголовка с iio.immeta.
+# Запуск из папки desktop_app: python -m benchmarks.bench_image_size --images 10000 [--path папка с изображениями]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=10000)
+    parser.add_argument("--path", type=str, default=None, help="Папка с реальными изображениями")
+    args = parser.parse_args()
+
+    import imageio.v3 as iio
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.path:
+            files = [
+                os.path.join(args.path, file).replace('\\', '/') for file in sorted(os.listdir(args.path))
+                if file.lower().endswith((".jpg", ".jpeg", ".png"))
+            ][:args.images]
+        else:
+            files = list()
+            for index in range(args.images):
+                path = os.path.join(temp_dir, f"image_{index:07d}.png").replace('\\', '/')
+                write_png(path, 64, 48)
+                files.append(path)
+        print(f"Изображений: {len(files)}")
+
+        start = time.perf_counter()
+        immeta_sizes = [tuple(iio.immeta(path)["shape"]) for path in files]
+        immeta_time = time.perf_counter() - start
+        print(f"iio.immeta: {immeta_time:.2f} с")
+
+        clear_image_size_cache()
+        start = time.perf_counter()
+        header_sizes = [get_image_size(path) for path in files]
+        header_time = time.perf_counter() - start
+        print(f"Чтение заголовка: {header_time:.2f} с, ускорение: {immeta_time / header_time:.1f}x")
+
+        start = time.perf_counter()
+        for path in files:
+            get_image_size(path)
+        print(f"Повторный запрос из кэша: {time.perf_counter() - start:.2f} с")
+
+        assert header_sizes == immeta_sizes, "Разрешения из заголовков не совпадают с iio.immeta!"
+
+
+if __name__ == "__main__":
+    main()
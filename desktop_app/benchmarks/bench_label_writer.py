@@ -0,0 +1,81 @@
+import argparse
+import os
+import tempfile
+import time
+
+from dataset.label_writer import ULabelWriter, write_label_files
+from utility import FDetectAnnotationData, FPolygonAnnotationData
+
+# Запись файлов аннотаций при слиянии: прежняя перезапись файла на каждый объект и запись один раз на файл.
+# Запуск из папки desktop_app: python -m benchmarks.bench_label_writer --images 2000 --objects 40
+
+
+def create_annotations(objects: int) -> list:
+    annotations = list()
+    for index in range(objects):
+        if index % 4 == 3:
+            annotations.append(FPolygonAnnotationData([(10, 10), (30, 12), (25, 40)], index, index % 5, 640, 480))
+        else:
+            annotations.append(FDetectAnnotationData(10 + index, 10, 20, 20, index, index % 5, 640, 480))
+    return annotations
+
+
+def get_label_files(root: str, image_index: int, annotations: list) -> dict[str, list[str]]:
+    label_files: dict[str, list[str]] = dict()
+    for annotation in annotations:
+        folder = "labels" if isinstance(annotation, FDetectAnnotationData) else "labels_seg"
+        label_path = os.path.join(root, folder, f"image_{image_index:06d}.txt").replace('\\', '/')
+        label_files.setdefault(label_path, list()).append(str(annotation) + '\n')
+    return label_files
+
+
+def legacy_write(root: str, images: int, annotations: list):
+    # Прежний алгоритм: mkdir и перезапись файла всеми строками на каждый объект изображения
+    for image_index in range(images):
+        for annotation in annotations:
+            folder = "labels" if isinstance(annotation, FDetectAnnotationData) else "labels_seg"
+            label_dir = os.path.join(root, folder)
+            os.makedirs(label_dir, exist_ok=True)
+            with open(os.path.join(label_dir, f"image_{image_index:06d}.txt"), "w") as save_file:
+                save_file.writelines([str(line) + '\n' for line in annotations])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=2000)
+    parser.add_argument("--objects", type=int, default=40)
+    args = parser.parse_args()
+
+    annotations = create_annotations(args.objects)
+    print(f"Изображений: {args.images}, объектов на изображение: {args.objects}")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = os.path.join(temp_dir, "legacy")
+        start = time.perf_counter()
+        legacy_write(root, args.images, annotations)
+        print(f"Перезапись на каждый объект: {time.perf_counter() - start:.2f} с")
+
+        root = os.path.join(temp_dir, "sync")
+        created_dirs: set[str] = set()
+        start = time.perf_counter()
+        for image_index in range(args.images):
+            write_label_files(get_label_files(root, image_index, annotations), created_dirs)
+        print(f"Один раз на файл: {time.perf_counter() - start:.2f} с")
+
+        root = os.path.join(temp_dir, "async")
+        start = time.perf_counter()
+        label_writer = ULabelWriter()
+        label_writer.start()
+        for image_index in range(args.images):
+            label_writer.submit(get_label_files(root, image_index, annotations))
+        submitted = time.perf_counter() - start
+        errors = label_writer.close()
+        print(f"Фоновая запись: постановка {submitted:.2f} с, всего {time.perf_counter() - start:.2f} с")
+        assert not errors, errors[:3]
+        assert label_writer.written == 2 * args.images
+        assert len(os.listdir(os.path.join(root, "labels"))) == args.images
+        assert not [name for name in os.listdir(os.path.join(root, "labels_seg")) if name.endswith(".tmp")]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.synthetic import create_dataset
+from dataset.label_parser import LABEL_BOX, LABEL_POLYGON, parse_label_chunk
+
+# Замер масштабирования разбора аннотаций по количеству процессов.
+# Запуск из папки desktop_app: python -m benchmarks.bench_load_annotations --images 20000
+
+
+def collect_tasks(dataset_path: str):
+    tasks = list()
+    for folder, label_kind in (("labels", LABEL_BOX), ("labels_seg", LABEL_POLYGON)):
+        label_dir = os.path.join(dataset_path, folder).replace('\\', '/')
+        for file in sorted(os.listdir(label_dir)):
+            image_path = os.path.join(dataset_path, "images", os.path.splitext(file)[0] + ".png").replace('\\', '/')
+            tasks.append((os.path.join(label_dir, file).replace('\\', '/'), image_path, label_kind))
+    return tasks
+
+
+def run_parse(tasks: list, workers: int, chunk_size: int):
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    if workers <= 1:
+        return [result for chunk in chunks for result in parse_label_chunk(chunk)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [result for chunk in pool.map(parse_label_chunk, chunks) for result in chunk]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=20000)
+    parser.add_argument("--chunk", type=int, default=256)
+    parser.add_argument("--path", type=str, default=None, help="Существующий датасет вместо синтетического")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dataset_path = args.path
+        if dataset_path is None:
+            dataset_path = os.path.join(temp_dir, "dataset").replace('\\', '/')
+            print(f"Создание синтетического датасета на {args.images} изображений...")
+            create_dataset(dataset_path, args.images)
+
+        tasks = collect_tasks(dataset_path)
+        print(f"Файлов аннотаций: {len(tasks)}")
+
+        serial_start = time.perf_counter()
+        serial_result = run_parse(tasks, 1, args.chunk)
+        serial_time = time.perf_counter() - serial_start
+        print(f"Процессов: 1, время: {serial_time:.2f} с")
+
+        workers = 2
+        while workers <= (os.cpu_count() or 1):
+            start = time.perf_counter()
+            result = run_parse(tasks, workers, args.chunk)
+            elapsed = time.perf_counter() - start
+            assert result == serial_result, "Результат пула процессов отличается от последовательного разбора!"
+            print(f"Процессов: {workers}, время: {elapsed:.2f} с, ускорение: {serial_time / elapsed:.2f}x")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import os
+import tempfile
+import time
+
+from project import UTrainProject, DATASETS, IMAGES, LABELS
+from utility import FAnnotationItem, FDetectAnnotationData
+
+# Слияние и удаление аннотаций в проекте: поиск по индексу вместо прохода по списку.
+# Запуск из папки desktop_app: python -m benchmarks.bench_project_annotations --items 50000
+
+
+def create_items(project: UTrainProject, dataset: str, count: int) -> list[FAnnotationItem]:
+    images_dir = os.path.join(project.path, DATASETS, dataset, IMAGES).replace('\\', '/')
+    labels_dir = os.path.join(project.path, DATASETS, dataset, LABELS).replace('\\', '/')
+    os.makedirs(images_dir, exist_ok=True)
+    os.makedirs(labels_dir, exist_ok=True)
+
+    items = list()
+    for index in range(count):
+        image_path = os.path.join(images_dir, f"image_{index:07d}.png").replace('\\', '/')
+        # Пустые файлы: удаление проверяет только их наличие
+        open(image_path, "w").close()
+        open(os.path.join(labels_dir, f"image_{index:07d}.txt"), "w").close()
+        items.append(FAnnotationItem(
+            [FDetectAnnotationData(10, 10, 20, 20, 1, index % 4, 64, 48)],
+            image_path,
+            dataset,
+            (64, 48)
+        ))
+    return items
+
+
+def legacy_update_and_remove(ann_list: list[FAnnotationItem], items: list[FAnnotationItem]):
+    # Прежний алгоритм: next(...) по списку и list.remove
+    for item in items:
+        found = next((ann_item for ann_item in ann_list if ann_item == item), None)
+        found.update_annotation_data(item.get_annotation_data())
+    for item in items:
+        ann_list.remove(item)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--legacy-items", type=int, default=5000, help="Размер замера прежнего алгоритма")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        project = UTrainProject()
+        project.create(temp_dir, "bench", ["class_0", "class_1", "class_2", "class_3"])
+        dataset = "bench_dataset"
+        project.add_dataset(dataset)
+        project.set_dataset_loaded(dataset)
+
+        items = create_items(project, dataset, args.items)
+        print(f"Элементов: {len(items)}")
+
+        start = time.perf_counter()
+        for item in items:
+            project.add_annotation(dataset, item)
+        print(f"Добавление: {time.perf_counter() - start:.2f} с")
+
+        start = time.perf_counter()
+        for item in items:
+            project.update_annotation(item)
+        print(f"Обновление (слияние): {time.perf_counter() - start:.2f} с")
+
+        start = time.perf_counter()
+        errors = project.remove_annotations(items)
+        print(f"Удаление: {time.perf_counter() - start:.2f} с")
+        assert not errors, errors[:3]
+        assert len(project.get_current_annotations()[dataset]) == 0
+
+        legacy_items = items[:args.legacy_items]
+        legacy_list = [item.copy() for item in legacy_items]
+        start = time.perf_counter()
+        legacy_update_and_remove(legacy_list, legacy_items)
+        legacy_time = time.perf_counter() - start
+        scale = (len(items) / max(1, len(legacy_items))) ** 2
+        print(f"Прежний алгоритм на {len(legacy_items)} элементах: {legacy_time:.2f} с, "
+              f"оценка для {len(items)}: {legacy_time * scale:.0f} с")
+
+
+if __name__ == "__main__":
+    main()
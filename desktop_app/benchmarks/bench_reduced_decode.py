@@ -0,0 +1,60 @@
+import argparse
+import tempfile
+import time
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QImageReader
+from PyQt5.QtWidgets import QApplication
+
+from benchmarks.bench_thumbnail_cache import create_images
+from dataset.thumbnail_cache import load_scaled_image, get_reduced_size
+
+# Миниатюры галереи и карусели: полное декодирование с уменьшением и декодирование в уменьшенном размере (DCT libjpeg).
+# Запуск из папки desktop_app: python -m benchmarks.bench_reduced_decode --images 50 --width 1920 --height 1440
+
+
+def full_decode(image_path: str, size: int) -> tuple[QImage, int]:
+    image = QImage(image_path)
+    decoded_bytes = image.sizeInBytes()
+    return image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation), decoded_bytes
+
+
+def reduced_decode(image_path: str, size: int) -> tuple[QImage, int]:
+    reader = QImageReader(image_path)
+    reduced = get_reduced_size(reader.size(), size, size)
+    # Размер промежуточного изображения: 4 байта на пиксель, как у полного декодирования
+    return load_scaled_image(image_path, size, size), reduced.width() * reduced.height() * 4
+
+
+def measure(name: str, decode, image_paths: list[str], size: int) -> float:
+    start = time.perf_counter()
+    decoded_bytes = 0
+    for image_path in image_paths:
+        image, image_bytes = decode(image_path, size)
+        assert not image.isNull() and max(image.width(), image.height()) == size
+        decoded_bytes += image_bytes
+    elapsed = (time.perf_counter() - start) / len(image_paths)
+    print(f"{name}: {elapsed * 1000:.1f} мс, декодировано {decoded_bytes / len(image_paths) / 2 ** 20:.2f} МБ на изображение")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=50)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1440)
+    parser.add_argument("--size", type=int, default=200)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_paths = [item.get_image_path() for item in create_images(temp_dir, args.images, args.width, args.height)]
+        print(f"JPEG {args.width}x{args.height}, миниатюра {args.size}")
+        full_time = measure("Полное декодирование", full_decode, image_paths, args.size)
+        reduced_time = measure("Уменьшенное декодирование", reduced_decode, image_paths, args.size)
+        print(f"Ускорение: {full_time / reduced_time:.1f}x")
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import tempfile
+import time
+
+import numpy as np
+from PyQt5.QtGui import QImage
+from PyQt5.QtWidgets import QApplication
+
+from annotation.annotation_scene import UAnnotationGraphicsView
+from benchmarks.bench_thumbnail_cache import create_images
+from commander import UAnnotationSignalHolder
+from utility import FAnnotationClasses, FAnnotationData, EColorOrder
+
+# Передача изображения сцены разметки модели (автоаннотация, каждый щелчок SAM2).
+# Прежде матрица собиралась из QPixmap: toImage, convertToFormat(RGB888) и копия буфера, порядок каналов RGB.
+# Запуск из папки desktop_app: python -m benchmarks.bench_selectable_matrix --repeats 20
+
+
+def get_matrix_from_pixmap(scene: UAnnotationGraphicsView) -> np.ndarray:
+    image = scene.get_image().pixmap().toImage()
+    image = image.convertToFormat(QImage.Format_RGB888)
+    width, height = image.width(), image.height()
+    buffer = image.bits()
+    buffer.setsize(height * width * 3)
+    return np.array(buffer, dtype=np.uint8).reshape((height, width, 3))
+
+
+def measure(function, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    classes = FAnnotationClasses()
+    classes.add_classes_from_strings(["class_0", "class_1"])
+    FAnnotationData.set_classes(classes)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        item, = create_images(temp_dir, 1, args.width, args.height)
+        scene = UAnnotationGraphicsView()
+        scene.set_scene_parameters(UAnnotationSignalHolder(), None)
+        scene.display_image((0, item.get_image_path(), []), 1)
+
+        before = measure(lambda: get_matrix_from_pixmap(scene), args.repeats)
+        after = measure(lambda: scene.get_selectable_matrix(EColorOrder.BGR), args.repeats)
+        print(f"Изображение {args.width}x{args.height}: прежде {before * 1e3:.1f} мс на вызов, "
+              f"сейчас {after * 1e6:.1f} мкс")
+
+        _, matrix = scene.get_selectable_matrix(EColorOrder.BGR)
+        old_matrix = get_matrix_from_pixmap(scene)
+        print(f"Общий буфер с display_matrix: {np.shares_memory(matrix, scene.display_matrix)}, "
+              f"запись запрещена: {not matrix.flags.writeable}")
+        print(f"Прежняя матрица совпадает с BGR: {np.array_equal(old_matrix, matrix)}, "
+              f"с RGB: {np.array_equal(old_matrix, scene.get_selectable_matrix(EColorOrder.RGB)[1])}")
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import os
+import tempfile
+import time
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QColor, QPainter
+from PyQt5.QtWidgets import QApplication
+
+from dataset.image_gallery import UGraphicsAnnotationGalleryItem
+from dataset.thumbnail_cache import UThumbnailCache
+from utility import FAnnotationClasses, FAnnotationData, FAnnotationItem, FDetectAnnotationData
+
+# Миниатюры галереи: декодирование полного изображения на каждую ячейку и кэш миниатюр на диске и в памяти.
+# Запуск из папки desktop_app: python -m benchmarks.bench_thumbnail_cache --images 100
+
+
+def create_images(folder: str, count: int, width: int, height: int) -> list[FAnnotationItem]:
+    items = list()
+    for index in range(count):
+        image = QImage(width, height, QImage.Format_RGB888)
+        image.fill(QColor(index * 7 % 255, 120, 200))
+        painter = QPainter(image)
+        painter.fillRect(index % 500, 100, 300, 200, Qt.darkGreen)
+        painter.end()
+        image_path = os.path.join(folder, f"image_{index:05d}.jpg").replace('\\', '/')
+        image.save(image_path, "jpg", 90)
+        annotations = [
+            FDetectAnnotationData(100 + box * 50, 200, 120, 80, box, box % 2, width, height) for box in range(10)
+        ]
+        items.append(FAnnotationItem(annotations, image_path, "bench", (width, height)))
+    return items
+
+
+def measure(name: str, items: list[FAnnotationItem], cell_size: int, thumbnail_cache: UThumbnailCache | None):
+    start = time.perf_counter()
+    for index, item in enumerate(items):
+        image = UGraphicsAnnotationGalleryItem(item, index, False, cell_size).create_image(thumbnail_cache)
+        assert not image.isNull()
+    elapsed = time.perf_counter() - start
+    print(f"{name}: {elapsed / len(items) * 1000:.1f} мс на ячейку")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=100)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--cell-size", type=int, default=200)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    classes = FAnnotationClasses()
+    classes.add_classes_from_strings(["class_0", "class_1"])
+    FAnnotationData.set_classes(classes)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        items = create_images(temp_dir, args.images, args.width, args.height)
+        print(f"Изображений {len(items)} размером {args.width}x{args.height}, ячейка {args.cell_size}")
+
+        measure("Без кэша", items, args.cell_size, None)
+        thumbnail_cache = UThumbnailCache(os.path.join(temp_dir, "thumbnails"), memory_items=args.images)
+        measure("Кэш, первое создание", items, args.cell_size, thumbnail_cache)
+        thumbnail_cache.clear_memory()
+        measure("Кэш на диске", items, args.cell_size, thumbnail_cache)
+        measure("Кэш в памяти", items, args.cell_size, thumbnail_cache)
+        print(f"Попаданий в память: {thumbnail_cache.memory_hits}, на диск: {thumbnail_cache.disk_hits}, "
+              f"промахов: {thumbnail_cache.misses}, формат: {thumbnail_cache.format}")
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import time
+
+from PyQt5.QtWidgets import QApplication
+
+from dataset.gallery_view import UVirtualImageGallery
+from dataset.image_gallery import UImageGallery, UGraphicsAnnotationGalleryItem
+from utility import FAnnotationItem, EAnnotationType
+
+# Галерея на элементах сцены и виртуальная галерея на модели с делегатом: изменение размера и прокрутка.
+# Запуск из папки desktop_app: python -m benchmarks.bench_virtual_gallery --images 1000000
+
+
+def measure_resize(app: QApplication, gallery, widths: list[int]) -> float:
+    start = time.perf_counter()
+    for width in widths:
+        gallery.resize(width, 900)
+        app.processEvents()
+    return (time.perf_counter() - start) / len(widths)
+
+
+def measure_scroll(app: QApplication, gallery, steps: int) -> float:
+    scrollbar = gallery.verticalScrollBar()
+    start = time.perf_counter()
+    for step in range(steps):
+        scrollbar.setValue(scrollbar.maximum() * step // steps)
+        gallery.update_visibility()
+        app.processEvents()
+    return (time.perf_counter() - start) / steps
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=1000000)
+    parser.add_argument("--steps", type=int, default=100)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    items = [FAnnotationItem([], f"image_{index}.jpg", "bench", (640, 480)) for index in range(args.images)]
+    widths = [900, 1500, 1100, 1300]
+    print(f"Изображений в галерее: {args.images}")
+
+    # Загрузка миниатюр не замеряется: изображений на диске нет
+    gallery = UImageGallery()
+    gallery.signal_changed_viewport.disconnect()
+    gallery.resize(1280, 900)
+    gallery.show()
+    gallery.set_dataset_annotations(items)
+    gallery.filter_images({0: True}, [EAnnotationType.BoundingBox])
+    for index in gallery.filtered_order[:gallery.cache_size]:
+        gallery.add_item(UGraphicsAnnotationGalleryItem(items[index], index, False, gallery.cell_size))
+    print(f"Элементы сцены: изменение размера {measure_resize(app, gallery, widths) * 1e3:.1f} мс, "
+          f"живых элементов {len(gallery.widget_cache)}")
+    gallery.shutdown()
+    gallery.close()
+
+    virtual_gallery = UVirtualImageGallery()
+    virtual_gallery.pool.task = lambda payload: None
+    virtual_gallery.resize(1280, 900)
+    virtual_gallery.show()
+    virtual_gallery.set_dataset_annotations(items)
+    virtual_gallery.filter_images({0: True}, [EAnnotationType.BoundingBox])
+    app.processEvents()
+    print(f"Модель и делегат: изменение размера {measure_resize(app, virtual_gallery, widths) * 1e3:.1f} мс, "
+          f"прокрутка {measure_scroll(app, virtual_gallery, args.steps) * 1e3:.1f} мс, "
+          f"видимых ячеек {len(virtual_gallery.visible_indexes)}")
+    virtual_gallery.shutdown()
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import random
+import struct
+import zlib
+
+# Генерация синтетических датасетов для замеров производительности
+
+def write_png(path: str, width: int, height: int):
+    def chunk(tag: bytes, data: bytes):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    raw = b"".join(b"\x00" + b"\x80" * (width * 3) for _ in range(height))
+    with open(path, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        file.write(chunk(b"IDAT", zlib.compress(raw, 1)))
+        file.write(chunk(b"IEND", b""))
+
+
+def create_dataset(
+        dataset_path: str,
+        images_count: int,
+        boxes_per_image: int = 8,
+        polygons_every: int = 4,
+        classes_count: int = 10,
+        resolution: tuple[int, int] = (64, 48),
+        seed: int = 0
+):
+    rng = random.Random(seed)
+    images_dir = os.path.join(dataset_path, "images").replace('\\', '/')
+    labels_dir = os.path.join(dataset_path, "labels").replace('\\', '/')
+    labels_seg_dir = os.path.join(dataset_path, "labels_seg").replace('\\', '/')
+    for folder in (images_dir, labels_dir, labels_seg_dir):
+        os.makedirs(folder, exist_ok=True)
+
+    for index in range(images_count):
+        name = f"image_{index:07d}"
+        write_png(os.path.join(images_dir, name + ".png"), *resolution)
+
+        with open(os.path.join(labels_dir, name + ".txt"), "w") as file:
+            for _ in range(boxes_per_image):
+                file.write(
+                    f"{rng.randrange(classes_count)} {rng.random()} {rng.random()} "
+                    f"{rng.random() / 4} {rng.random() / 4}\n"
+                )
+
+        if polygons_every and index % polygons_every == 0:
+            with open(os.path.join(labels_seg_dir, name + ".txt"), "w") as file:
+                points = " ".join(f"{rng.random()} {rng.random()}" for _ in range(12))
+                file.write(f"{rng.randrange(classes_count)} {points}\n")
+
+    return images_dir, labels_dir, labels_seg_dir
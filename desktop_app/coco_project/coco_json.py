@@ -1,6 +1,7 @@
 import json
 import os
 
+from dataset.annotation_table import FTableAnnotationItem
 from utility import FAnnotationItem, FAnnotationClasses
 
 
@@ -19,11 +20,18 @@ def convert_to_coco(annotations_old_format: dict[str, list[FAnnotationItem]], cl
     for dataset, ann_list in annotations_old_format.items():
         for ann_item in ann_list:
             image_name = os.path.basename(ann_item.get_image_path())
-            data = ann_item.get_annotation_data()
-            if data is None or len(data) == 0:
+            if isinstance(ann_item, FTableAnnotationItem):
+                # Координаты ограничиваются и берутся прямо из массивов таблицы аннотаций
+                coco_data = ann_item.get_coco_annotations()
+            else:
+                coco_data = list()
+                for ann_data in ann_item.get_annotation_data() or []:
+                    ann_data.clamp_cords()
+                    coco_data.append((ann_data.get_id(), ann_data.get_bbox(), ann_data.get_segmentation()))
+            if len(coco_data) == 0:
                 continue
 
-            image_width, image_height = data[0].get_resolution()
+            image_width, image_height = ann_item.get_resolution()
 
             images.append({
                 "id": image_id,
@@ -33,14 +41,13 @@ def convert_to_coco(annotations_old_format: dict[str, list[FAnnotationItem]], cl
                 "dataset": dataset
             })
 
-            for ann_data in data:
-                ann_data.clamp_cords()
+            for class_id, bbox, segmentation in coco_data:
                 annotations.append({
                     "id": annotation_id,
                     "image_id": image_id,
-                    "category_id": ann_data.get_id() + 1,
-                    "bbox": ann_data.get_bbox(),
-                    "segmentation": ann_data.get_segmentation(),
+                    "category_id": class_id + 1,
+                    "bbox": bbox,
+                    "segmentation": segmentation,
                     "iscrowd": 0
                 })
                 annotation_id += 1
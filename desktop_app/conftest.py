@@ -0,0 +1,4 @@
+import os
+
+# Модули приложения импортируются от папки desktop_app, тесты с Qt выполняются без окна
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
@@ -164,11 +164,11 @@ class UListClassCounts(QListWidget):
         super().__init__(parent)
         self.class_widgets: dict[int, UListItemClassCount] = {}
 
-    def increase_class(self, class_id: int, class_name: str, color: QColor):
+    def increase_class(self, class_id: int, class_name: str, color: QColor, count: int = 1):
         if class_id in self.class_widgets:
-            self.class_widgets[class_id].increment()
+            self.class_widgets[class_id].increment(count)
         else:
-            widget = UListItemClassCount(class_id, class_name, color)
+            widget = UListItemClassCount(class_id, class_name, color, count)
             item = QListWidgetItem()
             item.setSizeHint(widget.sizeHint())
 
@@ -198,12 +198,12 @@ class UListClassCounts(QListWidget):
 
 
 class UListItemClassCount(QWidget):
-    def __init__(self, class_id: int, class_name: str, color: QColor):
+    def __init__(self, class_id: int, class_name: str, color: QColor, count: int = 1):
         super().__init__()
 
         self.class_id = class_id
         self.class_name = class_name
-        self.count = 1
+        self.count = count
 
         self.color_box = UColorLabel(QColor(color))
         self.color_box.setFixedSize(20, 20)
@@ -232,8 +232,8 @@ class UListItemClassCount(QWidget):
         layout.addWidget(self.color_box, 0)
         layout.addWidget(info_container, 1)  # тянется
 
-    def increment(self):
-        self.count += 1
+    def increment(self, count: int = 1):
+        self.count += count
         self.label_count.setText(f"x {self.count}")
 
     def decrement(self):
@@ -0,0 +1,139 @@
+import json
+import os
+import sqlite3
+from typing import Optional
+
+from dataset.label_parser import LABEL_POLYGON
+
+# Файл индекса хранится в папке датасета, ключи - пути относительно нее,
+# поэтому индекс остается валидным при переносе датасета
+INDEX_FILE_NAME = ".annotation_index.sqlite"
+# Версия формата строк. При изменении разбора аннотаций индекс пересоздается
+INDEX_VERSION = 1
+
+
+class UAnnotationIndex:
+    def __init__(self, dataset_path: str):
+        self.dataset_path = dataset_path.replace('\\', '/')
+        self.index_path = os.path.join(self.dataset_path, INDEX_FILE_NAME).replace('\\', '/')
+
+        self.connection: Optional[sqlite3.Connection] = None
+        # Ключ - путь к файлу аннотаций относительно датасета
+        self.entries: dict[str, tuple] = dict()
+        self.seen_keys: set[str] = set()
+        self.new_entries: list[tuple] = list()
+
+        self.hits = 0
+        self.misses = 0
+
+    def open(self):
+        try:
+            self.connection = sqlite3.connect(self.index_path)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or row[0] != str(INDEX_VERSION):
+                self.connection.execute("DROP TABLE IF EXISTS labels")
+                self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(INDEX_VERSION),))
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS labels ("
+                "label_key TEXT PRIMARY KEY, label_mtime INTEGER, label_size INTEGER, "
+                "image_name TEXT, image_mtime INTEGER, image_size INTEGER, "
+                "width INTEGER, height INTEGER, rows TEXT)"
+            )
+            self.connection.commit()
+
+            for label_key, *entry in self.connection.execute("SELECT * FROM labels"):
+                self.entries[label_key] = tuple(entry)
+        except Exception as error:
+            print(f"Не удалось открыть индекс аннотаций {self.index_path}: {str(error)}")
+            self.close()
+            self.entries.clear()
+            return str(error)
+
+    def close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def get(self, label_path: str, label_stat: os.stat_result, image_path: str, image_stat: os.stat_result):
+        label_key = self._get_key(label_path)
+        self.seen_keys.add(label_key)
+
+        entry = self.entries.get(label_key)
+        if entry is None or entry[:5] != self._get_stamp(label_stat, image_path, image_stat):
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        *_, width, height, rows = entry
+        return (width, height), self._decode_rows(rows)
+
+    def put(
+            self,
+            label_path: str,
+            label_stat: os.stat_result,
+            image_path: str,
+            image_stat: os.stat_result,
+            label_kind: int,
+            resolution: tuple[int, int],
+            rows: list[tuple]
+    ):
+        if self.connection is None:
+            return
+        self.new_entries.append(
+            (self._get_key(label_path),
+             *self._get_stamp(label_stat, image_path, image_stat),
+             *resolution,
+             json.dumps([label_kind, rows]))
+        )
+
+    def commit(self):
+        if self.connection is None:
+            return
+        try:
+            stale_keys = [(label_key,) for label_key in self.entries if label_key not in self.seen_keys]
+            with self.connection:
+                self.connection.executemany("DELETE FROM labels WHERE label_key = ?", stale_keys)
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    self.new_entries
+                )
+            self.new_entries.clear()
+        except Exception as error:
+            print(f"Не удалось сохранить индекс аннотаций {self.index_path}: {str(error)}")
+            return str(error)
+
+    @staticmethod
+    def count_entries(dataset_path: str) -> int | None:
+        # Количество записей в индексе без его загрузки. None, если индекса нет
+        index_path = os.path.join(dataset_path, INDEX_FILE_NAME).replace('\\', '/')
+        if not os.path.isfile(index_path):
+            return None
+        try:
+            connection = sqlite3.connect(index_path)
+            try:
+                return connection.execute("SELECT COUNT(*) FROM labels").fetchone()[0]
+            finally:
+                connection.close()
+        except Exception:
+            return None
+
+    def _get_key(self, path: str):
+        return os.path.relpath(path, self.dataset_path).replace('\\', '/')
+
+    @staticmethod
+    def _get_stamp(label_stat: os.stat_result, image_path: str, image_stat: os.stat_result):
+        return (
+            label_stat.st_mtime_ns,
+            label_stat.st_size,
+            os.path.basename(image_path),
+            image_stat.st_mtime_ns,
+            image_stat.st_size
+        )
+
+    @staticmethod
+    def _decode_rows(rows: str):
+        label_kind, decoded = json.loads(rows)
+        if label_kind == LABEL_POLYGON:
+            return [(tuple((x, y) for x, y in points), object_id, class_id) for points, object_id, class_id in decoded]
+        return [tuple(row) for row in decoded]
@@ -0,0 +1,572 @@
+import numpy as np
+
+from dataset.label_parser import LABEL_BOX, LABEL_POLYGON
+from utility import FAnnotationData, FAnnotationItem, FDetectAnnotationData, \
+    FPolygonAnnotationData, EAnnotationType
+
+BOX_DTYPE = np.dtype([
+    ("image_id", np.int32),
+    ("object_id", np.int32),
+    ("class_id", np.int32),
+    ("x", np.float32),
+    ("y", np.float32),
+    ("w", np.float32),
+    ("h", np.float32),
+    ("res_w", np.int32),
+    ("res_h", np.int32),
+    ("valid", np.bool_),
+])
+
+# Точки полигонов хранятся в общем массиве points, start и end - границы точек полигона в нем
+POLYGON_DTYPE = np.dtype([
+    ("image_id", np.int32),
+    ("object_id", np.int32),
+    ("class_id", np.int32),
+    ("res_w", np.int32),
+    ("res_h", np.int32),
+    ("start", np.int64),
+    ("end", np.int64),
+    ("valid", np.bool_),
+])
+
+# Таблица сжимается, когда невалидные строки составляют больше половины занятых, но не раньше минимального числа строк
+COMPACT_RATIO = 0.5
+COMPACT_MIN_ROWS = 1024
+
+
+def to_number(value: float) -> int | float:
+    # Координаты хранятся в float32. Целые значения возвращаются как int, как при разборе файлов аннотаций
+    return int(value) if value.is_integer() else value
+
+
+class FAnnotationTable:
+    """
+    Колоночное хранилище аннотаций одного датасета.
+    Вместо объекта FAnnotationData на каждую аннотацию хранятся строки в numpy массивах,
+    а для каждого изображения - границы его строк (spans: начало и конец рамок, начало и конец полигонов).
+    При изменении аннотаций изображения старые строки помечаются невалидными, а новые дописываются в конец.
+    Когда невалидных строк становится много, таблица сжимается на месте, ID изображений при этом не меняются
+    """
+    def __init__(self, capacity: int = 1024):
+        self.boxes = np.zeros(capacity, dtype=BOX_DTYPE)
+        self.boxes_count = 0
+
+        self.polygons = np.zeros(capacity, dtype=POLYGON_DTYPE)
+        self.polygons_count = 0
+
+        self.points = np.zeros((capacity * 8, 2), dtype=np.float32)
+        self.points_count = 0
+
+        # Строки и точки, помеченные невалидными после последнего сжатия
+        self.invalid_boxes = 0
+        self.invalid_polygons = 0
+        self.invalid_points = 0
+
+        self.spans = np.zeros((capacity, 4), dtype=np.int64)
+        self.images_count = 0
+
+        # Инвертированный индекс (тип аннотаций, ID класса) -> маска изображений, у которых есть такие аннотации.
+        # Строится при первой фильтрации и дальше обновляется при изменении аннотаций изображения
+        self.class_index: dict[tuple[int, int], np.ndarray] | None = None
+
+    def __len__(self):
+        return self.images_count
+
+    def add_parsed_item(
+            self,
+            image_path: str,
+            dataset: str,
+            label_kind: int,
+            resolution: tuple[int, int] | None,
+            rows: list[tuple]
+    ) -> 'FTableAnnotationItem':
+        # Строки в формате dataset.label_parser.parse_label_file
+        box_rows, polygon_rows = list(), list()
+        if rows:
+            width_res, height_res = resolution
+            if label_kind == LABEL_BOX:
+                box_rows = [
+                    (x, y, width, height, object_id, class_id, width_res, height_res)
+                    for x, y, width, height, object_id, class_id in rows
+                ]
+            elif label_kind == LABEL_POLYGON:
+                polygon_rows = [
+                    (points, object_id, class_id, width_res, height_res)
+                    for points, object_id, class_id in rows
+                ]
+        image_id = self._add_image(box_rows, polygon_rows)
+        return FTableAnnotationItem(self, image_id, image_path, dataset, resolution)
+
+    def add_item(self, ann_item: FAnnotationItem) -> 'FTableAnnotationItem':
+        box_rows, polygon_rows = self._to_rows(ann_item.get_annotation_data())
+        image_id = self._add_image(box_rows, polygon_rows)
+        return FTableAnnotationItem(
+            self,
+            image_id,
+            ann_item.image_path,
+            ann_item.get_dataset_name(),
+            ann_item.resolution
+        )
+
+    def set_image_annotations(self, image_id: int, ann_list: list[FAnnotationData]):
+        # Строки собираются до пометки старых, так как в списке могут быть представления этой же таблицы
+        box_rows, polygon_rows = self._to_rows(ann_list)
+        self._remove_rows(image_id)
+        self.spans[image_id] = self._append_rows(image_id, box_rows, polygon_rows)
+        self.update_class_index(image_id)
+        self.compact_if_needed()
+
+    def remove_image(self, image_id: int):
+        self._remove_rows(image_id)
+        self.update_class_index(image_id)
+        self.compact_if_needed()
+
+    def _remove_rows(self, image_id: int):
+        box_start, box_end, polygon_start, polygon_end = self.spans[image_id].tolist()
+        self.boxes["valid"][box_start:box_end] = False
+        self.polygons["valid"][polygon_start:polygon_end] = False
+        polygons = self.polygons[polygon_start:polygon_end]
+        self.invalid_boxes += box_end - box_start
+        self.invalid_polygons += polygon_end - polygon_start
+        self.invalid_points += int((polygons["end"] - polygons["start"]).sum())
+        self.spans[image_id] = (box_end, box_end, polygon_end, polygon_end)
+
+    def compact_if_needed(self):
+        for invalid, count in (
+                (self.invalid_boxes, self.boxes_count),
+                (self.invalid_polygons, self.polygons_count),
+                (self.invalid_points, self.points_count)
+        ):
+            if count >= COMPACT_MIN_ROWS and invalid > count * COMPACT_RATIO:
+                self.compact()
+                return
+
+    def compact(self):
+        # Удаление невалидных строк и точек со сдвигом валидных к началу массивов
+        self.boxes_count = self._compact_rows(self.boxes, self.boxes_count, 0)
+        self.polygons_count = self._compact_rows(self.polygons, self.polygons_count, 2)
+
+        # Точки валидных полигонов в порядке полигонов. Точки могли быть дописаны в конец при изменении их количества
+        polygons = self.polygons[:self.polygons_count]
+        lengths = polygons["end"] - polygons["start"]
+        starts = np.zeros(len(polygons), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=starts[1:])
+        source = np.repeat(polygons["start"] - starts, lengths) + np.arange(int(lengths.sum()), dtype=np.int64)
+        points_count = len(source)
+        self.points[:points_count] = self.points[source]
+        self.points[points_count:self.points_count] = 0
+        polygons["start"] = starts
+        polygons["end"] = starts + lengths
+        self.points_count = points_count
+
+        self.invalid_boxes = 0
+        self.invalid_polygons = 0
+        self.invalid_points = 0
+
+    def _compact_rows(self, array: np.ndarray, count: int, span_column: int) -> int:
+        # Строки изображения идут подряд, поэтому новые границы - число валидных строк перед старыми
+        valid = array["valid"][:count]
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(valid, out=offsets[1:])
+        spans = self.spans[:self.images_count, span_column:span_column + 2]
+        spans[:] = offsets[spans]
+        kept = int(offsets[-1])
+        array[:kept] = array[:count][valid]
+        array[kept:count] = 0
+        return kept
+
+    def get_annotations(self, image_id: int) -> list[FAnnotationData]:
+        box_start, box_end, polygon_start, polygon_end = self.spans[image_id].tolist()
+        annotations: list[FAnnotationData] = [
+            FDetectAnnotationView(self, image_id, index) for index in range(box_end - box_start)
+        ]
+        annotations += [FPolygonAnnotationView(self, image_id, index) for index in range(polygon_end - polygon_start)]
+        return annotations
+
+    def get_annotations_count(self, image_id: int) -> int:
+        box_start, box_end, polygon_start, polygon_end = self.spans[image_id].tolist()
+        return box_end - box_start + polygon_end - polygon_start
+
+    def count_classes(self, type_list: list[EAnnotationType]) -> dict[int, int]:
+        counts: dict[int, int] = dict()
+        for array in self._get_arrays(type_list):
+            class_ids, class_counts = np.unique(array["class_id"][array["valid"]], return_counts=True)
+            for class_id, count in zip(class_ids.tolist(), class_counts.tolist()):
+                counts[class_id] = counts.get(class_id, 0) + count
+        return counts
+
+    def count_image_classes(self, image_ids: list[int]) -> dict[int, int]:
+        # Количество аннотаций по классам для набора изображений без создания объектов аннотаций
+        selected = np.zeros(self.images_count, dtype=np.bool_)
+        selected[np.asarray(image_ids, dtype=np.int64)] = True
+        counts: dict[int, int] = dict()
+        for array in (self.boxes[:self.boxes_count], self.polygons[:self.polygons_count]):
+            rows = array[array["valid"] & selected[array["image_id"]]]
+            class_ids, class_counts = np.unique(rows["class_id"], return_counts=True)
+            for class_id, count in zip(class_ids.tolist(), class_counts.tolist()):
+                counts[class_id] = counts.get(class_id, 0) + count
+        return counts
+
+    def filter_images(self, class_ids: set[int], type_list: list[EAnnotationType]) -> np.ndarray:
+        # Маска изображений, у которых есть аннотация одного из классов, или нет аннотаций вовсе.
+        # Объединение масок инвертированного индекса, без прохода по строкам аннотаций
+        if self.class_index is None:
+            self._build_class_index()
+        # Количество изображений берется один раз: все маски и границы строк обрезаются до него
+        count = self.images_count
+        mask = np.zeros(count, dtype=np.bool_)
+        for label_kind in self._get_label_kinds(type_list):
+            for class_id in class_ids:
+                # Маски растут только при добавлении изображения с их классом, короткая маска дополняется
+                if (label_kind, class_id) in self.class_index:
+                    mask |= self._get_class_mask(label_kind, class_id)[:count]
+
+        spans = self.spans[:count]
+        mask |= (spans[:, 0] == spans[:, 1]) & (spans[:, 2] == spans[:, 3])
+        return mask
+
+    def update_class_index(self, image_id: int, is_new: bool = False):
+        # Пересчет строки индекса одного изображения после изменения его аннотаций.
+        # У нового изображения в масках еще нет отметок, поэтому очистка не нужна
+        if self.class_index is None:
+            return
+        if not is_new:
+            for key, class_mask in self.class_index.items():
+                if len(class_mask) > image_id:
+                    class_mask[image_id] = False
+        box_start, box_end, polygon_start, polygon_end = self.spans[image_id].tolist()
+        for label_kind, array, start, end in (
+                (LABEL_BOX, self.boxes, box_start, box_end),
+                (LABEL_POLYGON, self.polygons, polygon_start, polygon_end)
+        ):
+            if start == end:
+                continue
+            rows = array[start:end]
+            for class_id in set(rows["class_id"][rows["valid"]].tolist()):
+                self._get_class_mask(label_kind, class_id)[image_id] = True
+
+    def _build_class_index(self):
+        self.class_index = dict()
+        for label_kind, array in ((LABEL_BOX, self.boxes[:self.boxes_count]), (LABEL_POLYGON, self.polygons[:self.polygons_count])):
+            valid = array[array["valid"]]
+            class_ids, inverse = np.unique(valid["class_id"], return_inverse=True)
+            for index, class_id in enumerate(class_ids.tolist()):
+                self._get_class_mask(label_kind, class_id)[valid["image_id"][inverse == index]] = True
+
+    def _get_class_mask(self, label_kind: int, class_id: int) -> np.ndarray:
+        key = (label_kind, class_id)
+        class_mask = self.class_index.get(key)
+        if class_mask is None or len(class_mask) < self.images_count:
+            class_mask = self._grow(
+                class_mask if class_mask is not None else np.zeros(len(self.spans), dtype=np.bool_),
+                self.images_count
+            )
+            self.class_index[key] = class_mask
+        return class_mask
+
+    @staticmethod
+    def _get_label_kinds(type_list: list[EAnnotationType]) -> list[int]:
+        label_kinds = list()
+        if EAnnotationType.BoundingBox in type_list:
+            label_kinds.append(LABEL_BOX)
+        if EAnnotationType.Segmentation in type_list:
+            label_kinds.append(LABEL_POLYGON)
+        return label_kinds
+
+    def serialize_image(self, image_id: int, class_refactor: dict[int, tuple[int, str | None]] | None) -> list[str]:
+        # Строки файла аннотаций YOLO для экспорта с заменой ID классов
+        if not class_refactor:
+            return []
+        box_start, box_end, polygon_start, polygon_end = self.spans[image_id].tolist()
+        lines: list[str] = list()
+
+        boxes = self.boxes[box_start:box_end]
+        x, y, width, height = self._clamp_boxes(boxes)
+        for class_id, x, y, width, height, res_w, res_h in zip(
+                boxes["class_id"].tolist(), x.tolist(), y.tolist(), width.tolist(), height.tolist(),
+                boxes["res_w"].tolist(), boxes["res_h"].tolist()
+        ):
+            new_class_id, _ = class_refactor.get(class_id, (None, None))
+            if new_class_id is None:
+                continue
+            lines.append(
+                f"{new_class_id} {(x + width / 2) / res_w} {(y + height / 2) / res_h} {width / res_w} {height / res_h}\n"
+            )
+
+        for polygon in self.polygons[polygon_start:polygon_end]:
+            new_class_id, _ = class_refactor.get(int(polygon["class_id"]), (None, None))
+            if new_class_id is None:
+                continue
+            res_w, res_h = int(polygon["res_w"]), int(polygon["res_h"])
+            points = self._clamp_points(polygon)
+            points_str = " ".join(f"{x / res_w} {y / res_h}" for x, y in points.tolist())
+            lines.append(f"{new_class_id} {points_str}\n")
+        return lines
+
+    def get_coco_annotations(self, image_id: int) -> list[tuple[int, list[float], list]]:
+        # (ID класса, bbox, segmentation) с координатами, ограниченными разрешением изображения
+        box_start, box_end, polygon_start, polygon_end = self.spans[image_id].tolist()
+        annotations = list()
+
+        boxes = self.boxes[box_start:box_end]
+        x, y, width, height = self._clamp_boxes(boxes)
+        for class_id, bbox in zip(boxes["class_id"].tolist(), np.stack([x, y, width, height], axis=1).tolist()):
+            annotations.append((class_id, [to_number(value) for value in bbox], []))
+
+        for polygon in self.polygons[polygon_start:polygon_end]:
+            points = self._clamp_points(polygon)
+            if len(points) == 0:
+                continue
+            x_min, y_min = points.min(axis=0).tolist()
+            x_max, y_max = points.max(axis=0).tolist()
+            annotations.append((
+                int(polygon["class_id"]),
+                [to_number(value) for value in (x_min, y_min, x_max - x_min, y_max - y_min)],
+                [[to_number(value) for value in points.reshape(-1).tolist()]]
+            ))
+        return annotations
+
+    def _get_arrays(self, type_list: list[EAnnotationType]):
+        arrays = list()
+        if EAnnotationType.BoundingBox in type_list:
+            arrays.append(self.boxes[:self.boxes_count])
+        if EAnnotationType.Segmentation in type_list:
+            arrays.append(self.polygons[:self.polygons_count])
+        return arrays
+
+    def _clamp_boxes(self, boxes: np.ndarray):
+        x = np.maximum(boxes["x"].astype(np.float64), 0)
+        y = np.maximum(boxes["y"].astype(np.float64), 0)
+        width = np.minimum(boxes["w"].astype(np.float64), boxes["res_w"] - x)
+        height = np.minimum(boxes["h"].astype(np.float64), boxes["res_h"] - y)
+        return x, y, width, height
+
+    def _clamp_points(self, polygon: np.void):
+        points = self.points[int(polygon["start"]):int(polygon["end"])].astype(np.float64)
+        np.clip(points[:, 0], 0, int(polygon["res_w"]), out=points[:, 0])
+        np.clip(points[:, 1], 0, int(polygon["res_h"]), out=points[:, 1])
+        return points
+
+    def _add_image(self, box_rows: list[tuple], polygon_rows: list[tuple]) -> int:
+        image_id = self.images_count
+        self.spans = self._grow(self.spans, image_id + 1)
+        self.spans[image_id] = self._append_rows(image_id, box_rows, polygon_rows)
+        self.images_count += 1
+        self.update_class_index(image_id, is_new=True)
+        return image_id
+
+    def _append_rows(self, image_id: int, box_rows: list[tuple], polygon_rows: list[tuple]):
+        box_start = self.boxes_count
+        box_end = box_start + len(box_rows)
+        if box_rows:
+            self.boxes = self._grow(self.boxes, box_end)
+            block = self.boxes[box_start:box_end]
+            x, y, width, height, object_id, class_id, res_w, res_h = zip(*box_rows)
+            block["image_id"] = image_id
+            block["object_id"] = object_id
+            block["class_id"] = class_id
+            block["x"] = x
+            block["y"] = y
+            block["w"] = width
+            block["h"] = height
+            block["res_w"] = res_w
+            block["res_h"] = res_h
+            block["valid"] = True
+            self.boxes_count = box_end
+
+        polygon_start = self.polygons_count
+        polygon_end = polygon_start + len(polygon_rows)
+        if polygon_rows:
+            self.polygons = self._grow(self.polygons, polygon_end)
+            for row, (points, object_id, class_id, res_w, res_h) in enumerate(polygon_rows, polygon_start):
+                self.polygons[row] = (image_id, object_id, class_id, res_w, res_h, *self._append_points(points), True)
+            self.polygons_count = polygon_end
+
+        return box_start, box_end, polygon_start, polygon_end
+
+    def _append_points(self, points) -> tuple[int, int]:
+        start = self.points_count
+        end = start + len(points)
+        self.points = self._grow(self.points, end)
+        if end > start:
+            self.points[start:end] = points
+        self.points_count = end
+        return start, end
+
+    @staticmethod
+    def _to_rows(ann_list: list[FAnnotationData]):
+        box_rows, polygon_rows = list(), list()
+        for annotation in ann_list:
+            res_w, res_h = annotation.get_resolution()
+            if isinstance(annotation, FDetectAnnotationData):
+                x, y, width, height = annotation.get_bbox()
+                box_rows.append((x, y, width, height, annotation.object_id, annotation.class_id, res_w, res_h))
+            elif isinstance(annotation, FPolygonAnnotationData):
+                polygon_rows.append(
+                    (list(annotation.get_points_list()), annotation.object_id, annotation.class_id, res_w, res_h)
+                )
+        return box_rows, polygon_rows
+
+    @staticmethod
+    def _grow(array: np.ndarray, required: int) -> np.ndarray:
+        # Удвоение емкости, чтобы добавление строк оставалось амортизированно O(1)
+        if required <= len(array):
+            return array
+        new_array = np.zeros((max(required, len(array) * 2),) + array.shape[1:], dtype=array.dtype)
+        new_array[:len(array)] = array
+        return new_array
+
+
+class FDetectAnnotationView(FDetectAnnotationData):
+    """
+    Представление рамки таблицы FAnnotationTable с API FDetectAnnotationData.
+    Изменения координат записываются в таблицу, имя и цвет класса берутся из общего списка классов.
+    Представление хранит номер аннотации в изображении, а строка находится через границы изображения,
+    поэтому сжатие таблицы его не портит. После замены аннотаций изображения оно указывает на новую аннотацию с тем же номером
+    """
+    __slots__ = ("table", "image_id", "index")
+
+    def __init__(self, table: FAnnotationTable, image_id: int, index: int):
+        self.table = table
+        self.image_id = image_id
+        self.index = index
+
+    def _get_row(self) -> int:
+        start, end = self.table.spans[self.image_id, 0:2].tolist()
+        if self.index >= end - start:
+            raise IndexError(f"Аннотация {self.index} изображения {self.image_id} удалена")
+        return start + self.index
+
+    def _get(self, field: str):
+        return self.table.boxes[field][self._get_row()].item()
+
+    def _set(self, field: str, value):
+        self.table.boxes[field][self._get_row()] = value
+        if field == "class_id":
+            self.table.update_class_index(self.image_id)
+
+    def _get_cord(self, field: str):
+        return to_number(self._get(field))
+
+    object_id = property(lambda self: self._get("object_id"), lambda self, value: self._set("object_id", value))
+    class_id = property(lambda self: self._get("class_id"), lambda self, value: self._set("class_id", value))
+    X = property(lambda self: self._get_cord("x"), lambda self, value: self._set("x", value))
+    Y = property(lambda self: self._get_cord("y"), lambda self, value: self._set("y", value))
+    Width = property(lambda self: self._get_cord("w"), lambda self, value: self._set("w", value))
+    Height = property(lambda self: self._get_cord("h"), lambda self, value: self._set("h", value))
+    w_resolution = property(lambda self: self._get("res_w"), lambda self, value: self._set("res_w", value))
+    h_resolution = property(lambda self: self._get("res_h"), lambda self, value: self._set("res_h", value))
+
+
+class FPolygonAnnotationView(FPolygonAnnotationData):
+    """
+    Представление полигона таблицы FAnnotationTable с API FPolygonAnnotationData, строка находится как у FDetectAnnotationView
+    """
+    __slots__ = ("table", "image_id", "index")
+
+    def __init__(self, table: FAnnotationTable, image_id: int, index: int):
+        self.table = table
+        self.image_id = image_id
+        self.index = index
+
+    def _get_row(self) -> int:
+        start, end = self.table.spans[self.image_id, 2:4].tolist()
+        if self.index >= end - start:
+            raise IndexError(f"Аннотация {self.index} изображения {self.image_id} удалена")
+        return start + self.index
+
+    def _get(self, field: str):
+        return self.table.polygons[field][self._get_row()].item()
+
+    def _set(self, field: str, value):
+        self.table.polygons[field][self._get_row()] = value
+        if field == "class_id":
+            self.table.update_class_index(self.image_id)
+
+    object_id = property(lambda self: self._get("object_id"), lambda self, value: self._set("object_id", value))
+    class_id = property(lambda self: self._get("class_id"), lambda self, value: self._set("class_id", value))
+    w_resolution = property(lambda self: self._get("res_w"), lambda self, value: self._set("res_w", value))
+    h_resolution = property(lambda self: self._get("res_h"), lambda self, value: self._set("res_h", value))
+
+    @property
+    def points_list(self):
+        start, end = self._get("start"), self._get("end")
+        return [(to_number(x), to_number(y)) for x, y in self.table.points[start:end].tolist()]
+
+    @points_list.setter
+    def points_list(self, points: list[tuple[float, float]]):
+        start, end = self._get("start"), self._get("end")
+        if len(points) == end - start:
+            if points:
+                self.table.points[start:end] = points
+            return
+        # Другое количество точек дописывается в конец общего массива, прежние точки освобождаются при сжатии
+        self.table.invalid_points += end - start
+        start, end = self.table._append_points(points)
+        self._set("start", start)
+        self._set("end", end)
+        self.table.compact_if_needed()
+
+
+class FTableAnnotationItem(FAnnotationItem):
+    """
+    FAnnotationItem, аннотации которого хранятся в FAnnotationTable.
+    Список аннотаций создается из таблицы при обращении
+    """
+    def __init__(
+            self,
+            table: FAnnotationTable,
+            image_id: int,
+            image_path: str,
+            dataset_name: str | None,
+            resolution: tuple[int, int] | None = None
+    ):
+        self.table = table
+        self.image_id = image_id
+        self.image_path = image_path
+        self.dataset = dataset_name
+        self.resolution = resolution
+
+    @property
+    def annotation_list(self) -> list[FAnnotationData]:
+        return self.table.get_annotations(self.image_id)
+
+    @annotation_list.setter
+    def annotation_list(self, annotation_data: list[FAnnotationData]):
+        self.table.set_image_annotations(self.image_id, annotation_data)
+
+    def copy(self):
+        return FAnnotationItem(
+            [annotation.copy() for annotation in self.annotation_list],
+            str(self.image_path),
+            str(self.dataset),
+            self.resolution
+        )
+
+    def update_annotation_data(self, annotation_data: list[FAnnotationData]):
+        self.table.set_image_annotations(self.image_id, list(annotation_data))
+
+    def remove_from_table(self):
+        self.table.remove_image(self.image_id)
+
+    def serialize(self, class_refactor: dict[int, tuple[int, str | None]] | None) -> list[str]:
+        return self.table.serialize_image(self.image_id, class_refactor)
+
+    def get_coco_annotations(self):
+        return self.table.get_coco_annotations(self.image_id)
+
+
+def count_item_classes(items: list) -> dict[int, int]:
+    # Количество аннотаций по классам в списке изображений. Изображения таблиц считаются по таблице целиком
+    counts: dict[int, int] = dict()
+    table_images: dict[int, tuple[FAnnotationTable, list[int]]] = dict()
+    for item in items:
+        if isinstance(item, FTableAnnotationItem):
+            table_images.setdefault(id(item.table), (item.table, list()))[1].append(item.image_id)
+        elif isinstance(item, FAnnotationItem):
+            for annotation in item.get_annotation_data():
+                counts[annotation.class_id] = counts.get(annotation.class_id, 0) + 1
+    for table, image_ids in table_images.values():
+        for class_id, count in table.count_image_classes(image_ids).items():
+            counts[class_id] = counts.get(class_id, 0) + count
+    return counts
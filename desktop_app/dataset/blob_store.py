@@ -0,0 +1,275 @@
+import argparse
+import hashlib
+import json
+import os
+
+from dataset.file_placement import UFilePlacer, FPlacementStats, format_size, PLACEMENT_HARDLINK, \
+    PLACEMENT_AUTO, PLACEMENT_REFLINK, PLACEMENT_COPY
+
+# Блоб считается используемым, пока на него есть жесткая ссылка из датасета или запись в манифесте
+
+BLOBS = "blobs"
+MANIFESTS = "manifests"
+HASH_CHUNK = 1 << 20
+
+
+def hash_file(path: str) -> str:
+    file_hash = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+class FDedupReport:
+    def __init__(self):
+        self.files = 0
+        self.total_bytes = 0
+        # Байты, которые занимают лишние копии одинаковых изображений
+        self.duplicate_bytes = 0
+        # Байты, которые уже общие через жесткие ссылки
+        self.shared_bytes = 0
+        # Хеш -> пути одинаковых изображений
+        self.groups: dict[str, list[str]] = dict()
+
+    def __str__(self):
+        return (f"Изображений: {self.files} ({format_size(self.total_bytes)}), групп одинаковых: {len(self.groups)}, "
+                f"можно освободить {format_size(self.duplicate_bytes)}, уже общие {format_size(self.shared_bytes)}")
+
+
+class UBlobStore:
+    """
+    Хранилище изображений проекта по хешу содержимого: blobs/<2 символа хеша>/<хеш><расширение>.
+    Файлы в папках датасетов - жесткие ссылки на блобы, поэтому пути к изображениям не меняются,
+    а число ссылок на блоб (st_nlink - 1) служит счетчиком ссылок.
+    Манифест датасета blobs/manifests/<тип>/<датасет>.json хранит имя изображения -> хеш
+    """
+    def __init__(self, project_path: str):
+        self.project_path = project_path.replace('\\', '/')
+        self.path = os.path.join(self.project_path, BLOBS).replace('\\', '/')
+        self._manifests: dict[tuple[str, str], dict[str, str]] = dict()
+        self._dirty: set[tuple[str, str]] = set()
+        self.stats = FPlacementStats()
+
+    def get_blob_path(self, blob_hash: str, extension: str) -> str:
+        return os.path.join(self.path, blob_hash[:2], blob_hash + extension.lower()).replace('\\', '/')
+
+    def get_manifest_path(self, dataset_type: str, dataset: str) -> str:
+        return os.path.join(self.path, MANIFESTS, dataset_type, dataset + ".json").replace('\\', '/')
+
+    def get_manifest(self, dataset_type: str, dataset: str) -> dict[str, str]:
+        key = (dataset_type, dataset)
+        if key not in self._manifests:
+            try:
+                with open(self.get_manifest_path(dataset_type, dataset), "r") as file:
+                    self._manifests[key] = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._manifests[key] = dict()
+        return self._manifests[key]
+
+    def add_blob(self, source: str) -> str:
+        # Возвращает путь к блобу. Если такое содержимое уже есть, новый файл не создается
+        blob_hash = hash_file(source)
+        blob_path = self.get_blob_path(blob_hash, os.path.splitext(source)[1])
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            # Файл вне проекта не связывается жесткой ссылкой: его изменение испортило бы блоб,
+            # а внешняя ссылка не дала бы удалить блоб по счетчику ссылок
+            self._get_blob_placer(source).place(source, blob_path)
+        return blob_path
+
+    def _get_blob_placer(self, source: str) -> UFilePlacer:
+        project_path = os.path.abspath(self.project_path)
+        try:
+            inside_project = os.path.commonpath([os.path.abspath(source), project_path]) == project_path
+        except ValueError:
+            # Разные диски в Windows
+            inside_project = False
+        placer = UFilePlacer(PLACEMENT_AUTO if inside_project else PLACEMENT_REFLINK)
+        placer.stats = self.stats
+        return placer
+
+    def link(self, blob_path: str, target: str, placer: UFilePlacer) -> str:
+        # Размещение блоба по пути изображения датасета и запись в манифест
+        target = placer.place(blob_path, target)
+        location = self._split_target(target)
+        if location is not None:
+            dataset_type, dataset, image_name = location
+            self.get_manifest(dataset_type, dataset)[image_name] = os.path.splitext(os.path.basename(blob_path))[0]
+            self._dirty.add((dataset_type, dataset))
+        return target
+
+    def unlink(self, target: str):
+        # Удаление записи манифеста для изображения датасета, которое удаляется или заменяется копией
+        location = self._split_target(target)
+        if location is None:
+            return
+        dataset_type, dataset, image_name = location
+        if self.get_manifest(dataset_type, dataset).pop(image_name, None) is not None:
+            self._dirty.add((dataset_type, dataset))
+
+    def get_referenced_hashes(self) -> set[str]:
+        hashes: set[str] = set()
+        manifests_path = os.path.join(self.path, MANIFESTS)
+        if os.path.isdir(manifests_path):
+            for type_entry in os.scandir(manifests_path):
+                if not type_entry.is_dir():
+                    continue
+                for manifest in os.scandir(type_entry.path):
+                    if manifest.name.endswith(".json"):
+                        hashes.update(self.get_manifest(type_entry.name, manifest.name[:-len(".json")]).values())
+        for manifest in self._manifests.values():
+            hashes.update(manifest.values())
+        return hashes
+
+    def move_manifest(self, dataset: str, source_type: str, target_type: str):
+        # Перенос датасета между datasets и reserved меняет только положение манифеста
+        source_path = self.get_manifest_path(source_type, dataset)
+        if not os.path.exists(source_path):
+            return
+        target_path = self.get_manifest_path(target_type, dataset)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        os.replace(source_path, target_path)
+        self._manifests.pop((source_type, dataset), None)
+
+    def remove_manifest(self, dataset: str, dataset_type: str):
+        self._manifests.pop((dataset_type, dataset), None)
+        self._dirty.discard((dataset_type, dataset))
+        manifest_path = self.get_manifest_path(dataset_type, dataset)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+    def flush(self):
+        for dataset_type, dataset in self._dirty:
+            manifest_path = self.get_manifest_path(dataset_type, dataset)
+            os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+            temp_path = manifest_path + ".tmp"
+            with open(temp_path, "w") as file:
+                json.dump(self._manifests[(dataset_type, dataset)], file)
+            os.replace(temp_path, manifest_path)
+        self._dirty.clear()
+
+    def collect_garbage(self) -> int:
+        # Удаление блобов, на которые не осталось ни жестких ссылок из датасетов, ни записей в манифестах.
+        # Возвращает освобожденные байты
+        freed = 0
+        if not os.path.isdir(self.path):
+            return freed
+        referenced = self.get_referenced_hashes()
+        for prefix in os.scandir(self.path):
+            if not prefix.is_dir() or prefix.name == MANIFESTS:
+                continue
+            for blob in os.scandir(prefix.path):
+                blob_stat = blob.stat()
+                if blob_stat.st_nlink <= 1 and os.path.splitext(blob.name)[0] not in referenced:
+                    freed += blob_stat.st_size
+                    os.remove(blob.path)
+        return freed
+
+    def _split_target(self, target: str) -> tuple[str, str, str] | None:
+        # <проект>/<тип>/<датасет>/images/<имя> -> (тип, датасет, имя)
+        relative = os.path.relpath(target, self.project_path).replace('\\', '/').split('/')
+        if len(relative) != 4:
+            return None
+        return relative[0], relative[1], relative[3]
+
+
+class UBlobFilePlacer(UFilePlacer):
+    """
+    Размещение изображений через хранилище блобов: файл сначала добавляется в хранилище,
+    затем в датасете создается жесткая ссылка на блоб. Если ссылку создать нельзя,
+    изображение копируется в датасет отдельным файлом и в манифест не попадает
+    """
+    def __init__(self, blob_store: UBlobStore):
+        super().__init__(PLACEMENT_HARDLINK)
+        self.blob_store = blob_store
+        self.stats = blob_store.stats
+        self._link_placer = UFilePlacer(PLACEMENT_HARDLINK, fallback_copy=False)
+        self._link_placer.stats = self.stats
+        self._copy_placer = UFilePlacer(PLACEMENT_COPY)
+        self._copy_placer.stats = self.stats
+
+    def place(self, source: str, target: str) -> str:
+        if os.path.isdir(target):
+            target = os.path.join(target, os.path.basename(source)).replace('\\', '/')
+        blob_path = self.blob_store.add_blob(source)
+        try:
+            return self.blob_store.link(blob_path, target, self._link_placer)
+        except OSError:
+            self.blob_store.unlink(target)
+            return self._copy_placer.place(source, target)
+
+    def flush(self):
+        self.blob_store.flush()
+
+
+def build_dedup_report(image_paths: list[str]) -> FDedupReport:
+    report = FDedupReport()
+    # Хешируются только файлы с совпадающим размером
+    by_size: dict[int, list[tuple[str, os.stat_result]]] = dict()
+    for path in image_paths:
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            continue
+        report.files += 1
+        report.total_bytes += file_stat.st_size
+        by_size.setdefault(file_stat.st_size, list()).append((path, file_stat))
+
+    for size, files in by_size.items():
+        if len(files) < 2:
+            continue
+        by_hash: dict[str, list[tuple[str, os.stat_result]]] = dict()
+        for path, file_stat in files:
+            by_hash.setdefault(hash_file(path), list()).append((path, file_stat))
+        for file_hash, same_files in by_hash.items():
+            if len(same_files) < 2:
+                continue
+            report.groups[file_hash] = [path for path, _ in same_files]
+            inodes = {(file_stat.st_dev, file_stat.st_ino) for _, file_stat in same_files}
+            report.duplicate_bytes += (len(inodes) - 1) * size
+            report.shared_bytes += (len(same_files) - len(inodes)) * size
+    return report
+
+
+def collect_project_images(project_path: str, dataset_types: tuple[str, ...], images_folder: str) -> list[str]:
+    image_paths = list()
+    for dataset_type in dataset_types:
+        type_path = os.path.join(project_path, dataset_type)
+        if not os.path.isdir(type_path):
+            continue
+        for dataset in os.scandir(type_path):
+            images_path = os.path.join(dataset.path, images_folder)
+            if not dataset.is_dir() or not os.path.isdir(images_path):
+                continue
+            image_paths.extend(
+                entry.path.replace('\\', '/') for entry in os.scandir(images_path) if entry.is_file()
+            )
+    return image_paths
+
+
+def deduplicate_project(project_path: str, dataset_types: tuple[str, ...], images_folder: str) -> FPlacementStats:
+    # Перенос существующих изображений проекта в хранилище: одинаковые файлы становятся ссылками на один блоб
+    blob_store = UBlobStore(project_path)
+    placer = UBlobFilePlacer(blob_store)
+    for image_path in collect_project_images(project_path, dataset_types, images_folder):
+        placer.place(image_path, image_path)
+    placer.flush()
+    return placer.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Отчет об одинаковых изображениях в датасетах проекта")
+    parser.add_argument("project_path")
+    parser.add_argument("--apply", action="store_true", help="Перенести изображения в хранилище блобов")
+    args = parser.parse_args()
+
+    dataset_types, images_folder = ("datasets", "reserved"), "images"
+    print(build_dedup_report(collect_project_images(args.project_path, dataset_types, images_folder)))
+    if args.apply:
+        print(deduplicate_project(args.project_path, dataset_types, images_folder))
+        print(build_dedup_report(collect_project_images(args.project_path, dataset_types, images_folder)))
+
+
+if __name__ == "__main__":
+    main()
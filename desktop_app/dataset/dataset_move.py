@@ -0,0 +1,111 @@
+import json
+import os
+
+# Перенос выполняется только в пределах одной файловой системы: лишь там os.rename атомарен
+
+# Журнал переноса хранится в корне проекта. Пока он существует, перенос считается незавершенным
+JOURNAL_FILE_NAME = ".dataset_move.json"
+
+STATE_STARTED = "started"
+STATE_RENAMED = "renamed"
+
+
+def get_journal_path(project_path: str) -> str:
+    return os.path.join(project_path, JOURNAL_FILE_NAME).replace('\\', '/')
+
+
+def is_same_filesystem(source_path: str, target_parent: str) -> bool:
+    try:
+        return os.stat(source_path).st_dev == os.stat(target_parent).st_dev
+    except OSError:
+        return False
+
+
+def _write_journal(project_path: str, record: dict):
+    # Запись с fsync и os.replace: после сбоя журнал либо старый, либо новый целиком
+    journal_path = get_journal_path(project_path)
+    temp_path = journal_path + ".tmp"
+    with open(temp_path, "w") as file:
+        json.dump(record, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, journal_path)
+
+
+def _remove_journal(project_path: str):
+    journal_path = get_journal_path(project_path)
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+
+
+class UDatasetMove:
+    """
+    Перенос папки датасета одним os.rename с журналом для отката.
+    Порядок: begin (журнал started) -> rename (журнал renamed) -> сохранение проекта вызывающим -> commit (журнал удален).
+    Если программа упала до commit, recover при следующем открытии проекта возвращает папку на место
+    или завершает перенос, если проект уже сохранен с новым положением датасета
+    """
+    def __init__(self, project_path: str, dataset: str, source_type: str, target_type: str):
+        self.project_path = project_path.replace('\\', '/')
+        self.dataset = dataset
+        self.source_type = source_type
+        self.target_type = target_type
+        self.source_path = os.path.join(self.project_path, source_type, dataset).replace('\\', '/')
+        self.target_path = os.path.join(self.project_path, target_type, dataset).replace('\\', '/')
+
+    def can_rename(self) -> bool:
+        target_parent = os.path.dirname(self.target_path)
+        os.makedirs(target_parent, exist_ok=True)
+        return (
+            os.path.isdir(self.source_path)
+            and not os.path.exists(self.target_path)
+            and not os.path.exists(get_journal_path(self.project_path))
+            and is_same_filesystem(self.source_path, target_parent)
+        )
+
+    def rename(self):
+        record = {
+            "dataset": self.dataset,
+            "source": self.source_type,
+            "target": self.target_type,
+            "state": STATE_STARTED
+        }
+        _write_journal(self.project_path, record)
+        try:
+            os.rename(self.source_path, self.target_path)
+        except OSError:
+            _remove_journal(self.project_path)
+            raise
+        record["state"] = STATE_RENAMED
+        _write_journal(self.project_path, record)
+
+    def commit(self):
+        _remove_journal(self.project_path)
+
+    def rollback(self):
+        if os.path.isdir(self.target_path) and not os.path.exists(self.source_path):
+            os.rename(self.target_path, self.source_path)
+        _remove_journal(self.project_path)
+
+    @staticmethod
+    def recover(project_path: str, is_saved_in_target) -> str | None:
+        """
+        Завершение или откат прерванного переноса. is_saved_in_target(dataset, target_type) сообщает,
+        записан ли датасет в файле проекта уже в новом положении. Возвращает описание выполненного действия
+        """
+        journal_path = get_journal_path(project_path)
+        if not os.path.exists(journal_path):
+            return None
+        try:
+            with open(journal_path, "r") as file:
+                record = json.load(file)
+            move = UDatasetMove(project_path, record["dataset"], record["source"], record["target"])
+        except (OSError, ValueError, KeyError):
+            _remove_journal(project_path)
+            return None
+
+        if is_saved_in_target(move.dataset, move.target_type) and os.path.isdir(move.target_path):
+            move.commit()
+            return f"Завершен прерванный перенос датасета {move.dataset} в {move.target_type}"
+        move.rollback()
+        return f"Отменен прерванный перенос датасета {move.dataset} из {move.source_type} в {move.target_type}"
@@ -0,0 +1,102 @@
+import os
+
+# Сопоставление файлов аннотаций с изображениями по именам, без чтения содержимого файлов.
+# Результат используют загрузчик аннотаций и подсчет аннотаций датасетов при открытии проекта
+
+
+class FDatasetScan:
+    def __init__(self, dataset_path: str):
+        self.dataset_path = dataset_path
+        # (путь к аннотации, stat аннотации, путь к изображению, stat изображения, тип аннотаций)
+        self.pairs: list[tuple[str, os.stat_result, str, os.stat_result, int]] = list()
+        # Файлы аннотаций, для которых нет изображения
+        self.orphan_labels: list[str] = list()
+        # Изображения, для которых нет ни одного файла аннотаций
+        self.orphan_images: list[str] = list()
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def __str__(self):
+        return (f"Датасет {self.dataset_path}: пар аннотация-изображение {len(self.pairs)}, "
+                f"аннотаций без изображений {len(self.orphan_labels)}, "
+                f"изображений без аннотаций {len(self.orphan_images)}")
+
+
+def _scan_files(folder_path: str, extensions: tuple[str, ...]):
+    # Один проход os.scandir по папке. stat берется из DirEntry, на Windows он приходит вместе со списком файлов
+    try:
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if not entry.name.lower().endswith(extensions):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    yield entry.name, entry.stat()
+                except OSError:
+                    continue
+    except (FileNotFoundError, NotADirectoryError):
+        return
+
+
+def build_image_map(images_path: str, image_extensions: list[str]) -> dict[str, tuple[str, os.stat_result]]:
+    # Ключ - имя файла без расширения. При совпадении имен приоритет у расширения, стоящего раньше в списке
+    priority = {os.path.normcase(ext): index for index, ext in enumerate(image_extensions)}
+    image_map: dict[str, tuple[str, os.stat_result]] = dict()
+    image_priority: dict[str, int] = dict()
+    for file_name, file_stat in _scan_files(images_path, tuple(ext.lower() for ext in image_extensions)):
+        stem, ext = os.path.splitext(file_name)
+        ext_priority = priority.get(os.path.normcase(ext))
+        if ext_priority is None:
+            continue
+        key = os.path.normcase(stem)
+        if key in image_priority and image_priority[key] <= ext_priority:
+            continue
+        image_map[key] = (os.path.join(images_path, file_name).replace('\\', '/'), file_stat)
+        image_priority[key] = ext_priority
+    return image_map
+
+
+def scan_dataset(
+        dataset_path: str,
+        images_folder: str,
+        label_folders: list[tuple[str, int]],
+        image_extensions: list[str]
+) -> FDatasetScan:
+    dataset_path = dataset_path.replace('\\', '/')
+    scan = FDatasetScan(dataset_path)
+
+    image_map = build_image_map(os.path.join(dataset_path, images_folder).replace('\\', '/'), image_extensions)
+    labeled_images: set[str] = set()
+
+    for label_folder, label_kind in label_folders:
+        label_path = os.path.join(dataset_path, label_folder).replace('\\', '/')
+        for file_name, label_stat in _scan_files(label_path, (".txt",)):
+            if not file_name.endswith(".txt"):
+                continue
+            label_file = os.path.join(label_path, file_name).strip().replace('\\', '/')
+            key = os.path.normcase(os.path.splitext(file_name)[0])
+            image = image_map.get(key)
+            if image is None:
+                scan.orphan_labels.append(label_file)
+                continue
+            labeled_images.add(key)
+            image_file, image_stat = image
+            scan.pairs.append((label_file, label_stat, image_file, image_stat, label_kind))
+
+    scan.orphan_images = [image_file for key, (image_file, _) in image_map.items() if key not in labeled_images]
+    return scan
+
+
+def count_label_files(dataset_path: str, label_folders: list[str]) -> int:
+    # Быстрый подсчет файлов аннотаций без сопоставления с изображениями
+    count = 0
+    for label_folder in label_folders:
+        label_path = os.path.join(dataset_path, label_folder).replace('\\', '/')
+        try:
+            with os.scandir(label_path) as entries:
+                count += sum(1 for entry in entries if entry.name.endswith(".txt"))
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+    return count
@@ -0,0 +1,123 @@
+import heapq
+import itertools
+import os
+import threading
+from typing import Callable, Hashable
+
+# Модуль не зависит от PyQt5: задачи выполняются в обычных потоках Python.
+# Декодирование и рисование QImage внутри задач отпускают GIL, поэтому потоки работают параллельно
+
+
+def get_default_workers() -> int:
+    return max(2, min(8, (os.cpu_count() or 2) - 1))
+
+
+class UPriorityWorkerPool:
+    """
+    Ограниченный пул потоков с очередью по приоритету (меньше - раньше).
+    Повторная постановка ключа меняет его приоритет, отмененные ключи пропускаются,
+    результаты накапливаются и забираются пачкой через take_results
+    """
+    def __init__(self, task: Callable[[object], object], workers: int | None = None):
+        self.task = task
+        self.workers = workers or get_default_workers()
+
+        self._heap: list[tuple[float, int, Hashable]] = list()
+        # Ключ -> (номер постановки, данные задачи). Запись в куче с другим номером устарела
+        self._pending: dict[Hashable, tuple[int, object]] = dict()
+        # Выполняемый ключ -> поколение, в котором он начат. После clear ключ можно поставить заново,
+        # результат прежнего выполнения будет отброшен
+        self._running: dict[Hashable, int] = dict()
+        self._results: list[tuple[Hashable, object]] = list()
+        self._sequence = itertools.count()
+        self._generation = 0
+
+        self._condition = threading.Condition()
+        self._threads: list[threading.Thread] = list()
+        self._stopped = False
+
+    def submit(self, key: Hashable, payload: object, priority: float = 0):
+        with self._condition:
+            if self._running.get(key) == self._generation:
+                return
+            sequence = next(self._sequence)
+            self._pending[key] = (sequence, payload)
+            heapq.heappush(self._heap, (priority, sequence, key))
+            self._start_threads()
+            self._condition.notify()
+
+    def cancel(self, keys):
+        with self._condition:
+            for key in keys:
+                self._pending.pop(key, None)
+            if not self._pending:
+                self._heap.clear()
+
+    def clear(self):
+        # Результаты задач, начатых до очистки, отбрасываются
+        with self._condition:
+            self._generation += 1
+            self._pending.clear()
+            self._heap.clear()
+            self._results.clear()
+
+    def take_results(self) -> list[tuple[Hashable, object]]:
+        with self._condition:
+            results, self._results = self._results, list()
+            return results
+
+    def is_pending(self, key: Hashable) -> bool:
+        with self._condition:
+            return key in self._pending or self._running.get(key) == self._generation
+
+    def is_idle(self) -> bool:
+        with self._condition:
+            return not self._pending and not self._running and not self._results
+
+    def shutdown(self):
+        with self._condition:
+            self._stopped = True
+            self._pending.clear()
+            self._heap.clear()
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def _start_threads(self):
+        while len(self._threads) < self.workers and not self._stopped:
+            thread = threading.Thread(target=self._run, name=f"decode-pool-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _take_task(self):
+        with self._condition:
+            while True:
+                if self._stopped:
+                    return None
+                while self._heap:
+                    _, sequence, key = heapq.heappop(self._heap)
+                    pending = self._pending.get(key)
+                    if pending is None or pending[0] != sequence:
+                        continue
+                    del self._pending[key]
+                    self._running[key] = self._generation
+                    return key, pending[1], self._generation
+                self._condition.wait()
+
+    def _run(self):
+        while True:
+            task = self._take_task()
+            if task is None:
+                return
+            key, payload, generation = task
+            try:
+                result = self.task(payload)
+            except Exception as error:
+                print(f"Ошибка при выполнении задачи {key}: {str(error)}")
+                result = None
+            with self._condition:
+                if self._running.get(key) == generation:
+                    del self._running[key]
+                if generation == self._generation:
+                    self._results.append((key, result))
@@ -1,8 +1,9 @@
 import os
-import shutil
 
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
 
+from dataset.annotation_table import FTableAnnotationItem
+from dataset.file_placement import UFilePlacer, PLACEMENT_COPY
 from utility import FAnnotationItem
 
 
@@ -16,7 +17,8 @@ class UExportWorker(QObject):
             image_data: dict[str, list[FAnnotationItem]],
             dataset_path: str,
             dataset_list: list[str],
-            class_refactor: dict[int, (int, str | None)] = None
+            class_refactor: dict[int, (int, str | None)] = None,
+            file_placement: str = PLACEMENT_COPY
     ):
         super().__init__()
 
@@ -24,6 +26,7 @@ class UExportWorker(QObject):
         self.dataset_list = dataset_list
         self.class_refactor = class_refactor
         self.dataset_path = dataset_path
+        self.file_placer = UFilePlacer(file_placement)
 
     @pyqtSlot()
     def run(self):
@@ -52,16 +55,20 @@ class UExportWorker(QObject):
                 continue
 
             for image in self.image_data[dataset]:
-                class_strings = list()
-                for annotation in image.get_annotation_data():
-                    if self.class_refactor and annotation.get_id() in self.class_refactor:
-                        class_id, _ = self.class_refactor[annotation.get_id()]
-                        if class_id is not None:
-                            class_strings.append(annotation.serialize(class_id) + '\n')
+                if isinstance(image, FTableAnnotationItem):
+                    # Строки формируются по массивам таблицы без создания объектов аннотаций
+                    class_strings = image.serialize(self.class_refactor)
+                else:
+                    class_strings = list()
+                    for annotation in image.get_annotation_data():
+                        if self.class_refactor and annotation.get_id() in self.class_refactor:
+                            class_id, _ = self.class_refactor[annotation.get_id()]
+                            if class_id is not None:
+                                class_strings.append(annotation.serialize(class_id) + '\n')
 
                 if len(class_strings) > 0:
                     try:
-                        shutil.copy2(image.get_image_path(), image_dir)
+                        self.file_placer.place(image.get_image_path(), image_dir)
                         image_name = os.path.splitext(os.path.basename(image.get_image_path()))[0]
                         label_path = os.path.join(labels_dir, image_name + ".txt").replace('\\', '/')
                         with open(label_path, 'w') as file:
@@ -76,6 +83,7 @@ class UExportWorker(QObject):
                 if current < images_count:
                     current += 1
 
+        print(f"Размещение изображений при экспорте: {self.file_placer.stats}")
         self.signal_done.emit()
         return
 
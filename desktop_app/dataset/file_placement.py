@@ -0,0 +1,126 @@
+import errno
+import os
+import shutil
+import sys
+
+# Ссылка делит содержимое файла с источником: запись в один файл видна в другом. Поэтому по умолчанию копирование
+
+PLACEMENT_AUTO = "auto"
+PLACEMENT_HARDLINK = "hardlink"
+PLACEMENT_REFLINK = "reflink"
+PLACEMENT_COPY = "copy"
+
+PLACEMENT_STRATEGIES = (PLACEMENT_AUTO, PLACEMENT_HARDLINK, PLACEMENT_REFLINK, PLACEMENT_COPY)
+
+# ioctl FICLONE из linux/fs.h: клонирование содержимого файла на Btrfs, XFS и других файловых системах с reflink
+FICLONE = 0x40049409
+
+# Ошибки, после которых способ больше не пробуется для этой пары устройств
+_UNSUPPORTED_ERRORS = {errno.EXDEV, errno.EPERM, errno.EACCES, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EINVAL, errno.ENOTTY}
+
+
+class FPlacementStats:
+    def __init__(self):
+        self.hardlinked = 0
+        self.reflinked = 0
+        self.copied = 0
+        # Байты, которые не пришлось записывать на диск благодаря жестким ссылкам и reflink
+        self.bytes_saved = 0
+        self.bytes_copied = 0
+
+    def __str__(self):
+        return (f"Жестких ссылок: {self.hardlinked}, reflink: {self.reflinked}, копий: {self.copied}, "
+                f"сэкономлено {format_size(self.bytes_saved)}, скопировано {format_size(self.bytes_copied)}")
+
+
+def format_size(size: int) -> str:
+    for unit in ("Б", "КБ", "МБ", "ГБ"):
+        if size < 1024 or unit == "ГБ":
+            return f"{size:.0f} {unit}" if unit == "Б" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _reflink(source: str, target: str):
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.ENOTSUP, "reflink не поддерживается на этой платформе")
+    import fcntl
+    with open(source, "rb") as source_file, open(target, "wb") as target_file:
+        fcntl.ioctl(target_file.fileno(), FICLONE, source_file.fileno())
+
+
+class UFilePlacer:
+    """
+    Размещение файла изображения: по умолчанию копирование. Со стратегией auto - жесткая ссылка, затем reflink,
+    затем обычное копирование. Способ, который не сработал для пары устройств, больше для нее не пробуется.
+    Без fallback_copy вместо копирования выбрасывается OSError, когда файл должен остаться общим
+    """
+    def __init__(self, strategy: str = PLACEMENT_COPY, fallback_copy: bool = True):
+        if strategy not in PLACEMENT_STRATEGIES:
+            strategy = PLACEMENT_COPY
+        self.strategy = strategy
+        self.fallback_copy = fallback_copy
+        self.stats = FPlacementStats()
+        self._unsupported: set[tuple[str, int, int]] = set()
+
+    def get_methods(self) -> tuple[str, ...]:
+        if self.strategy == PLACEMENT_COPY:
+            return PLACEMENT_COPY,
+        methods = (PLACEMENT_HARDLINK, PLACEMENT_REFLINK) if self.strategy == PLACEMENT_AUTO else (self.strategy,)
+        return methods + (PLACEMENT_COPY,) if self.fallback_copy else methods
+
+    def place(self, source: str, target: str) -> str:
+        # target может быть папкой, как у shutil.copy2. Возвращает путь к размещенному файлу
+        if os.path.isdir(target):
+            target = os.path.join(target, os.path.basename(source)).replace('\\', '/')
+        source_stat = os.stat(source)
+        target_device = os.stat(os.path.dirname(os.path.abspath(target))).st_dev
+
+        if os.path.exists(target) and os.path.samefile(source, target):
+            return target
+
+        last_error: OSError | None = None
+        for method in self.get_methods():
+            if method == PLACEMENT_COPY:
+                shutil.copy2(source, target)
+                self.stats.copied += 1
+                self.stats.bytes_copied += source_stat.st_size
+                return target
+
+            key = (method, source_stat.st_dev, target_device)
+            if key in self._unsupported:
+                last_error = OSError(errno.ENOTSUP, f"{method} не поддерживается для {target}")
+                continue
+            error = self._try_place(method, source, target)
+            if error is None:
+                if method == PLACEMENT_HARDLINK:
+                    self.stats.hardlinked += 1
+                else:
+                    self.stats.reflinked += 1
+                self.stats.bytes_saved += source_stat.st_size
+                return target
+            # Прочие ошибки (например, превышено число ссылок на файл) касаются только этого файла
+            if error.errno in _UNSUPPORTED_ERRORS:
+                self._unsupported.add(key)
+            last_error = error
+        raise last_error
+
+    def flush(self):
+        # Для размещения с дополнительными данными, например манифестами хранилища блобов
+        pass
+
+    @staticmethod
+    def _try_place(method: str, source: str, target: str) -> OSError | None:
+        # Ссылка создается во временном файле и заменяет target, чтобы существующий файл перезаписывался как при копировании
+        temp_path = f"{target}.{os.getpid()}.link"
+        try:
+            if method == PLACEMENT_HARDLINK:
+                os.link(source, temp_path)
+            else:
+                _reflink(source, temp_path)
+                shutil.copystat(source, temp_path)
+            os.replace(temp_path, target)
+            return None
+        except OSError as error:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return error
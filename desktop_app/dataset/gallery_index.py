@@ -0,0 +1,95 @@
+import numpy as np
+
+from dataset.annotation_table import FTableAnnotationItem, FAnnotationTable
+from utility import FAnnotationItem, EAnnotationType
+
+
+class UGalleryIndex:
+    """
+    Список изображений галереи и результат фильтрации по классам.
+    Не зависит от способа отображения и используется обеими галереями
+    """
+    def __init__(self):
+        self.annotation_data: list[FAnnotationItem] = list()
+        # Позиция изображения в галерее по индексу изображения
+        self.filtered_indexes: dict[int, int] = dict()
+        # Порядок отфильтрованных изображений: позиция в галерее -> индекс изображения
+        self.filtered_order: list[int] = list()
+        # Текущий фильтр. Используется для аннотаций, добавляемых в галерею во время загрузки датасета
+        self.image_filter: dict[int, bool] = dict()
+        self.type_list: list[EAnnotationType] = list()
+        # Позиции изображений в галерее по таблицам аннотаций: id таблицы -> (таблица, индексы галереи, ID в таблице)
+        self.table_groups: dict[int, tuple[FAnnotationTable, list[int], list[int]]] = dict()
+        # Изображения без таблицы аннотаций
+        self.plain_indexes: list[int] = list()
+
+    def __len__(self):
+        return len(self.filtered_order)
+
+    def set_annotations(self, annotation_list: list[FAnnotationItem]):
+        self.annotation_data = annotation_list
+        self.table_groups.clear()
+        self.plain_indexes.clear()
+        self._register_items(0)
+
+    def append_annotations(self, annotation_list: list[FAnnotationItem]) -> int:
+        # Возвращает позицию первого добавленного изображения в галерее
+        start_index = len(self.annotation_data)
+        start_position = len(self.filtered_order)
+        self.annotation_data.extend(annotation_list)
+        self._register_items(start_index)
+        if self.image_filter:
+            self.filter_from(start_index)
+        return start_position
+
+    def filter(self, image_filter: dict[int, bool], type_list: list[EAnnotationType]):
+        self.image_filter = image_filter
+        self.type_list = type_list
+        self.clear_filter()
+        self.filter_from(0)
+
+    def clear_filter(self):
+        self.filtered_indexes.clear()
+        self.filtered_order.clear()
+
+    def filter_from(self, start_index: int):
+        available_annotations = set(index for index, is_available in self.image_filter.items() if is_available)
+        mask = np.zeros(len(self.annotation_data) - start_index, dtype=np.bool_)
+
+        # Изображения таблиц аннотаций: маски инвертированного индекса таблицы переносятся на позиции галереи
+        for table, gallery_indexes, image_ids in self.table_groups.values():
+            gallery_array = np.asarray(gallery_indexes, dtype=np.int64)
+            first = np.searchsorted(gallery_array, start_index)
+            if first == len(gallery_array):
+                continue
+            table_mask = table.filter_images(available_annotations, self.type_list)
+            mask[gallery_array[first:] - start_index] = table_mask[np.asarray(image_ids[first:], dtype=np.int64)]
+
+        for index in self.plain_indexes:
+            if index < start_index:
+                continue
+            item = self.annotation_data[index]
+            class_list = []
+            for annotation in item.annotation_list:
+                if annotation.get_annotation_type() in self.type_list:
+                    class_list.append(annotation.class_id)
+            if set(class_list) & available_annotations or len(item.annotation_list) == 0:
+                mask[index - start_index] = True
+
+        filtered = (np.flatnonzero(mask) + start_index).tolist()
+        offset = len(self.filtered_indexes)
+        self.filtered_indexes.update(zip(filtered, range(offset, offset + len(filtered))))
+        self.filtered_order.extend(filtered)
+
+    def _register_items(self, start_index: int):
+        # Разбиение изображений галереи по таблицам аннотаций для фильтрации по маскам
+        for index in range(start_index, len(self.annotation_data)):
+            item = self.annotation_data[index]
+            if isinstance(item, FTableAnnotationItem):
+                group = self.table_groups.get(id(item.table))
+                if group is None:
+                    group = self.table_groups[id(item.table)] = (item.table, list(), list())
+                group[1].append(index)
+                group[2].append(item.image_id)
+            else:
+                self.plain_indexes.append(index)
@@ -0,0 +1,340 @@
+import math
+from typing import Optional
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, QSize, pyqtSlot
+from PyQt5.QtGui import QPixmap, QPen, QBrush, QColor, QGuiApplication
+from PyQt5.QtWidgets import QTableView, QStyledItemDelegate, QHeaderView, QAbstractItemView
+
+from dataset.decode_pool import UPriorityWorkerPool
+from dataset.gallery_index import UGalleryIndex
+from dataset.image_gallery import UGalleryImageLoader
+from dataset.pixmap_cache import UPixmapCache
+from dataset.thumbnail_cache import UThumbnailCache
+from utility import FAnnotationItem, EAnnotationType
+
+# Индекс изображения в списке аннотаций галереи
+IMAGE_INDEX_ROLE = Qt.UserRole + 1
+
+
+class UGalleryModel(QAbstractTableModel):
+    """
+    Модель виртуальной галереи. Строка модели - строка сетки, столбец - ячейка в строке.
+    Позиция в галерее вычисляется как row * columns + column, поэтому смена числа столбцов не требует пересчета
+    """
+    def __init__(self, gallery_index: UGalleryIndex, pixmap_cache: UPixmapCache, parent=None):
+        super().__init__(parent)
+        self.gallery_index = gallery_index
+        self.pixmap_cache = pixmap_cache
+        self.columns = 1
+        # Количество отображаемых позиций. Меняется только внутри уведомлений модели
+        self.count = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return math.ceil(self.count / self.columns)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.columns
+
+    def flags(self, index: QModelIndex):
+        if self.get_image_index(index) is None:
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        image_index = self.get_image_index(index)
+        if image_index is None:
+            return None
+        if role == Qt.DecorationRole:
+            return self.pixmap_cache.get(image_index)
+        if role == IMAGE_INDEX_ROLE:
+            return image_index
+        if role == Qt.ToolTipRole:
+            return self.gallery_index.annotation_data[image_index].get_image_path()
+        return None
+
+    def get_image_index(self, index: QModelIndex) -> int | None:
+        if not index.isValid():
+            return None
+        position = index.row() * self.columns + index.column()
+        if position >= self.count:
+            return None
+        return self.gallery_index.filtered_order[position]
+
+    def get_model_index(self, image_index: int) -> QModelIndex:
+        position = self.gallery_index.filtered_indexes.get(image_index)
+        if position is None or position >= self.count:
+            return QModelIndex()
+        return self.index(position // self.columns, position % self.columns)
+
+    def set_columns(self, columns: int):
+        if columns == self.columns:
+            return
+        self.beginResetModel()
+        self.columns = columns
+        self.endResetModel()
+
+    def reset(self):
+        self.beginResetModel()
+        self.count = len(self.gallery_index)
+        self.endResetModel()
+
+    def append_positions(self):
+        # Новые позиции дописываются в конец: дозаполняется последняя строка и добавляются новые
+        new_count = len(self.gallery_index)
+        if new_count <= self.count:
+            return
+        old_rows = self.rowCount()
+        is_row_filled = self.count % self.columns != 0
+        new_rows = math.ceil(new_count / self.columns)
+        if new_rows > old_rows:
+            self.beginInsertRows(QModelIndex(), old_rows, new_rows - 1)
+            self.count = new_count
+            self.endInsertRows()
+        self.count = new_count
+        if is_row_filled:
+            self.dataChanged.emit(self.index(old_rows - 1, 0), self.index(old_rows - 1, self.columns - 1))
+
+    def update_image(self, image_index: int):
+        index = self.get_model_index(image_index)
+        if index.isValid():
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
+class UGalleryItemDelegate(QStyledItemDelegate):
+    def __init__(self, gallery: 'UVirtualImageGallery'):
+        super().__init__(gallery)
+        self.gallery = gallery
+        self.board_width = 2
+
+    def sizeHint(self, option, index):
+        size = self.gallery.cell_size + self.gallery.margin
+        return QSize(size, size)
+
+    def paint(self, painter, option, index):
+        image_index = index.data(IMAGE_INDEX_ROLE)
+        if image_index is None:
+            return
+        cell_size = self.gallery.cell_size
+        x = option.rect.x() + (option.rect.width() - cell_size) // 2
+        y = option.rect.y() + (option.rect.height() - cell_size) // 2
+
+        painter.save()
+        painter.setBrush(QBrush(QColor(Qt.lightGray)))
+        painter.setPen(Qt.NoPen)
+        painter.drawRect(x, y, cell_size, cell_size)
+
+        pixmap: QPixmap | None = index.data(Qt.DecorationRole)
+        if pixmap is not None:
+            painter.drawPixmap(x + (cell_size - pixmap.width()) // 2, y + (cell_size - pixmap.height()) // 2, pixmap)
+
+        if image_index in self.gallery.set_selected:
+            painter.setPen(QPen(QColor(Qt.blue), self.board_width * 2))
+            painter.setBrush(QBrush(QColor(0, 0, 255, 30)))
+            painter.drawRect(x, y, cell_size, cell_size)
+        painter.restore()
+
+
+class UVirtualImageGallery(QTableView):
+    """
+    Галерея на модели и делегате: виджеты изображений не создаются, делегат рисует только видимые ячейки,
+    миниатюры берутся из кэша с бюджетом памяти. Интерфейс совпадает с UImageGallery
+    """
+    def __init__(self, parent=None, workers: int | None = None):
+        super().__init__(parent)
+
+        self.margin: int = 10
+        self.cell_size: int = 200
+
+        self.gallery_index = UGalleryIndex()
+        self.pixmap_cache = UPixmapCache(256, self.on_pixmap_evicted)
+        # Миниатюры изображений на диске проекта и в памяти
+        self.thumbnail_cache: Optional[UThumbnailCache] = None
+        self.set_selected: set[int] = set()
+
+        self.gallery_model = UGalleryModel(self.gallery_index, self.pixmap_cache, self)
+        self.setModel(self.gallery_model)
+        self.setItemDelegate(UGalleryItemDelegate(self))
+
+        for header in (self.horizontalHeader(), self.verticalHeader()):
+            header.setSectionResizeMode(QHeaderView.Fixed)
+            header.setDefaultSectionSize(self.cell_size + self.margin)
+            header.hide()
+        self.setShowGrid(False)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.clicked.connect(self.handle_select_image)
+
+        # Декодирование миниатюр видимых ячеек в пуле потоков, сверху вниз
+        self.pool = UPriorityWorkerPool(UGalleryImageLoader.render_image, workers)
+        self.visible_indexes: set[int] = set()
+        self.result_timer = QTimer(self)
+        self.result_timer.setInterval(16)
+        self.result_timer.timeout.connect(self.send_loaded_images)
+
+        screen = QGuiApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen and screen.refreshRate() > 0 else 60
+        self.visibility_timer = QTimer(self)
+        self.visibility_timer.setSingleShot(True)
+        self.visibility_timer.setInterval(max(1, int(1000 / refresh_rate)))
+        self.visibility_timer.timeout.connect(self.update_visibility)
+
+        self.verticalScrollBar().valueChanged.connect(self.request_visibility_update)
+
+    @property
+    def annotation_data(self) -> list[FAnnotationItem]:
+        return self.gallery_index.annotation_data
+
+    @property
+    def filtered_indexes(self) -> dict[int, int]:
+        return self.gallery_index.filtered_indexes
+
+    @property
+    def filtered_order(self) -> list[int]:
+        return self.gallery_index.filtered_order
+
+    def set_dataset_annotations(self, annotation_list: list[FAnnotationItem]):
+        self.gallery_index.set_annotations(annotation_list)
+
+    def append_dataset_annotations(self, annotation_list: list[FAnnotationItem]):
+        self.gallery_index.append_annotations(annotation_list)
+        if not self.gallery_index.image_filter:
+            return
+        self.gallery_model.append_positions()
+        self.request_visibility_update()
+
+    def filter_images(self, image_filter: dict[int, bool], type_list: list[EAnnotationType]):
+        if not image_filter:
+            return
+        self.gallery_index.filter(image_filter, type_list)
+        self.gallery_model.reset()
+        self.update_visibility()
+
+    def update_visibility(self):
+        columns = self.gallery_model.columns
+        rows = self.gallery_model.rowCount()
+        if rows == 0:
+            visible_indexes = set()
+        else:
+            first_row = max(0, self.rowAt(0))
+            last_row = self.rowAt(self.viewport().height() - 1)
+            last_row = rows - 1 if last_row < 0 else last_row
+            # Строка сверху и снизу загружается заранее
+            first_position = max(0, first_row - 1) * columns
+            last_position = min(rows, last_row + 2) * columns
+            visible_indexes = set(self.filtered_order[first_position:min(last_position, self.gallery_model.count)])
+
+        self.pool.cancel(self.visible_indexes - visible_indexes)
+        self.visible_indexes = visible_indexes
+        filtered_indexes = self.filtered_indexes
+        for index in visible_indexes:
+            if index in self.pixmap_cache:
+                continue
+            self.pool.submit(
+                index,
+                (self.annotation_data[index], self.cell_size, self.thumbnail_cache),
+                filtered_indexes[index]
+            )
+        if visible_indexes and not self.result_timer.isActive():
+            self.result_timer.start()
+
+    def request_visibility_update(self):
+        # Видимая область пересчитывается не чаще раза в кадр
+        if not self.visibility_timer.isActive():
+            self.visibility_timer.start()
+
+    @pyqtSlot()
+    def send_loaded_images(self):
+        for index, image in self.pool.take_results():
+            if image is None or image.isNull() or index not in self.visible_indexes:
+                continue
+            self.pixmap_cache.put(index, QPixmap.fromImage(image))
+            self.gallery_model.update_image(index)
+        if self.pool.is_idle():
+            self.result_timer.stop()
+
+    def on_pixmap_evicted(self, index: int):
+        # В ячейке остается заглушка, изображение загрузится снова при следующем пересчете видимой области
+        self.gallery_model.update_image(index)
+
+    @pyqtSlot(QModelIndex)
+    def handle_select_image(self, index: QModelIndex):
+        image_index = self.gallery_model.get_image_index(index)
+        if image_index is None:
+            return
+        if image_index in self.set_selected:
+            self.set_selected.discard(image_index)
+        else:
+            self.set_selected.add(image_index)
+        self.update(index)
+
+    def is_widget_selected_by_id(self, index: int) -> bool:
+        return index in self.set_selected
+
+    def get_selected_annotation(self):
+        return [self.annotation_data[index] for index in self.filtered_indexes if index in self.set_selected]
+
+    def set_all_selected(self):
+        self.set_selected = set(self.filtered_indexes.keys())
+        self.viewport().update()
+
+    def clear_all_selections(self):
+        self.set_selected.clear()
+        self.viewport().update()
+
+    def clear_scene(self):
+        self.verticalScrollBar().setValue(0)
+        self.result_timer.stop()
+        self.pool.clear()
+        self.visible_indexes.clear()
+        self.pixmap_cache.clear()
+        self.set_selected.clear()
+        self.gallery_index.clear_filter()
+        self.gallery_model.reset()
+
+    def update_columns(self):
+        # Смена числа столбцов меняет только арифметику позиций модели: O(1) при любом числе изображений
+        columns = max(1, self.viewport().width() // (self.cell_size + self.margin))
+        self.horizontalHeader().setDefaultSectionSize(max(self.cell_size + self.margin, self.viewport().width() // columns))
+        self.gallery_model.set_columns(columns)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_columns()
+        self.request_visibility_update()
+
+    def shutdown(self):
+        self.result_timer.stop()
+        self.pool.shutdown()
+
+    def set_thumbnail_cache(self, thumbnail_cache: UThumbnailCache | None):
+        self.thumbnail_cache = thumbnail_cache
+
+    def set_pixmap_cache_budget(self, budget_mb: float):
+        self.pixmap_cache.set_budget_mb(budget_mb)
+
+    def set_cell_size(self, cell_size: int):
+        if cell_size == self.cell_size:
+            return
+        self.cell_size = cell_size
+        # Миниатюры другого размера декодируются заново
+        self.pool.clear()
+        self.pixmap_cache.clear()
+        self.verticalHeader().setDefaultSectionSize(self.cell_size + self.margin)
+        self.update_columns()
+        self.viewport().update()
+        self.request_visibility_update()
+
+    def get_cell_size(self):
+        return self.cell_size
+
+    def set_margin(self, margin: int):
+        self.margin = margin
+        self.verticalHeader().setDefaultSectionSize(self.cell_size + self.margin)
+        self.update_columns()
@@ -1,13 +1,16 @@
 import math
-import queue
 from collections import OrderedDict
 from typing import Optional
 
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QRectF, QRect, QObject, pyqtSlot, QMetaObject, Q_ARG, QTimer, QPointF
-from PyQt5.QtGui import QPainter, QPen, QBrush, QPixmap, QColor, QImage, QPolygonF
+from PyQt5.QtGui import QPainter, QPen, QBrush, QPixmap, QColor, QImage, QPolygonF, QTransform, QGuiApplication
 from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QWidget, QGraphicsPixmapItem, QGraphicsProxyWidget, \
     QGraphicsObject
 
+from dataset.decode_pool import UPriorityWorkerPool
+from dataset.gallery_index import UGalleryIndex
+from dataset.pixmap_cache import UPixmapCache
+from dataset.thumbnail_cache import UThumbnailCache, create_thumbnail
 from utility import FAnnotationItem, FDetectAnnotationData, FPolygonAnnotationData, EAnnotationType
 
 
@@ -53,49 +56,72 @@ class UGraphicsAnnotationGalleryItem(UGraphicsGalleryItem):
         self.loaded = False
         self.pixmap: QPixmap | None = None
 
-    def set_image(self, image: QImage):
+    def set_pixmap(self, pixmap: QPixmap):
         if self.loaded:
             return
-        self.pixmap = QPixmap(image)
+        self.pixmap = pixmap
         self.loaded = True
         self.update()
 
+    def clear_image(self):
+        # Изображение вытеснено из кэша, на месте ячейки остается заглушка
+        self.pixmap = None
+        self.loaded = False
+        self.update()
+
     def mousePressEvent(self, event):
         super().mousePressEvent(event)
         self.signal_clicked.emit(self.index, self.selected)
 
-    def create_image(self) -> QImage:
-        image = QImage(self.annotation_data.get_image_path())
+    def create_image(self, thumbnail_cache: UThumbnailCache | None = None) -> QImage:
+        return UGraphicsAnnotationGalleryItem.render_image(self.annotation_data, self.size, self.board_width, thumbnail_cache)
+
+    @staticmethod
+    def render_image(
+            annotation_data: FAnnotationItem,
+            size: int,
+            board_width: int = 2,
+            thumbnail_cache: UThumbnailCache | None = None
+    ) -> QImage:
+        # Не обращается к виджету, поэтому может выполняться в потоках пула декодирования.
+        # Декодируется только миниатюра из кэша, аннотации рисуются поверх нее в масштабе миниатюры
+        image_path = annotation_data.get_image_path()
+        if thumbnail_cache is not None:
+            thumbnail = thumbnail_cache.get_or_create(image_path, size)
+        else:
+            thumbnail = create_thumbnail(image_path, size)
+        if thumbnail.isNull():
+            return thumbnail
+
+        image = thumbnail.convertToFormat(QImage.Format_ARGB32_Premultiplied)
         painter = QPainter(image)
         painter.setRenderHint(QPainter.Antialiasing)
 
-        for annotation in self.annotation_data.annotation_list:
+        for annotation in annotation_data.annotation_list:
+            res_w, res_h = annotation.get_resolution()
+            if not res_w or not res_h:
+                continue
+            painter.setTransform(QTransform.fromScale(image.width() / res_w, image.height() / res_h))
             if isinstance(annotation, FDetectAnnotationData):
                 _, _, _, color, (x, y, width, height) = annotation.get_data()
-                pen = QPen(color)
-                pen.setWidth(int(self.board_width * (image.width() // self.size)))
-                painter.setPen(pen)
-                painter.drawRect(
-                    int(max(0, x)),
-                    int(max(0, y)),
-                    width,
-                    height
-                )
+                painter.setPen(UGraphicsAnnotationGalleryItem._get_pen(color, board_width))
+                painter.drawRect(QRectF(max(0, x), max(0, y), width, height))
             elif isinstance(annotation, FPolygonAnnotationData):
                 _, _, _, color, point_list = annotation.get_data()
-                pen = QPen(color)
-                pen.setWidth(int(self.board_width * (image.width() // self.size)))
-                painter.setPen(pen)
+                painter.setPen(UGraphicsAnnotationGalleryItem._get_pen(color, board_width))
                 qt_points = [QPointF(x, y) for x, y in point_list]
                 painter.drawPolygon(QPolygonF(qt_points))
         painter.end()
 
-        return image.scaled(
-            self.size,
-            self.size,
-            aspectRatioMode=Qt.KeepAspectRatio,
-            transformMode=Qt.SmoothTransformation
-        )
+        return image
+
+    @staticmethod
+    def _get_pen(color: QColor, board_width: int) -> QPen:
+        # Толщина линии задается в пикселях миниатюры и не зависит от масштаба
+        pen = QPen(color)
+        pen.setWidth(board_width)
+        pen.setCosmetic(True)
+        return pen
 
     def paint(self, painter, option, widget=None):
         painter.setBrush(QBrush(QColor(Qt.lightGray)))
@@ -123,12 +149,12 @@ class UGraphicsAnnotationGalleryItem(UGraphicsGalleryItem):
 
 
 class UGalleryImageLoader(QObject):
-    # ID и QImage изображения, которое нужно загрузить в галерею
-    signal_set_image = pyqtSignal(int, object)
+    # Пачка пар (ID, QImage) загруженных изображений галереи
+    signal_set_images = pyqtSignal(list)
     # Объект UGalleryWidget
     signal_add_widget = pyqtSignal(object)
 
-    def __init__(self, gallery: 'UImageGallery'):
+    def __init__(self, gallery: 'UImageGallery', workers: int | None = None):
         super().__init__()
         self.gallery = gallery
 
@@ -137,16 +163,18 @@ class UGalleryImageLoader(QObject):
         self.indexes_to_load: set[int] = set()
         self.indexes_to_unload: set[int] = set()
 
-        self.queue_load_images: list[int] = list()
         self.set_load_images: set[int] = set()
 
+        # Декодирование и рисование миниатюр в пуле потоков. Видимые изображения идут по порядку сверху вниз
+        self.pool = UPriorityWorkerPool(self.render_image, workers)
+        # Готовые изображения отправляются в галерею одним сигналом раз в кадр
         self.timer: Optional[QTimer] = None
 
     @pyqtSlot()
     def setup_timer(self):
         self.timer = QTimer(self)
-        self.timer.setInterval(10)
-        self.timer.timeout.connect(self.load_next_image)
+        self.timer.setInterval(16)
+        self.timer.timeout.connect(self.send_loaded_images)
 
     @pyqtSlot(set, bool)
     def update_visibilities(self, updated_indexes: set[int], is_new: bool):
@@ -163,7 +191,7 @@ class UGalleryImageLoader(QObject):
 
     def create_widgets(self):
         for index in self.indexes_to_load:
-            if not (0 <= index <= len(self.gallery.annotation_data)):
+            if not (0 <= index < len(self.gallery.annotation_data)):
                 continue
             widget_gallery = UGraphicsAnnotationGalleryItem(
                 self.gallery.annotation_data[index],
@@ -174,35 +202,43 @@ class UGalleryImageLoader(QObject):
             self.signal_add_widget.emit(widget_gallery)
 
     def start_load_images(self):
-        for index in self.indexes_to_load:
-            if index not in self.set_load_images:
-                self.queue_load_images.append(index)
+        # Ушедшие из видимой области изображения снимаются с очереди
+        self.pool.cancel(self.indexes_to_unload)
 
-        for index in self.indexes_to_unload:
-            if index in self.queue_load_images:
-                    self.queue_load_images.remove(index)
+        filtered_indexes = self.gallery.filtered_indexes
+        for index in self.indexes_to_load:
+            if index in self.set_load_images or not (0 <= index < len(self.gallery.annotation_data)):
+                continue
+            self.pool.submit(
+                index,
+                (self.gallery.annotation_data[index], self.gallery.cell_size, self.gallery.thumbnail_cache),
+                filtered_indexes.get(index, index)
+            )
 
         if not self.timer.isActive():
             self.timer.start()
 
+    @staticmethod
+    def render_image(payload: tuple[FAnnotationItem, int, UThumbnailCache | None]) -> QImage:
+        annotation_data, cell_size, thumbnail_cache = payload
+        image = UGraphicsAnnotationGalleryItem.render_image(annotation_data, cell_size, thumbnail_cache=thumbnail_cache)
+        if image.isNull():
+            print(f"Не удалось загрузить изображение {annotation_data.get_image_path()}")
+        return image
+
     @pyqtSlot()
-    def load_next_image(self):
-        if len(self.queue_load_images) == 0:
+    def send_loaded_images(self):
+        results = self.pool.take_results()
+        loaded = list()
+        for index, image in results:
+            if image is None or image.isNull() or index not in self.current_indexes:
+                continue
+            self.set_load_images.add(index)
+            loaded.append((index, image))
+        if loaded:
+            self.signal_set_images.emit(loaded)
+        if self.pool.is_idle():
             self.timer.stop()
-            return
-        index = self.queue_load_images[0]
-        widget: UGraphicsAnnotationGalleryItem = self.gallery.get_widget_by_index(index)
-        if widget is None:
-            self.queue_load_images.remove(index)
-            return
-        image = widget.create_image()
-        if image.isNull():
-            self.queue_load_images.remove(index)
-            print(f"Не удалось загрузить изображение {widget.get_image_path()}")
-            return
-        self.queue_load_images.remove(index)
-        self.set_load_images.add(index)
-        self.signal_set_image.emit(index, image)
 
     @pyqtSlot(int)
     def remove_from_loaded(self, index: int):
@@ -212,8 +248,8 @@ class UGalleryImageLoader(QObject):
     def clean_all_loaded(self):
         if self.timer.isActive():
             self.timer.stop()
+        self.pool.clear()
         self.set_load_images.clear()
-        self.queue_load_images.clear()
 
 
 class UImageGallery(QGraphicsView):
@@ -235,7 +271,7 @@ class UImageGallery(QGraphicsView):
         self.loader_thread = QThread()
         self.image_loader = UGalleryImageLoader(self)
         self.image_loader.signal_add_widget.connect(self.add_item)
-        self.image_loader.signal_set_image.connect(self.set_image_by_index)
+        self.image_loader.signal_set_images.connect(self.set_images)
         self.signal_changed_viewport.connect(self.image_loader.update_visibilities)
         self.signal_clear_viewport.connect(self.image_loader.clean_all_loaded)
         self.signal_deleted_from_cache.connect(self.image_loader.remove_from_loaded)
@@ -244,19 +280,30 @@ class UImageGallery(QGraphicsView):
         self.loader_thread.start()
         self.loader_thread.started.connect(self.image_loader.setup_timer)
 
-        self.annotation_data: list[FAnnotationItem] = list()
+        # Изображения галереи и результат фильтрации
+        self.gallery_index = UGalleryIndex()
 
         self.widget_cache: OrderedDict[int, UGraphicsAnnotationGalleryItem] = OrderedDict()
         self.cache_size: int = 500
+        # Декодированные миниатюры ограничены объемом памяти отдельно от элементов сцены
+        self.pixmap_cache = UPixmapCache(256, self.on_pixmap_evicted)
+        # Миниатюры изображений на диске проекта и в памяти
+        self.thumbnail_cache: Optional[UThumbnailCache] = None
 
         self.set_selected: set[int] = set()
-        self.filtered_indexes: dict[int, int] = dict()
         # Словарь для отображения виджетов. Первое значение - ID виджета, Второе - позиция в галерее
         self.dict_displayed_indexes: dict[int, int] = dict()
 
         self.setResizeAnchor(QGraphicsView.AnchorUnderMouse)
         self.setViewportUpdateMode(QGraphicsView.BoundingRectViewportUpdate)
 
+        screen = QGuiApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen and screen.refreshRate() > 0 else 60
+        self.visibility_timer = QTimer(self)
+        self.visibility_timer.setSingleShot(True)
+        self.visibility_timer.setInterval(max(1, int(1000 / refresh_rate)))
+        self.visibility_timer.timeout.connect(self.update_visibility)
+
     @pyqtSlot(object)
     def add_item(self, gallery_item: UGraphicsAnnotationGalleryItem):
         if not isinstance(gallery_item, UGraphicsAnnotationGalleryItem):
@@ -267,6 +314,7 @@ class UImageGallery(QGraphicsView):
             return
         if index in self.widget_cache:
             self.widget_cache.move_to_end(index)
+            self.pixmap_cache.touch(index)
             return
         if len(self.widget_cache) >= self.cache_size:
             self.delete_widget_from_cache()
@@ -279,32 +327,47 @@ class UImageGallery(QGraphicsView):
         gallery_item.signal_clicked.connect(self.handle_select_image)
         self.scene.addItem(gallery_item)
         self.widget_cache[index] = gallery_item
+        pixmap = self.pixmap_cache.get(index)
+        if pixmap is not None:
+            gallery_item.set_pixmap(pixmap)
         #self.viewport().update()
 
-    @pyqtSlot(int, object)
-    def set_image_by_index(self, index: int, image: QImage):
-        if index not in self.widget_cache:
-            return
-        self.widget_cache[index].set_image(image)
+    @pyqtSlot(list)
+    def set_images(self, images: list[tuple[int, QImage]]):
+        for index, image in images:
+            pixmap = QPixmap.fromImage(image)
+            self.pixmap_cache.put(index, pixmap)
+            if index in self.widget_cache:
+                self.widget_cache[index].set_pixmap(pixmap)
+
+    def on_pixmap_evicted(self, index: int):
+        widget = self.widget_cache.get(index)
+        if widget is not None:
+            widget.clear_image()
+        # Загрузчик снова декодирует изображение, когда оно окажется в видимой области
+        self.signal_deleted_from_cache.emit(index)
 
     @pyqtSlot(int, bool)
     def handle_select_image(self, index: int, selected: bool):
         self.set_selected.add(index) if selected else self.set_selected.discard(index)
 
+    @property
+    def annotation_data(self) -> list[FAnnotationItem]:
+        return self.gallery_index.annotation_data
+
+    @property
+    def filtered_indexes(self) -> dict[int, int]:
+        return self.gallery_index.filtered_indexes
+
+    @property
+    def filtered_order(self) -> list[int]:
+        return self.gallery_index.filtered_order
+
     def filter_images(self, image_filter: dict[int, bool], type_list: list[EAnnotationType]):
         if not image_filter or len(image_filter) < 0:
             return
-        self.filtered_indexes.clear()
-        available_annotations = [index for index, is_available in image_filter.items() if is_available]
         # Устанавливаем список отфильтрованных значений
-        for index in range(len(self.annotation_data)):
-            class_list = []
-            for annotation in self.annotation_data[index].annotation_list:
-                if annotation.get_annotation_type() in type_list:
-                    class_list.append(annotation.class_id)
-            if ((set(class_list) & set(available_annotations) and index not in self.filtered_indexes)
-                    or len(self.annotation_data[index].annotation_list) == 0):
-                self.filtered_indexes[index] = len(self.filtered_indexes)
+        self.gallery_index.filter(image_filter, type_list)
         #
         self.update_scene_rect()
         self.update_grid()
@@ -332,10 +395,15 @@ class UImageGallery(QGraphicsView):
         index_first = int(scene_rect.y() // (self.cell_size + self.margin) * self.columns)
         index_last = int(index_first + (int(math.ceil(viewport_rect.height() / (self.cell_size + self.margin))) + 1) * self.columns - 1)
 
-        current_visible = [i for i in range(index_first, index_last + 1) if len(self.filtered_indexes) > i >= 0]
-        list_visible_index_real = [list(self.filtered_indexes.keys())[index] for index in current_visible]
+        # Срез порядка отфильтрованных изображений: O(видимых ячеек), а не O(всех изображений)
+        visible_indexes = self.filtered_order[max(0, index_first):max(0, index_last + 1)]
+
+        self.signal_changed_viewport.emit(set(visible_indexes), force)
 
-        self.signal_changed_viewport.emit(set(list_visible_index_real), force)
+    def request_visibility_update(self):
+        # События прокрутки приходят чаще кадров экрана, видимая область пересчитывается не чаще раза в кадр
+        if not self.visibility_timer.isActive():
+            self.visibility_timer.start()
 
     def update_scene_rect(self):
         self.scene.setSceneRect(
@@ -352,12 +420,20 @@ class UImageGallery(QGraphicsView):
         vertical_scrollbar.setPageStep(self.height())  # Размер шага при клике на полосу прокрутки
 
     def set_dataset_annotations(self, annotation_list: list[FAnnotationItem]):
-        self.annotation_data = annotation_list
+        self.gallery_index.set_annotations(annotation_list)
+
+    def append_dataset_annotations(self, annotation_list: list[FAnnotationItem]):
+        # Добавление пачки аннотаций в конец галереи без сброса прокрутки, выделения и созданных виджетов
+        self.gallery_index.append_annotations(annotation_list)
+        if not self.gallery_index.image_filter:
+            return
+        self.update_scene_rect()
+        self.update_visibility()
 
     def delete_widget_from_cache(self):
+        # Миниатюра остается в кэше изображений и будет установлена при повторном создании виджета
         index, item = self.widget_cache.popitem(last=False)
         self.scene.removeItem(item)
-        self.signal_deleted_from_cache.emit(index)
 
     def is_widget_selected_by_id(self, index: int) -> bool:
         return index in self.set_selected
@@ -386,9 +462,10 @@ class UImageGallery(QGraphicsView):
         for key, item in self.widget_cache.items():
             self.scene.removeItem(item)
         self.widget_cache.clear()
+        self.pixmap_cache.clear()
         self.set_selected.clear()
         self.signal_clear_viewport.emit()
-        self.filtered_indexes.clear()
+        self.gallery_index.clear_filter()
         self.update_scene_rect()
 
     def resizeEvent(self, event):
@@ -399,11 +476,23 @@ class UImageGallery(QGraphicsView):
 
     def wheelEvent(self, event):
         super().wheelEvent(event)
-        self.update_visibility()
+        self.request_visibility_update()
 
     def scrollContentsBy(self, dx, dy):
         super().scrollContentsBy(dx, dy)
-        self.update_visibility()
+        self.request_visibility_update()
+
+    def shutdown(self):
+        self.signal_clear_viewport.emit()
+        self.loader_thread.quit()
+        self.loader_thread.wait()
+        self.image_loader.pool.shutdown()
+
+    def set_thumbnail_cache(self, thumbnail_cache: UThumbnailCache | None):
+        self.thumbnail_cache = thumbnail_cache
+
+    def set_pixmap_cache_budget(self, budget_mb: float):
+        self.pixmap_cache.set_budget_mb(budget_mb)
 
     def set_cell_size(self, cell_size: int):
         self.cell_size = cell_size
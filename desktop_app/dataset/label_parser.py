@@ -0,0 +1,68 @@
+import os
+
+from supporting.image_size import get_image_size
+
+# Модуль выполняется в рабочих процессах загрузчика, поэтому не должен импортировать PyQt5 и project
+
+# Тип файла аннотаций
+LABEL_BOX = 0
+LABEL_POLYGON = 1
+
+
+def read_image_resolution(image_path: str, image_stat: os.stat_result = None) -> tuple[int, int]:
+    return get_image_size(image_path, image_stat)
+
+
+def parse_label_file(label_path: str, image_path: str, label_kind: int, image_stat: os.stat_result = None):
+    """
+    Разбирает файл аннотаций YOLO и возвращает компактный результат:
+    (путь к изображению, тип аннотаций, разрешение, строки, ошибка).
+    Строки ограничительных рамок: (x, y, ширина, высота, id объекта, id класса).
+    Строки полигонов: (кортеж точек, id объекта, id класса).
+    Если строки равны пустому списку, то изображение добавляется без аннотаций
+    """
+    try:
+        width_res, height_res = read_image_resolution(image_path, image_stat)
+        rows = list()
+        line_count = 1
+        with open(label_path, "r") as file:
+            if label_kind == LABEL_BOX:
+                for line in file:
+                    values = line.strip().split()
+                    if len(values) != 5:
+                        continue
+
+                    id_class = int(values[0])
+                    x = max(0, min(int(float(values[1]) * width_res), width_res))
+                    y = max(0, min(int(float(values[2]) * height_res), height_res))
+                    width = int(float(values[3]) * width_res)
+                    height = int(float(values[4]) * height_res)
+
+                    rows.append((int(x - width // 2), int(y - height // 2), width, height, line_count, id_class))
+                    line_count += 1
+            elif label_kind == LABEL_POLYGON:
+                for line in file:
+                    values = line.strip().split()
+                    if len(values) < 7 or len(values) % 2 == 0:
+                        continue
+
+                    id_class = int(values[0])
+                    points = tuple(
+                        (int(float(values[i]) * width_res), int(float(values[i + 1]) * height_res))
+                        for i in range(1, len(values), 2)
+                    )
+                    rows.append((points, line_count, id_class))
+            else:
+                return image_path, label_kind, None, None, "Error"
+
+        return image_path, label_kind, (width_res, height_res), rows, None
+
+    except Exception as error:
+        if os.path.exists(image_path):
+            return image_path, label_kind, None, [], None
+        return image_path, label_kind, None, None, str(error)
+
+
+def parse_label_chunk(tasks: list[tuple]):
+    # Единица работы для пула процессов: список (путь к аннотации, путь к изображению, тип аннотаций[, stat изображения])
+    return [parse_label_file(*task) for task in tasks]
@@ -0,0 +1,113 @@
+import os
+import threading
+
+# Модуль не зависит от PyQt5 и project, запись идет в обычном потоке Python
+
+
+def write_label_file(label_path: str, lines: list[str]):
+    # Запись через временный файл в той же папке и os.replace: файл аннотаций никогда не остается записанным наполовину
+    temp_path = f"{label_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, "w") as label_file:
+            label_file.writelines(lines)
+        os.replace(temp_path, label_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def write_label_files(label_files: dict[str, list[str]], created_dirs: set[str] | None = None):
+    # Папки создаются один раз на весь набор файлов
+    created_dirs = set() if created_dirs is None else created_dirs
+    for label_path, lines in label_files.items():
+        label_dir = os.path.dirname(label_path)
+        if label_dir not in created_dirs:
+            os.makedirs(label_dir, exist_ok=True)
+            created_dirs.add(label_dir)
+        write_label_file(label_path, lines)
+
+
+class ULabelWriter:
+    # Фоновая запись файлов аннотаций. Повторная запись в файл, который еще ждет очереди,
+    # заменяет ожидающее содержимое, поэтому каждый файл записывается один раз
+    def __init__(self, max_pending: int = 1024):
+        self.max_pending = max_pending
+        self.errors: list[str] = list()
+        self.written = 0
+
+        self._pending: dict[str, list[str]] = dict()
+        self._created_dirs: set[str] = set()
+        self._condition = threading.Condition()
+        self._in_progress = 0
+        self._closed = False
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="label-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, label_files: dict[str, list[str]]):
+        if self._thread is None:
+            self.start()
+        with self._condition:
+            for label_path, lines in label_files.items():
+                # Ограничение очереди, чтобы не держать в памяти все строки при долгой записи на диск
+                # Поток записи будится до ожидания, иначе набор больше max_pending никогда не освободит очередь
+                while len(self._pending) >= self.max_pending and label_path not in self._pending:
+                    self._condition.notify_all()
+                    self._condition.wait()
+                self._pending[label_path] = lines
+            self._condition.notify_all()
+
+    def flush(self):
+        with self._condition:
+            while self._pending or self._in_progress:
+                self._condition.wait()
+
+    def close(self) -> list[str]:
+        if self._thread is None:
+            return self.errors
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._thread = None
+        return self.errors
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _take_batch(self) -> dict[str, list[str]] | None:
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            if not self._pending:
+                return None
+            batch = self._pending
+            self._pending = dict()
+            self._in_progress = len(batch)
+            self._condition.notify_all()
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            for label_path, lines in batch.items():
+                try:
+                    write_label_files({label_path: lines}, self._created_dirs)
+                    self.written += 1
+                except Exception as error:
+                    self.errors.append(f"{label_path}: {error}")
+            with self._condition:
+                self._in_progress = 0
+                self._condition.notify_all()
@@ -1,3 +1,5 @@
+from typing import Callable, Optional
+
 from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtWidgets import QWidget, QListWidget, QListWidgetItem
 
@@ -6,22 +8,35 @@ from utility import FAnnotationItem
 
 
 class UItemDataset(QWidget, Ui_widget_dataset_item):
-    def __init__(self, name: str, annotations: dict[str, list[FAnnotationItem]], parent = None):
+    def __init__(
+            self,
+            name: str,
+            annotations: dict[str, list[FAnnotationItem]],
+            counter: Optional[Callable[[], int]] = None,
+            parent = None
+    ):
         super().__init__(parent)
         self.setupUi(self)
 
         self.name = name
-        self.count = sum(len(ann) for ann in annotations.values())
+        self.annotations = annotations
+        # Подсчет аннотаций для незагруженных датасетов (при ленивой загрузке проекта)
+        self.counter = counter
+        self.count = self.get_count()
         self.label_name.setText(name)
         self.label_count.setText(f"Аннотаций: {self.count}")
-        self.annotations = annotations
 
     def update(self):
         super().update()
-        self.count = sum(len(ann) for ann in self.annotations.values())
+        self.count = self.get_count()
         self.label_name.setText(self.name)
         self.label_count.setText(f"Аннотаций: {self.count}")
 
+    def get_count(self):
+        if self.counter:
+            return self.counter()
+        return sum(len(ann) for ann in self.annotations.values())
+
     def get_dataset_name(self):
         return self.name
 
@@ -50,7 +65,7 @@ class UListDataset(QListWidget):
     def update_all_items(self):
         for i in range(self.count()):
             widget = self.itemWidget(self.item(i))
-            if widget and isinstance(widget, UListDataset):
+            if widget and isinstance(widget, UItemDataset):
                 widget.update()
 
     def get_selected_item(self) -> tuple[int, str]:
@@ -1,14 +1,19 @@
 import os
 import shutil
-from typing import Optional
-import imageio.v3 as iio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Callable
 
-from PyQt5.QtCore import QThread, pyqtSignal, Qt, QTimer, QRectF
+from PyQt5.QtCore import QThread, pyqtSignal, Qt, QTimer, QRectF, QObject
 from PyQt5.QtGui import QPainter, QColor, QPixmap
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QProgressBar
 
+from dataset.annotation_index import UAnnotationIndex
+from dataset.dataset_scan import FDatasetScan, scan_dataset
+from dataset.file_placement import UFilePlacer
+from dataset.label_parser import LABEL_BOX, LABEL_POLYGON, parse_label_chunk, parse_label_file
 from project import UTrainProject, DATASETS, RESERVED, LABELS_SEGM, LABELS, IMAGES
-from utility import FAnnotationItem, FAnnotationData, FDetectAnnotationData, FPolygonAnnotationData
+from supporting.error_text import UErrorsText
+from utility import FAnnotationItem, UMessageBox
 
 
 class UOverlayLoader(QWidget):
@@ -87,6 +92,8 @@ class UThreadDatasetCopy(QThread):
         self.project = project
         self.source_dataset_path = source_dataset_path
         self.target_copy_type = target_copy_type
+        # Изображения размещаются жесткими ссылками или reflink, если файловая система это позволяет
+        self.file_placer = project.get_file_placer()
 
     def run(self):
         try:
@@ -103,7 +110,9 @@ class UThreadDatasetCopy(QThread):
 
             self.go_folder(path_to_labels, labels_path_new, ".txt")
 
-            self.go_folder(path_to_images, images_path_new, (".png", ".jpg", ".jpeg"))
+            self.go_folder(path_to_images, images_path_new, (".png", ".jpg", ".jpeg"), self.file_placer)
+            self.file_placer.flush()
+            print(f"Размещение изображений датасета {os.path.basename(self.source_dataset_path)}: {self.file_placer.stats}")
 
             self.signal_on_ended.emit(os.path.basename(self.source_dataset_path))
 
@@ -111,14 +120,21 @@ class UThreadDatasetCopy(QThread):
             self.signal_on_error.emit(str(error))
             return
 
-    def go_folder(self, path_to_folder: str, new_path: str, extensions: str | tuple[str, ...]):
+    def go_folder(
+            self,
+            path_to_folder: str,
+            new_path: str,
+            extensions: str | tuple[str, ...],
+            file_placer: UFilePlacer | None = None
+    ):
         current, percentage = 1, 1
         folder_to_copy = [file for file in os.listdir(path_to_folder) if file.endswith(extensions)]
         for label in folder_to_copy:
-            shutil.copy2(
-                os.path.join(path_to_folder, label).replace('\\', '/'),
-                new_path
-            )
+            source_path = os.path.join(path_to_folder, label).replace('\\', '/')
+            if file_placer is not None:
+                file_placer.place(source_path, new_path)
+            else:
+                shutil.copy2(source_path, new_path)
             t_p = int(float(current) / len(folder_to_copy) * 100)
             if t_p > percentage:
                 self.signal_on_copy.emit(label, current, len(folder_to_copy))
@@ -131,12 +147,39 @@ class UThreadDatasetLoadAnnotations(QThread):
     signal_end_load = pyqtSignal(list)
     signal_error = pyqtSignal(str, str)
     signal_warning = pyqtSignal(str)
-
-    def __init__(self, project: UTrainProject, input_datasets: list[str] = None):
+    # Название датасета, тип датасета, пачка загруженных FAnnotationItem
+    signal_loaded_batch = pyqtSignal(str, str, list)
+    # Без apply_in_thread: пачка разобранных аннотаций и окончание датасета, в проект их добавляет получатель
+    signal_parsed_batch = pyqtSignal(str, str, list)
+    signal_dataset_loaded = pyqtSignal(str, str)
+
+    def __init__(
+            self,
+            project: UTrainProject,
+            input_datasets: list[str] = None,
+            dataset_type: str = DATASETS,
+            workers: int | None = None,
+            chunk_size: int = 256,
+            use_index: bool = True,
+            apply_in_thread: bool = True
+    ):
         super().__init__()
 
         self.project = project
         self.input_datasets = input_datasets
+        # Тип датасетов из input_datasets. Если input_datasets не указан, загружаются все датасеты и резерв
+        self.dataset_type = dataset_type
+
+        # Количество рабочих процессов для разбора файлов аннотаций. При значении 1 разбор идет в текущем потоке
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        # Количество файлов аннотаций, передаваемых в рабочий процесс за один раз
+        self.chunk_size = max(1, chunk_size)
+        self.pool: Optional[ProcessPoolExecutor] = None
+        # Использование индекса аннотаций в папке датасета, чтобы не разбирать неизмененные файлы повторно
+        self.use_index = use_index
+        # Добавление аннотаций в проект в этом потоке. Если галерея открыта во время загрузки, аннотации
+        # добавляются в главном потоке по signal_parsed_batch, чтобы таблицы не менялись во время фильтрации
+        self.apply_in_thread = apply_in_thread
 
         self.count_datasets = 0
         self.current_dataset = 0
@@ -144,7 +187,22 @@ class UThreadDatasetLoadAnnotations(QThread):
         self.labels_count = 0
         self.current_labels = 0
 
+        # Результаты сканирования папок: пары файлов, аннотации без изображений и изображения без аннотаций
+        self.scan_reports: dict[tuple[str, str], FDatasetScan] = dict()
+        # (датасет, тип), загрузка которого прервана через requestInterruption. Его аннотации загружены не полностью
+        self.interrupted_dataset: Optional[tuple[str, str]] = None
+        # (тип, датасет) -> (аннотаций из индекса, разобрано заново)
+        self.index_stats: dict[tuple[str, str], tuple[int, int]] = dict()
+
     def run(self):
+        try:
+            self.load_annotations()
+        finally:
+            if self.pool:
+                self.pool.shutdown(cancel_futures=True)
+                self.pool = None
+
+    def load_annotations(self):
         is_run_reserved = False
         if self.input_datasets is None:
             self.input_datasets = self.project.get_datasets()
@@ -157,147 +215,336 @@ class UThreadDatasetLoadAnnotations(QThread):
                 return
 
         self.current_dataset = 1
-        self.process_dataset_list(self.input_datasets, DATASETS)
+        self.process_dataset_list(self.input_datasets, DATASETS if is_run_reserved else self.dataset_type)
 
-        if is_run_reserved:
+        if is_run_reserved and not self.isInterruptionRequested():
             self.process_dataset_list(self.project.get_reserved(), RESERVED)
 
+        if self.isInterruptionRequested():
+            return
         self.signal_end_load.emit(self.input_datasets)
 
     def process_dataset_list(self, dataset_list: list[str], type_dataset: str):
         count_datasets = len(dataset_list)
         for dataset in dataset_list:
+            if self.isInterruptionRequested():
+                return
             if not((dataset in self.project.datasets) or (dataset in self.project.reserved)):
                 self.signal_warning.emit(f"Warning в UThreadDatasetLoadAnnotations.load_annotations!"
                                     f"Датасет отсутствует {dataset} в проекте!")
                 continue
+            if self.project.is_dataset_loaded(dataset, type_dataset):
+                continue
+
+            # Один проход по папкам датасета: сопоставление файлов аннотаций с изображениями
+            dataset_path = str(os.path.join(self.project.path, type_dataset, dataset).replace('\\', '/'))
+            scan = scan_dataset(
+                dataset_path,
+                IMAGES,
+                [(LABELS, LABEL_BOX), (LABELS_SEGM, LABEL_POLYGON)],
+                self.project.image_extensions
+            )
+            self.scan_reports[(type_dataset, dataset)] = scan
 
-            # Получение списка файлов аннотаций
-            image_path = str(os.path.join(self.project.path, type_dataset, dataset, IMAGES).replace('\\', '/'))
-            label_types = [LABELS, LABELS_SEGM]
-            label_files = []
-            for label_type in label_types:
-                label_path = str(os.path.join(self.project.path, type_dataset, dataset, label_type).replace('\\', '/'))
-                if os.path.isdir(label_path):
-                    label_files += [os.path.join(label_path, file).strip().replace('\\', '/')
-                                    for file in os.listdir(label_path) if file.endswith(".txt")
-                                    ]
-
-            self.labels_count = len(label_files)
+            # Аннотации без изображений не разбираются, поэтому в прогрессе не учитываются
+            self.labels_count = len(scan.pairs)
             if self.labels_count == 0:
                 self.signal_warning.emit(f"Warning в UThreadDatasetLoadAnnotations.load_annotations!"
                                          f"В датасете {dataset} отсутствуют аннотации!")
+                self.set_dataset_loaded(dataset, type_dataset)
                 continue
             self.signal_start_dataset.emit(dataset, self.current_dataset, count_datasets)
 
-            current_labels = 1
-            for label in label_files:
-                image_name = os.path.splitext(os.path.basename(label))[0]
-                image_file = None
-
-                for ext in self.project.image_extensions:
-                    candidate = os.path.join(image_path, image_name + ext).strip().replace('\\', '/')
-                    if os.path.exists(candidate):
-                        image_file = candidate
-                        break
-
-                if image_file is None:
-                    print(f"Не найдено изображение для {label}")
-                    continue
-
-                error = self.read_annotation(
-                    dataset,
-                    type_dataset,
-                    label.strip().replace('\\', '/'),
-                    image_file.strip().replace('\\', '/'),
-                )
-                if error:
-                    self.signal_error.emit(dataset,
-                                           f"Ошибка в UThreadDatasetLoadAnnotations.load_annotations! {error}")
-                    return
-
-                self.signal_loaded_label.emit(image_name, current_labels, self.labels_count)
-                current_labels += 1
+            tasks = [(label, image, label_kind, image_stat) for label, _, image, image_stat, label_kind in scan.pairs]
+            stats = [(label_stat, image_stat) for _, label_stat, _, image_stat, _ in scan.pairs]
+            error = self.process_tasks(dataset, type_dataset, dataset_path, tasks, stats)
+            if error:
+                self.signal_error.emit(dataset, f"Ошибка в UThreadDatasetLoadAnnotations.load_annotations! {error}")
+                return
+            if self.interrupted_dataset:
+                return
 
+            self.set_dataset_loaded(dataset, type_dataset)
             self.current_dataset += 1
 
-    def read_annotation(self, dataset: str, type_dataset: str, filename: str, image_path: str):
+    def set_dataset_loaded(self, dataset: str, type_dataset: str):
+        if self.apply_in_thread:
+            self.project.set_dataset_loaded(dataset, type_dataset)
+        else:
+            self.signal_dataset_loaded.emit(dataset, type_dataset)
+
+    def process_tasks(
+            self,
+            dataset: str,
+            type_dataset: str,
+            dataset_path: str,
+            tasks: list[tuple[str, str, int, os.stat_result]],
+            stats: list[tuple[os.stat_result, os.stat_result]]
+    ):
+        # Неизмененные файлы берутся из индекса, остальные разбираются заново
+        index = UAnnotationIndex(dataset_path) if self.use_index else None
+        if index and index.open():
+            index = None
+
+        cached_list = [
+            index.get(label_path, stat[0], image_file, stat[1]) if index and stat else None
+            for (label_path, image_file, *_), stat in zip(tasks, stats)
+        ]
+        missing_tasks = [task for task, cached in zip(tasks, cached_list) if cached is None]
+        parsed_iterator = (parsed for parsed_chunk in self._parse_chunks(missing_tasks) for parsed in parsed_chunk)
+
         try:
-            image_data = iio.immeta(image_path)
-            width_res, height_res = image_data["shape"]
-            with open(filename, "r") as file:
-                ann_list: list[FAnnotationData] = list()
-                line_count = 1
-
-                folder_name = os.path.basename(os.path.dirname(filename))
-                if folder_name == LABELS:
-                    for line in file:
-                        values = line.strip().split()
-                        if len(values) != 5:
-                            continue
-
-                        id_class = int(values[0])
-                        x = max(0, min(int(float(values[1]) * width_res), width_res))
-                        y = max(0, min(int(float(values[2]) * height_res), height_res))
-                        width = int(float(values[3]) * width_res)
-                        height = int(float(values[4]) * height_res)
-                        color = self.project.classes.get_color(id_class)
-                        class_name = self.project.classes.get_name(id_class)
-
-                        ann_list.append(
-                            FDetectAnnotationData(
-                                int(x - width // 2),
-                                int(y - height // 2),
-                                width,
-                                height,
-                                line_count,
-                                id_class,
-                                class_name,
-                                color,
-                                width_res,
-                                height_res
-                            )
-                        )
-                        line_count += 1
-                elif folder_name == LABELS_SEGM:
-                    for line in file:
-                        values = line.strip().split()
-                        if len(values) < 7 or len(values) % 2 == 0:
-                            continue
-
-                        point_list: list[tuple[float, float]] = list()
-                        id_class = int(values[0])
-                        color = self.project.classes.get_color(id_class)
-                        class_name = self.project.classes.get_name(id_class)
-                        for i in range(1, len(values), 2):
-                            x = int(float(values[i]) * width_res)
-                            y = int(float(values[i + 1]) * height_res)
-                            point_list.append((x, y))
-
-                        ann_list.append(FPolygonAnnotationData(
-                            point_list,
-                            line_count,
-                            id_class,
-                            class_name,
-                            color,
-                            width_res,
-                            height_res
-                        ))
+            current_labels = 0
+            # Пачка загруженных аннотаций, передаваемая в галерею до окончания загрузки датасета.
+            # Без apply_in_thread в пачке разобранные аннотации в формате parse_label_chunk
+            batch: list = list()
+            for task, stat, cached in zip(tasks, stats, cached_list):
+                label_path, image_file, label_kind, _ = task
+                if cached is None:
+                    parsed = next(parsed_iterator)
+                    image_file, label_kind, resolution, rows, error = parsed
+                    if index and stat and not error and resolution is not None:
+                        index.put(label_path, stat[0], image_file, stat[1], label_kind, resolution, rows)
                 else:
-                    return "Error"
-                ann_item = FAnnotationItem(ann_list, image_path, dataset)
-                error = self.project.add_annotation(dataset, ann_item, type_dataset)
-                if error:
-                    return error
+                    resolution, rows = cached
+                    parsed = (image_file, label_kind, resolution, rows, None)
+
+                if self.apply_in_thread:
+                    error = self.add_parsed_annotation(dataset, type_dataset, parsed, batch)
+                    if error:
+                        return error
+                elif parsed[-1]:
+                    return parsed[-1]
+                else:
+                    batch.append(parsed)
+
+                current_labels += 1
+                if current_labels % self.chunk_size == 0 or current_labels == len(tasks):
+                    image_name = os.path.splitext(os.path.basename(image_file))[0]
+                    self.signal_loaded_label.emit(image_name, current_labels, self.labels_count)
+                    if batch:
+                        signal_batch = self.signal_loaded_batch if self.apply_in_thread else self.signal_parsed_batch
+                        signal_batch.emit(dataset, type_dataset, batch)
+                        batch = list()
+                    if self.isInterruptionRequested() and current_labels < len(tasks):
+                        self.interrupted_dataset = (dataset, type_dataset)
+                        return
+        finally:
+            if index:
+                index.commit()
+                self.index_stats[(type_dataset, dataset)] = (index.hits, index.misses)
+                index.close()
+
+    def _parse_chunks(self, tasks: list[tuple[str, str, int, os.stat_result]]):
+        chunks = [tasks[i:i + self.chunk_size] for i in range(0, len(tasks), self.chunk_size)]
+        # Для небольших датасетов запуск процессов дороже самого разбора
+        if self.workers <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                yield parse_label_chunk(chunk)
+            return
+
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        yield from self.pool.map(parse_label_chunk, chunks)
+
+    def add_parsed_annotation(
+            self,
+            dataset: str,
+            type_dataset: str,
+            parsed: tuple,
+            batch: Optional[list[FAnnotationItem]] = None
+    ):
+        image_path, label_kind, resolution, rows, error = parsed
+        if error:
+            return error
+
+        # Аннотации записываются в колоночную таблицу датасета без создания объекта на каждую аннотацию
+        table = self.project.get_annotation_table(dataset, type_dataset)
+        if table is None:
+            return UErrorsText.not_existing_dataset_in_project("UThreadDatasetLoadAnnotations.add_parsed_annotation", dataset)
+        ann_item = table.add_parsed_item(image_path, dataset, label_kind, resolution, rows)
+        error = self.project.add_annotation(dataset, ann_item, type_dataset)
+        if not error and batch is not None:
+            batch.append(ann_item)
+        return error
+
+    def read_annotation(self, dataset: str, type_dataset: str, filename: str, image_path: str):
+        folder_name = os.path.basename(os.path.dirname(filename))
+        label_kind = LABEL_POLYGON if folder_name == LABELS_SEGM else LABEL_BOX if folder_name == LABELS else -1
+        return self.add_parsed_annotation(dataset, type_dataset, parse_label_file(filename, image_path, label_kind))
+
+
+
+class FLoadRequest:
+    # Запрос загрузки датасетов в очереди UDatasetLazyLoader
+    def __init__(
+            self,
+            datasets: list[str],
+            dataset_type: str,
+            unloaded: list[str],
+            on_loaded: Callable[[], None],
+            on_batch: Optional[Callable[[str, str, list], None]],
+            on_error: Optional[Callable[[], None]],
+            overlay_parent: QWidget
+    ):
+        self.datasets = datasets
+        self.dataset_type = dataset_type
+        # Датасеты, не загруженные на момент запроса
+        self.unloaded = unloaded
+        self.on_loaded = on_loaded
+        self.on_batch = on_batch
+        self.on_error = on_error
+        self.overlay_parent = overlay_parent
+
+
+class UDatasetLazyLoader(QObject):
+    """
+    Загрузка аннотаций датасетов по требованию (при ленивой загрузке проекта).
+    Если датасеты уже загружены, продолжение вызывается сразу, иначе после загрузки.
+    Один загрузчик на все страницы: запрос, пришедший во время загрузки, ждет ее окончания в очереди,
+    поэтому один датасет никогда не загружается двумя потоками
+    """
+    def __init__(self, project: UTrainProject, overlay_parent: QWidget):
+        super().__init__(overlay_parent)
+
+        self.project = project
+        self.overlay_parent = overlay_parent
+
+        self.overlay: Optional[UOverlayLoader] = None
+        self.thread_load: Optional[UThreadDatasetLoadAnnotations] = None
+        # Выполняемый и ожидающие запросы загрузки
+        self.current_request: Optional[FLoadRequest] = None
+        self.requests: list[FLoadRequest] = list()
+
+    def is_running(self):
+        # Загрузка идет, пока ее окончание не обработано главным потоком, даже если поток уже завершился
+        return self.thread_load is not None
+
+    def cancel(self) -> bool:
+        """
+        Прерывание фоновой загрузки (с on_batch), например при выборе другого датасета.
+        Полностью загруженные датасеты остаются в памяти, частично загруженный выгружается.
+        Загрузку с оверлеем прервать нельзя, тогда возвращается False.
+        Ожидающие запросы других страниц не отменяются и запускаются после возврата в цикл событий
+        """
+        if not self.is_running():
+            return True
+        if self.overlay:
+            return False
+        self._stop_thread()
+        self.current_request = None
+        QTimer.singleShot(0, self._start_next)
+        return True
+
+    def ensure_loaded(
+            self,
+            datasets: list[str],
+            dataset_type: str,
+            on_loaded: Callable[[], None],
+            on_batch: Optional[Callable[[str, str, list], None]] = None,
+            on_error: Optional[Callable[[], None]] = None,
+            overlay_parent: Optional[QWidget] = None
+    ):
+        """
+        Если передан on_batch, загрузка идет в фоне без оверлея,
+        а загруженные аннотации передаются в on_batch пачками по мере разбора.
+        on_error вызывается вместо on_loaded, если загрузка завершилась ошибкой
+        """
+        unloaded = self.project.get_unloaded_datasets(datasets, dataset_type)
+        if not unloaded:
+            self.project.touch_datasets(datasets, dataset_type)
+            on_loaded()
+            return
+        self.requests.append(FLoadRequest(
+            datasets, dataset_type, unloaded, on_loaded, on_batch, on_error, overlay_parent or self.overlay_parent
+        ))
+        self._start_next()
+
+    def _start_next(self):
+        while self.requests and not self.is_running():
+            request = self.requests.pop(0)
+            unloaded = self.project.get_unloaded_datasets(request.datasets, request.dataset_type)
+            # Датасеты, загруженные другим запросом, пока этот ждал в очереди, передаются одной пачкой
+            if request.on_batch:
+                for dataset in request.unloaded:
+                    ann_list = self.project.get_dataset_annotations(dataset, request.dataset_type)
+                    if dataset not in unloaded and ann_list:
+                        request.on_batch(dataset, request.dataset_type, list(ann_list))
+            if not unloaded:
+                self.project.touch_datasets(request.datasets, request.dataset_type)
+                request.on_loaded()
+                continue
+            self.current_request = request
+            self._start_thread(request, unloaded)
+
+    def _start_thread(self, request: FLoadRequest, unloaded: list[str]):
+        # Аннотации добавляются в проект в главном потоке: страницы читают таблицы и списки во время загрузки
+        thread = self.thread_load = UThreadDatasetLoadAnnotations(
+            self.project, unloaded, request.dataset_type, apply_in_thread=False
+        )
+        # Сигналы прерванного потока, которые уже стоят в очереди, пропускаются
+        thread.signal_parsed_batch.connect(lambda *args: self._on_parsed_batch(thread, request.on_batch, *args))
+        thread.signal_dataset_loaded.connect(
+            lambda *args: self.project.set_dataset_loaded(*args) if thread is self.thread_load else None
+        )
+        if not request.on_batch:
+            self.overlay = UOverlayLoader(request.overlay_parent)
+            thread.signal_start_dataset.connect(self.overlay.update_label_dataset)
+            thread.signal_loaded_label.connect(self.overlay.update_progress)
+        thread.signal_end_load.connect(lambda _: self._on_end_load() if thread is self.thread_load else None)
+        thread.signal_error.connect(
+            lambda *args: self._on_error_load(*args) if thread is self.thread_load else None
+        )
+        thread.signal_warning.connect(
+            lambda warning: UMessageBox.show_warning(warning) if thread is self.thread_load else None
+        )
+
+        thread.start()
+
+    def _stop_thread(self):
+        thread = self.thread_load
+        self.thread_load = None
+        thread.requestInterruption()
+        thread.wait()
+        # Пачки, еще стоящие в очереди сигналов, пропускаются, поэтому выгружается каждый датасет,
+        # окончание загрузки которого не дошло до главного потока
+        for dataset in thread.input_datasets:
+            if not self.project.is_dataset_loaded(dataset, thread.dataset_type):
+                self.project.discard_dataset_annotations(dataset, thread.dataset_type)
+
+    def _on_parsed_batch(
+            self,
+            thread: UThreadDatasetLoadAnnotations,
+            on_batch: Optional[Callable[[str, str, list], None]],
+            dataset: str,
+            dataset_type: str,
+            parsed_list: list[tuple]
+    ):
+        if thread is not self.thread_load:
+            return
+        batch: list[FAnnotationItem] = list()
+        for parsed in parsed_list:
+            error = thread.add_parsed_annotation(dataset, dataset_type, parsed, batch)
+            if error:
+                self._on_error_load(dataset, f"Ошибка в UDatasetLazyLoader.ensure_loaded! {error}")
+                return
+        if on_batch:
+            on_batch(dataset, dataset_type, batch)
+
+    def _on_end_load(self):
+        request, self.current_request = self.current_request, None
+        self.thread_load = None
+        self.overlay = UOverlayLoader.delete_overlay(self.overlay)
+        self.project.touch_datasets(request.datasets, request.dataset_type)
+        request.on_loaded()
+        self._start_next()
+
+    def _on_error_load(self, dataset: str, error: str):
+        request, self.current_request = self.current_request, None
+        self._stop_thread()
+        self.overlay = UOverlayLoader.delete_overlay(self.overlay)
+        UMessageBox.show_error(error)
+        if request.on_error:
+            request.on_error()
+        self._start_next()
 
-        except Exception as error:
-            if os.path.exists(image_path):
-                error = self.project.add_annotation(
-                    dataset,
-                    FAnnotationItem([], image_path, dataset),
-                    type_dataset
-                )
-                if error:
-                    return error
-            else:
-                return f"{str(error)}"
\ No newline at end of file
@@ -11,11 +11,15 @@ from sympy.codegen.ast import continue_
 from coco_project.coco_json import convert_to_coco, build_coco_json, save_coco_json
 from commander import UGlobalSignalHolder, ECommanderStatus
 from design.dataset_page import Ui_page_dataset
+from dataset.gallery_view import UVirtualImageGallery
+from dataset.image_gallery import UImageGallery
 from dataset.list_datasets import UItemDataset, UListDataset
-from dataset.loader import UOverlayLoader, UThreadDatasetLoadAnnotations, UThreadDatasetCopy
+from dataset.loader import UOverlayLoader, UThreadDatasetLoadAnnotations, UThreadDatasetCopy, UDatasetLazyLoader
+from dataset.pixmap_cache import FCacheStats
+from dataset.thumbnail_cache import UThumbnailCache, UThreadThumbnailPregenerate, THUMBNAILS
 from design.dialog_export import Ui_dialog_export
-from project import UTrainProject, RESERVED, DATASETS
-from supporting.custom_threads import UProgressThread
+from project import UTrainProject, RESERVED, DATASETS, GALLERY_VIRTUAL
+from supporting.custom_threads import UProgressThread, UBatchProgressThread
 from utility import UMessageBox, FAnnotationItem, FAnnotationClasses, EAnnotationType
 
 DATASET_ALL = "All Annotations"
@@ -85,7 +89,7 @@ class UDialogExport(QDialog, Ui_dialog_export):
 
 
 class UPageDataset(QWidget, Ui_page_dataset):
-    def __init__(self, commander: UGlobalSignalHolder, project: UTrainProject):
+    def __init__(self, commander: UGlobalSignalHolder, project: UTrainProject, lazy_loader: UDatasetLazyLoader):
         super().__init__()
         self.setupUi(self)
 
@@ -102,6 +106,13 @@ class UPageDataset(QWidget, Ui_page_dataset):
         self.thread_copy: Optional[UThreadDatasetCopy] = None
 
         self.thread_custom: Optional[UProgressThread] = None
+        # Фоновое создание миниатюр для изображений галереи
+        self.thread_thumbnails: Optional[UThreadThumbnailPregenerate] = None
+
+        # Загрузка аннотаций датасетов по требованию, общая для всех страниц
+        self.lazy_loader = lazy_loader
+        # Тип и названия датасетов, отображаемых в галерее
+        self.gallery_datasets: tuple[str, set[str]] = (DATASETS, set())
 
         # Привязка к кнопкам
         self.button_add_dataset.clicked.connect(self.add_dataset)
@@ -114,8 +125,12 @@ class UPageDataset(QWidget, Ui_page_dataset):
 
         self.button_to_coco.clicked.connect(self.handle_on_click_to_coco)
 
-        self.list_datasets.signal_on_item_clicked.connect(self.move_annotations_to_gallery)
-        self.list_reserved.signal_on_item_clicked.connect(self.move_annotations_to_gallery)
+        self.list_datasets.signal_on_item_clicked.connect(
+            lambda dataset, annotations: self.load_dataset_to_gallery(dataset, annotations, DATASETS)
+        )
+        self.list_reserved.signal_on_item_clicked.connect(
+            lambda dataset, annotations: self.load_dataset_to_gallery(dataset, annotations, RESERVED)
+        )
 
         self.button_move_dataset_to_reserved.clicked.connect(
             lambda: self.move_selected_dataset(self.list_datasets, self.project.get_datasets(), DATASETS, RESERVED)
@@ -144,6 +159,9 @@ class UPageDataset(QWidget, Ui_page_dataset):
 
     @pyqtSlot()
     def update_dataset_page(self):
+        self.update_gallery_mode()
+        self.view_gallery.set_pixmap_cache_budget(self.project.gallery_cache_mb)
+        self.update_thumbnail_cache()
         self.create_list_dataset()
         self.create_list_reserved()
         self.fill_filter_list()
@@ -159,14 +177,100 @@ class UPageDataset(QWidget, Ui_page_dataset):
         if isinstance(self.parent(), QStackedWidget):
             self.parent().setCurrentIndex(page_index)
 
+    def load_dataset_to_gallery(self, dataset: str, annotations: dict[str, list[FAnnotationItem]], dataset_type: str):
+        # Загрузка прежде выбранного датасета в галерею прерывается
+        if not self.lazy_loader.cancel():
+            UMessageBox.show_error("Невозможно открыть датасет. Уже идет загрузка датасетов!")
+            return
+        datasets = list(annotations.keys()) if dataset == DATASET_ALL else [dataset]
+        # Сразу отображаются уже загруженные датасеты, остальные добавляются в галерею по мере загрузки
+        self.gallery_datasets = (dataset_type, set(datasets))
+        self.move_annotations_to_gallery(dataset, {
+            name: ann_list for name, ann_list in annotations.items()
+            if self.project.is_dataset_loaded(name, dataset_type)
+        })
+        self.lazy_loader.ensure_loaded(
+            datasets,
+            dataset_type,
+            self.end_load_dataset_to_gallery,
+            self.handle_on_loaded_batch
+        )
+
+    @pyqtSlot(str, str, list)
+    def handle_on_loaded_batch(self, dataset: str, dataset_type: str, batch: list[FAnnotationItem]):
+        gallery_type, gallery_datasets = self.gallery_datasets
+        if dataset_type != gallery_type or dataset not in gallery_datasets:
+            return
+        self.view_gallery.append_dataset_annotations(batch)
+
+    def end_load_dataset_to_gallery(self):
+        self.list_datasets.update_all_items()
+        self.list_reserved.update_all_items()
+        self.start_thumbnail_pregeneration()
+
+    def update_gallery_mode(self):
+        # Виртуальная галерея рисует ячейки делегатом и не создает элементов сцены, подходит для больших датасетов
+        is_virtual = self.project.gallery_mode == GALLERY_VIRTUAL
+        if is_virtual == isinstance(self.view_gallery, UVirtualImageGallery):
+            return
+        self.stop_thumbnail_pregeneration()
+        gallery = UVirtualImageGallery(self.dataset_display) if is_virtual else UImageGallery(self.dataset_display)
+        gallery.setMinimumSize(self.view_gallery.minimumSize())
+        gallery.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        gallery.setObjectName("view_gallery")
+        gallery.set_thumbnail_cache(self.view_gallery.thumbnail_cache)
+
+        self.verticalLayout_3.replaceWidget(self.view_gallery, gallery)
+        self.view_gallery.shutdown()
+        self.view_gallery.deleteLater()
+        self.view_gallery = gallery
+
+    def update_thumbnail_cache(self):
+        if not self.project.path:
+            return
+        cache_path = os.path.join(self.project.path, THUMBNAILS).replace('\\', '/')
+        thumbnail_cache = self.view_gallery.thumbnail_cache
+        if thumbnail_cache is None or thumbnail_cache.cache_path != cache_path:
+            self.stop_thumbnail_pregeneration()
+            self.view_gallery.set_thumbnail_cache(UThumbnailCache(cache_path, max_disk_mb=self.project.thumbnail_cache_mb))
+        else:
+            thumbnail_cache.max_disk_bytes = int(self.project.thumbnail_cache_mb * 2 ** 20)
+
+    def start_thumbnail_pregeneration(self):
+        # Миниатюры всех изображений галереи создаются заранее, чтобы прокрутка не ждала декодирования
+        thumbnail_cache = self.view_gallery.thumbnail_cache
+        if thumbnail_cache is None:
+            return
+        self.stop_thumbnail_pregeneration()
+        image_paths = [item.get_image_path() for item in self.view_gallery.annotation_data]
+        self.thread_thumbnails = UThreadThumbnailPregenerate(thumbnail_cache, image_paths, self.view_gallery.get_cell_size())
+        self.thread_thumbnails.signal_on_ended.connect(
+            lambda created: print(f"Создано миниатюр изображений: {created}") if created else None
+        )
+        self.thread_thumbnails.start(QThread.LowestPriority)
+
+    def stop_thumbnail_pregeneration(self):
+        if self.thread_thumbnails and self.thread_thumbnails.isRunning():
+            self.thread_thumbnails.requestInterruption()
+            self.thread_thumbnails.wait()
+
     def move_annotations_to_gallery(self, dataset: str, annotations: dict[str, list[FAnnotationItem]]):
         list_annotations: list[FAnnotationItem] = list()
         for key, list_a in annotations.items():
             list_annotations += list_a
+        self.report_gallery_cache()
         self.view_gallery.clear_scene()
         self.view_gallery.set_dataset_annotations(list_annotations)
         self.view_gallery.filter_images(self.filter_dict, self.type_list)
 
+    def report_gallery_cache(self):
+        # Статистика кэша изображений галереи за время просмотра прежнего датасета
+        pixmap_cache = self.view_gallery.pixmap_cache
+        if self.project.gallery_cache_stats and (pixmap_cache.stats.hits or pixmap_cache.stats.misses):
+            print(f"Кэш изображений галереи: {pixmap_cache.stats}, занято {pixmap_cache.used_bytes / 2 ** 20:.1f} "
+                  f"из {pixmap_cache.budget_bytes / 2 ** 20:.1f} МБ")
+        pixmap_cache.stats = FCacheStats()
+
     def add_dataset(self):
         path = QFileDialog.getExistingDirectory(self, "Выберите папку с датасетом", "")
         if not path:
@@ -216,7 +320,12 @@ class UPageDataset(QWidget, Ui_page_dataset):
 
     @pyqtSlot(str, list, object)
     def handle_on_export_window_done(self, path: str, dataset_list: list[str], refactor_class_dict: object):
-        self.commander.start_export.emit(path, dataset_list, refactor_class_dict)
+        self.lazy_loader.ensure_loaded(
+            dataset_list,
+            DATASETS,
+            lambda: self.commander.start_export.emit(path, dataset_list, refactor_class_dict),
+            overlay_parent=self.dataset_display
+        )
 
     @pyqtSlot()
     def load_selected_to_annotate_page(self):
@@ -230,6 +339,11 @@ class UPageDataset(QWidget, Ui_page_dataset):
 
     @pyqtSlot()
     def handle_on_click_to_coco(self):
+        self.lazy_loader.ensure_loaded(
+            self.project.get_datasets(), DATASETS, self.save_coco, overlay_parent=self.dataset_display
+        )
+
+    def save_coco(self):
         images, annotations, categories = convert_to_coco(self.project.get_current_annotations(), self.project.classes.class_dict)
 
         coco_json = build_coco_json(images, annotations, categories)
@@ -246,13 +360,18 @@ class UPageDataset(QWidget, Ui_page_dataset):
         if self.thread_custom and self.thread_custom.isRunning():
             UMessageBox.show_error("Уже работает поток, выполняя другое действие!")
             return
+        # Выбранные изображения могут принадлежать датасету, который еще загружается в галерею
+        if self.lazy_loader.is_running():
+            UMessageBox.show_error("Невозможно удалить аннотации. Дождитесь окончания загрузки датасетов!")
+            return
         dataset_type, list_widget, selected_item = (
             (DATASETS, self.list_datasets, self.list_datasets.selectedItems()[0]) if self.list_datasets.selectedItems()
             else (RESERVED, self.list_reserved, self.list_reserved.selectedItems()[0]) if self.list_reserved.selectedItems()
             else (None, None, None)
         )
         if dataset_type and selected_item:
-            self.thread_custom = UProgressThread(list_images, self.project.remove_annotation, dataset_type)
+            # Удаление одной пачкой: списки датасетов пересобираются один раз, прогресс и остановка по каждому элементу
+            self.thread_custom = UBatchProgressThread(list_images, self.project.remove_annotations, dataset_type)
             self.thread_custom.signal_on_finish.connect(self.handle_on_finish_delete_annotations)
             self.thread_custom.set_finish_params((list_widget, selected_item))
             self.thread_custom.start()
@@ -332,6 +451,10 @@ class UPageDataset(QWidget, Ui_page_dataset):
 
         result = message_confirm.exec_()
         if result == QMessageBox.Yes:
+            # Фоновая загрузка в галерею прерывается до удаления папки и списков датасета
+            if not self.lazy_loader.cancel():
+                UMessageBox.show_error("Невозможно удалить датасет. Уже идет загрузка датасетов!")
+                return
             self.project.remove_dataset_from_project(widget.name, dataset_type)
             self.view_gallery.clear_scene()
             self.project.save()
@@ -353,6 +476,19 @@ class UPageDataset(QWidget, Ui_page_dataset):
         dataset_item = UListDataset.get_item_widget(widget_list)
         if not dataset_item or (dataset_item.name not in dataset_list):
             return
+        if not self.lazy_loader.cancel():
+            UMessageBox.show_error("Невозможно перенести датасет. Уже идет загрузка датасетов!")
+            return
+
+        # В пределах одной файловой системы папка датасета переносится одним переименованием
+        if self.project.can_move_dataset_by_rename(dataset_item.name, source_type, target_type):
+            error = self.project.move_dataset(dataset_item.name, source_type, target_type)
+            if error:
+                UMessageBox.show_error(error)
+                return
+            self.commander.project_updated_datasets.emit()
+            return
+
         path_to_dataset_source = os.path.join(self.project.path, source_type, dataset_item.name).replace('\\', '/')
 
         self.overlay = UOverlayLoader(self.dataset_display)
@@ -417,7 +553,8 @@ class UPageDataset(QWidget, Ui_page_dataset):
                 self.list_reserved.add_dataset_item(
                     UItemDataset(
                         dataset,
-                        reserved_temp
+                        reserved_temp,
+                        lambda name=dataset: self.project.get_dataset_count(name, RESERVED)
                     )
                 )
             except Exception as error:
@@ -432,12 +569,13 @@ class UPageDataset(QWidget, Ui_page_dataset):
         selected_index, selected_name = self.list_datasets.get_selected_item()
         self.list_datasets.clear()
         # Создание общего предмета
-        sum_len = sum(len(ann_list) for ann_list in self.project.current_annotations.values())
+        sum_len = self.get_all_datasets_count()
         if sum_len == 0:
             return
         all_item = UItemDataset(
             DATASET_ALL,
-            self.project.current_annotations
+            self.project.current_annotations,
+            self.get_all_datasets_count
         )
         self.list_datasets.add_dataset_item(all_item)
 
@@ -448,7 +586,8 @@ class UPageDataset(QWidget, Ui_page_dataset):
                 self.list_datasets.add_dataset_item(
                     UItemDataset(
                         dataset,
-                        annotation_temp
+                        annotation_temp,
+                        lambda name=dataset: self.project.get_dataset_count(name, DATASETS)
                     )
                 )
             except Exception as error:
@@ -460,6 +599,9 @@ class UPageDataset(QWidget, Ui_page_dataset):
                 self.list_datasets.setCurrentIndex(selected_index)
 
 
+    def get_all_datasets_count(self):
+        return sum(self.project.get_dataset_count(dataset, DATASETS) for dataset in self.project.datasets)
+
     def fill_filter_list(self):
         widget = self.scroll_classes.widget()
         if widget is None:
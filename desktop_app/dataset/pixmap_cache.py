@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from PyQt5.QtGui import QPixmap
+
+# Кэш используется только из главного потока: QPixmap нельзя создавать и удалять в других потоках
+
+
+def get_pixmap_bytes(pixmap: QPixmap) -> int:
+    return pixmap.width() * pixmap.height() * max(1, pixmap.depth()) // 8
+
+
+class FCacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def __str__(self):
+        return (f"Попаданий: {self.hits}, промахов: {self.misses}, доля попаданий: {self.get_hit_rate():.1%}, "
+                f"вытеснено: {self.evictions}")
+
+
+class UPixmapCache:
+    """
+    LRU кэш QPixmap с ограничением по объему в мегабайтах, а не по количеству.
+    При вытеснении вызывается on_evict(ключ), чтобы владелец убрал изображение, оставив заглушку.
+    Для значений другого типа размер в байтах задается функцией get_size
+    """
+    def __init__(
+            self,
+            budget_mb: float = 256,
+            on_evict: Callable[[Hashable], None] | None = None,
+            get_size: Callable[[object], int] = get_pixmap_bytes
+    ):
+        self.budget_bytes = int(budget_mb * 2 ** 20)
+        self.on_evict = on_evict
+        self.get_size = get_size
+        self.stats = FCacheStats()
+
+        self._pixmaps: OrderedDict[Hashable, tuple[QPixmap, int]] = OrderedDict()
+        self.used_bytes = 0
+
+    def __len__(self):
+        return len(self._pixmaps)
+
+    def __contains__(self, key: Hashable):
+        return key in self._pixmaps
+
+    def get(self, key: Hashable) -> QPixmap | None:
+        entry = self._pixmaps.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        self._pixmaps.move_to_end(key)
+        self.stats.hits += 1
+        return entry[0]
+
+    def put(self, key: Hashable, pixmap: QPixmap):
+        self.remove(key)
+        size = self.get_size(pixmap)
+        self._pixmaps[key] = (pixmap, size)
+        self.used_bytes += size
+        self._evict()
+
+    def touch(self, key: Hashable):
+        if key in self._pixmaps:
+            self._pixmaps.move_to_end(key)
+
+    def remove(self, key: Hashable):
+        entry = self._pixmaps.pop(key, None)
+        if entry is not None:
+            self.used_bytes -= entry[1]
+
+    def clear(self):
+        self._pixmaps.clear()
+        self.used_bytes = 0
+
+    def set_budget_mb(self, budget_mb: float):
+        self.budget_bytes = int(budget_mb * 2 ** 20)
+        self._evict()
+
+    def _evict(self):
+        # Последнее добавленное изображение остается, даже если оно одно больше бюджета
+        while self.used_bytes > self.budget_bytes and len(self._pixmaps) > 1:
+            key, (_, size) = self._pixmaps.popitem(last=False)
+            self.used_bytes -= size
+            self.stats.evictions += 1
+            if self.on_evict:
+                self.on_evict(key)
@@ -0,0 +1,228 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize
+from PyQt5.QtGui import QImage, QImageWriter, QImageReader
+
+# Папка кэша миниатюр в проекте
+THUMBNAILS = ".thumbnails"
+
+
+def get_thumbnail_format() -> str:
+    # WebP меньше по размеру, но плагин imageformats для него есть не во всех сборках Qt
+    if b"webp" in QImageWriter.supportedImageFormats():
+        return "webp"
+    return "jpg"
+
+
+def get_reduced_size(image_size: QSize, width: int, height: int) -> QSize:
+    # Наименьший размер вида image_size / 2^n, который не меньше нужного. Для JPEG это масштаб DCT в libjpeg
+    # (1/2, 1/4, 1/8), поэтому изображение сразу декодируется уменьшенным
+    target = image_size.scaled(width, height, Qt.KeepAspectRatio)
+    factor = 1
+    while factor < 8 and image_size.width() // (factor * 2) >= target.width() \
+            and image_size.height() // (factor * 2) >= target.height():
+        factor *= 2
+    return QSize(max(1, image_size.width() // factor), max(1, image_size.height() // factor))
+
+
+def load_scaled_image(image_path: str, width: int, height: int) -> QImage:
+    # Декодирование сразу в уменьшенном размере без промежуточного полноразмерного изображения
+    reader = QImageReader(image_path)
+    image_size = reader.size()
+    if image_size.isValid() and (image_size.width() > width or image_size.height() > height):
+        reader.setScaledSize(get_reduced_size(image_size, width, height))
+    image = reader.read()
+    if image.isNull():
+        return image
+    if image.width() <= width and image.height() <= height:
+        return image
+    return image.scaled(width, height, aspectRatioMode=Qt.KeepAspectRatio, transformMode=Qt.SmoothTransformation)
+
+
+def create_thumbnail(image_path: str, cell_size: int) -> QImage:
+    return load_scaled_image(image_path, cell_size, cell_size)
+
+
+class UThumbnailCache:
+    """
+    Кэш миниатюр изображений без аннотаций: память (LRU) и диск в папке проекта.
+    Ключ - (путь, время изменения, размер файла, размер ячейки), поэтому измененное изображение
+    получает новую миниатюру. Аннотации рисуются поверх миниатюры при отображении.
+    Объем на диске ограничен max_disk_mb: при превышении удаляются давно не использованные миниатюры,
+    в том числе устаревшие миниатюры измененных изображений и прежних размеров ячейки
+    """
+    def __init__(self, cache_path: str, memory_items: int = 300, quality: int = 85, max_disk_mb: float = 512):
+        self.cache_path = cache_path.replace('\\', '/')
+        self.memory_items = memory_items
+        self.quality = quality
+        self.format = get_thumbnail_format()
+        self.max_disk_bytes = int(max_disk_mb * 2 ** 20)
+
+        self._memory: OrderedDict[str, QImage] = OrderedDict()
+        self._lock = threading.Lock()
+        # Объем миниатюр на диске. Считается по папке при первой записи, дальше ведется при записи и очистке
+        self._disk_bytes: int | None = None
+        self._disk_lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_key(self, image_path: str, cell_size: int) -> str | None:
+        try:
+            image_stat = os.stat(image_path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(image_path)}|{image_stat.st_mtime_ns}|{image_stat.st_size}|{cell_size}"
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get_file_path(self, key: str) -> str:
+        return os.path.join(self.cache_path, key[:2], f"{key}.{self.format}").replace('\\', '/')
+
+    def get(self, image_path: str, cell_size: int) -> QImage | None:
+        key = self.get_key(image_path, cell_size)
+        if key is None:
+            return None
+        return self._get_by_key(key)
+
+    def get_or_create(self, image_path: str, cell_size: int, keep_in_memory: bool = True) -> QImage:
+        key = self.get_key(image_path, cell_size)
+        if key is None:
+            return QImage()
+        image = self._get_by_key(key)
+        if image is not None:
+            return image
+
+        self.misses += 1
+        image = create_thumbnail(image_path, cell_size)
+        if image.isNull():
+            return image
+        self._save(key, image)
+        if keep_in_memory:
+            self._put_memory(key, image)
+        return image
+
+    def contains(self, image_path: str, cell_size: int) -> bool:
+        key = self.get_key(image_path, cell_size)
+        return key is not None and (key in self._memory or os.path.exists(self.get_file_path(key)))
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+    def _get_by_key(self, key: str) -> QImage | None:
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return image
+
+        file_path = self.get_file_path(key)
+        if not os.path.exists(file_path):
+            return None
+        image = QImage(file_path)
+        if image.isNull():
+            return None
+        # Время изменения файла - время последнего использования миниатюры для очистки диска
+        try:
+            os.utime(file_path)
+        except OSError:
+            pass
+        self.disk_hits += 1
+        self._put_memory(key, image)
+        return image
+
+    def _put_memory(self, key: str, image: QImage):
+        with self._lock:
+            self._memory[key] = image
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _save(self, key: str, image: QImage):
+        # Запись через временный файл: параллельное чтение не увидит файл записанным наполовину
+        file_path = self.get_file_path(key)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        temp_path = f"{file_path}.{threading.get_ident()}.tmp"
+        if image.hasAlphaChannel() and self.format == "jpg":
+            image = image.convertToFormat(QImage.Format_RGB888)
+        if image.save(temp_path, self.format, self.quality):
+            os.replace(temp_path, file_path)
+        elif os.path.exists(temp_path):
+            os.remove(temp_path)
+            return
+        size = os.path.getsize(file_path)
+        if self.get_disk_bytes(size) > self.max_disk_bytes:
+            self.prune_disk()
+
+    def get_disk_bytes(self, added: int = 0) -> int:
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+            else:
+                self._disk_bytes += added
+            return self._disk_bytes
+
+    def prune_disk(self):
+        # Удаление давно не использованных миниатюр до 3/4 лимита, чтобы не сканировать папку при каждой записи
+        with self._disk_lock:
+            files = self._scan_disk()
+            total = sum(size for _, size, _ in files)
+            target = self.max_disk_bytes * 3 // 4
+            for _, size, file_path in sorted(files):
+                if total <= target:
+                    break
+                try:
+                    os.remove(file_path)
+                    total -= size
+                except OSError:
+                    pass
+            self._disk_bytes = total
+
+    def _scan_disk(self) -> list[tuple[int, int, str]]:
+        # (время последнего использования, размер, путь) файлов миниатюр во вложенных папках кэша
+        files = list()
+        try:
+            with os.scandir(self.cache_path) as folders:
+                for folder in folders:
+                    if not folder.is_dir():
+                        continue
+                    with os.scandir(folder.path) as entries:
+                        for entry in entries:
+                            if entry.name.endswith(".tmp") or not entry.is_file():
+                                continue
+                            entry_stat = entry.stat()
+                            files.append((entry_stat.st_mtime_ns, entry_stat.st_size, entry.path.replace('\\', '/')))
+        except OSError:
+            pass
+        return files
+
+
+class UThreadThumbnailPregenerate(QThread):
+    # Путь к изображению, текущее, общее количество
+    signal_on_progress = pyqtSignal(str, int, int)
+    signal_on_ended = pyqtSignal(int)
+
+    def __init__(self, thumbnail_cache: UThumbnailCache, image_paths: list[str], cell_size: int):
+        super().__init__()
+        self.thumbnail_cache = thumbnail_cache
+        self.image_paths = image_paths
+        self.cell_size = cell_size
+
+    def run(self):
+        created = 0
+        total = len(self.image_paths)
+        for current, image_path in enumerate(self.image_paths, start=1):
+            if self.isInterruptionRequested():
+                break
+            if self.thumbnail_cache.contains(image_path, self.cell_size):
+                continue
+            # Заранее созданные миниатюры только записываются на диск и не вытесняют миниатюры на экране
+            self.thumbnail_cache.get_or_create(image_path, self.cell_size, keep_in_memory=False)
+            created += 1
+            self.signal_on_progress.emit(image_path, current, total)
+        self.signal_on_ended.emit(created)
@@ -6,18 +6,20 @@ from typing import Optional
 
 import cv2
 import numpy as np
-from PyQt5.QtGui import QColor
 from ultralytics import YOLO
 
 from PyQt5.QtCore import QThread, pyqtSignal, QObject, pyqtSlot, QTimer
 
-from utility import FAnnotationClasses, FDetectAnnotationData, FAnnotationData
+from utility import FAnnotationClasses, FDetectAnnotationData, FAnnotationData, EColorOrder
 
 
 class UBaseNeuralNet(QObject):
     signal_on_added = pyqtSignal(int)
     signal_on_result = pyqtSignal(int, list)
 
+    # Порядок каналов матриц, которые принимает process_image. Ultralytics и cv2.imencode ожидают BGR
+    color_order = EColorOrder.BGR
+
     def __init__(self, classes: FAnnotationClasses):
         super().__init__()
         self.model = None
@@ -94,8 +96,6 @@ class ULocalDetectYOLO(UBaseNeuralNet):
             #conf = box.conf
 
             res_h, res_w = image.shape[:2]
-            class_name = self.classes.get_name(class_id)
-            class_color = self.classes.get_color(class_id)
             detect_data = FDetectAnnotationData(
                 int(x - width /2),
                 int(y - height / 2),
@@ -103,8 +103,6 @@ class ULocalDetectYOLO(UBaseNeuralNet):
                 int(height),
                 count,
                 class_id,
-                "Unresolved" if class_name is None else class_name,
-                QColor("#606060") if class_color is None else class_color,
                 int(res_w),
                 int(res_h)
             )
@@ -192,8 +190,6 @@ class URemoteNeuralNet(UBaseNeuralNet):
                 detect_num = 1
                 for i, object_d in enumerate(detections):
                     class_id = object_d['class_id']
-                    class_color = self.classes.get_color(class_id)
-                    class_name = self.classes.get_name(class_id)
                     ann_data = FDetectAnnotationData(
                         int(object_d['x'] - object_d['width'] / 2),
                         int(object_d['y'] - object_d['height'] / 2),
@@ -201,8 +197,6 @@ class URemoteNeuralNet(UBaseNeuralNet):
                         int(object_d['height']),
                         detect_num,
                         class_id,
-                        "Unresolved" if class_name is None else class_name,
-                        QColor("#606060") if class_color is None else class_color,
                         int(object_d['resolution_w']),
                         int(object_d['resolution_h'])
                     )
@@ -44,6 +44,10 @@ class UPageLoader(QWidget, Ui_page_load_dataset):
         if error:
             QDialogCreateProject.show_error(error)
             return
+        elif self.project.lazy_loading:
+            # Аннотации загружаются при первом обращении к датасету, при открытии только подсчитываются
+            self.project.register_datasets()
+            self.commander.project_load_complete.emit()
         else:
             if self.overlay or (self.thread_load and self.thread_load.isRunning()):
                 QDialogCreateProject.show_error("Невозможно загрузить датасеты. Уже идет загрузка датасетов!")
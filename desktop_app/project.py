@@ -1,12 +1,18 @@
 import configparser
 import os.path
-import pathlib
 import shutil
-from typing import Optional
+from typing import Optional, Callable
 
 from PyQt5.QtCore import QThread, pyqtSignal
 
 from SAM2.sam2_net import USam2Net
+from dataset.annotation_index import UAnnotationIndex
+from dataset.annotation_table import FAnnotationTable, FTableAnnotationItem
+from dataset.dataset_move import UDatasetMove
+from dataset.dataset_scan import count_label_files
+from dataset.blob_store import UBlobStore, UBlobFilePlacer
+from dataset.file_placement import UFilePlacer, PLACEMENT_AUTO, PLACEMENT_COPY
+from dataset.label_writer import ULabelWriter, write_label_files
 from neural_model import ULocalDetectYOLO, UBaseNeuralNet, URemoteNeuralNet
 from supporting.error_text import UErrorsText
 from utility import FAnnotationClasses, FAnnotationData, FAnnotationItem, FDetectAnnotationData, \
@@ -20,6 +26,20 @@ MAIN_SECTION = "main"
 COUNTER = "counter"
 CLASSES = "classes"
 NAME = "name"
+LAZY_LOADING = "lazy_loading"
+FILE_PLACEMENT = "file_placement"
+EXPORT_PLACEMENT = "export_placement"
+BLOB_STORE = "blob_store"
+GALLERY_MODE = "gallery_mode"
+GALLERY_CACHE_MB = "gallery_cache_mb"
+GALLERY_CACHE_STATS = "gallery_cache_stats"
+THUMBNAIL_CACHE_MB = "thumbnail_cache_mb"
+FRAME_CACHE_MB = "frame_cache_mb"
+MAX_LOADED_RESERVED = "max_loaded_reserved"
+
+# Галерея датасетов: элементы сцены на каждое видимое изображение или модель с делегатом для больших датасетов
+GALLERY_SCENE = "scene"
+GALLERY_VIRTUAL = "virtual"
 
 LABELS = "labels"
 LABELS_SEGM = "labels_seg"
@@ -51,28 +71,42 @@ class UMergeAnnotationThread(QThread):
     def run(self):
         total = len(self.source_list) + len(self.delete_list)
         current = 1
+        # Файлы аннотаций пишутся в фоновом потоке, пока здесь обновляется память проекта и копируются изображения
+        label_writer = ULabelWriter()
+        label_writer.start()
+        file_placer = self.project.get_file_placer()
         for annotation_item in self.source_list:
             dataset = annotation_item.get_dataset_name()
             if dataset not in self.target_dict:
                 self.target_dict[dataset] = list()
                 self.project.add_dataset(dataset, self.type_d)
                 self.project.create_dataset_dir(dataset, self.type_d)
+                self.project.set_dataset_loaded(dataset, self.type_d)
             try:
-                self.project.save_annotation_to_project(annotation_item, dataset, self.type_d)
+                self.project.save_annotation_to_project(annotation_item, dataset, self.type_d, label_writer, file_placer)
                 current += 1
                 self.signal_on_loaded_image.emit(annotation_item.get_image_path(), current, total)
             except Exception as error:
                 print(str(error))
                 continue
 
-        for delete_item in self.delete_list:
+        # Удаление начинается только после записи всех файлов
+        for error in label_writer.close():
+            print(error)
+            self.signal_on_loaded_image.emit(f"Ошибка при записи аннотаций! {error}", current, total)
+        file_placer.flush()
+        print(f"Размещение изображений: {file_placer.stats}")
+
+        def on_removed(delete_item: FAnnotationItem, error: str | None):
+            nonlocal current
             current += 1
-            error = self.project.remove_annotation(delete_item, self.type_d)
             if error:
                 print(str(error))
                 self.signal_on_loaded_image.emit(f"Ошибка при удалении! {str(error)}", current, total)
-                continue
+                return
             self.signal_on_loaded_image.emit(delete_item.get_image_path(), current, total)
+
+        self.project.remove_annotations(self.delete_list, self.type_d, on_removed)
         self.signal_on_ended.emit("Завершено!")
 
 class UTrainProject:
@@ -88,6 +122,8 @@ class UTrainProject:
         self.reserved: list[str] = list()
 
         self.classes = FAnnotationClasses()
+        # Имя и цвет класса аннотаций берутся из списка классов проекта
+        FAnnotationData.set_classes(self.classes)
         self.counter = 0
         self.name = ""
         self.path = ""
@@ -96,6 +132,41 @@ class UTrainProject:
         self.current_annotations: dict[str, list[FAnnotationItem]] = dict()
         self.reserved_annotations: dict[str, list[FAnnotationItem]] = dict()
 
+        # Ленивая загрузка: при открытии проекта считается только количество аннотаций,
+        # а сами аннотации датасета загружаются при первом обращении к нему
+        self.lazy_loading = True
+        self.loaded_datasets: dict[str, set[str]] = {DATASETS: set(), RESERVED: set()}
+        self.dataset_counts: dict[str, dict[str, int]] = {DATASETS: dict(), RESERVED: dict()}
+        # Порядок использования зарезервированных датасетов. Давно не используемые выгружаются из памяти
+        self.reserved_usage: list[str] = list()
+        self.max_loaded_reserved = 3
+
+        # Способ размещения изображений при импорте и слиянии: auto, hardlink, reflink или copy
+        self.file_placement = PLACEMENT_AUTO
+        # Экспорт выходит за пределы проекта, поэтому по умолчанию копирует: правка экспортированного файла
+        # не должна менять изображение проекта. Ссылки включаются явно
+        self.export_placement = PLACEMENT_COPY
+        # Хранилище изображений по хешу содержимого: одинаковые изображения разных датасетов хранятся один раз
+        self.use_blob_store = False
+        self.gallery_mode = GALLERY_SCENE
+        # Объем кэша изображений галереи в мегабайтах и вывод его статистики при смене датасета
+        self.gallery_cache_mb = 256.0
+        self.gallery_cache_stats = False
+        # Объем миниатюр в папке проекта на диске в мегабайтах
+        self.thumbnail_cache_mb = 512.0
+        # Объем предварительно декодированных полноразмерных изображений страницы разметки в мегабайтах
+        self.frame_cache_mb = 512.0
+
+        # Колоночные таблицы аннотаций датасетов. Элементы списков аннотаций ссылаются на строки таблиц
+        self.annotation_tables: dict[str, dict[str, FAnnotationTable]] = {DATASETS: dict(), RESERVED: dict()}
+
+        # Индекс (датасет, путь к изображению) -> элементы аннотаций для поиска без прохода по списку.
+        # Список нужен, так как изображение с рамками и полигонами загружается двумя элементами
+        self.annotation_lookup: dict[str, dict[tuple[str, str], list[FAnnotationItem]]] = {
+            DATASETS: dict(),
+            RESERVED: dict()
+        }
+
         # Поток обработки нейросети
         self.model_thread: Optional[QThread] = None
         self.model_worker: Optional[UBaseNeuralNet] = None
@@ -194,6 +265,17 @@ class UTrainProject:
             self.classes.add_classes_from_strings(class_strings)
             self.name = config.get(MAIN_SECTION, NAME)
             self.path = os.path.dirname(path_to_project)
+            self.lazy_loading = config.getboolean(MAIN_SECTION, LAZY_LOADING, fallback=True)
+            self.file_placement = config.get(MAIN_SECTION, FILE_PLACEMENT, fallback=PLACEMENT_AUTO)
+            self.export_placement = config.get(MAIN_SECTION, EXPORT_PLACEMENT, fallback=PLACEMENT_COPY)
+            self.use_blob_store = config.getboolean(MAIN_SECTION, BLOB_STORE, fallback=False)
+            self.gallery_mode = config.get(MAIN_SECTION, GALLERY_MODE, fallback=GALLERY_SCENE)
+            self.gallery_cache_mb = config.getfloat(MAIN_SECTION, GALLERY_CACHE_MB, fallback=256.0)
+            self.gallery_cache_stats = config.getboolean(MAIN_SECTION, GALLERY_CACHE_STATS, fallback=False)
+            self.thumbnail_cache_mb = config.getfloat(MAIN_SECTION, THUMBNAIL_CACHE_MB, fallback=512.0)
+            self.frame_cache_mb = config.getfloat(MAIN_SECTION, FRAME_CACHE_MB, fallback=512.0)
+            self.max_loaded_reserved = config.getint(MAIN_SECTION, MAX_LOADED_RESERVED, fallback=3)
+            self.recover_dataset_moves()
 
             self._init_dicts()
 
@@ -219,6 +301,16 @@ class UTrainProject:
             config[MAIN_SECTION][COUNTER] = str(self.counter)
             config[MAIN_SECTION][CLASSES] = "[" + ", ".join([class_t.Name for class_t in self.classes.get_all_classes()]) + "]"
             config[MAIN_SECTION][NAME] = self.name
+            config[MAIN_SECTION][LAZY_LOADING] = str(self.lazy_loading)
+            config[MAIN_SECTION][FILE_PLACEMENT] = self.file_placement
+            config[MAIN_SECTION][EXPORT_PLACEMENT] = self.export_placement
+            config[MAIN_SECTION][BLOB_STORE] = str(self.use_blob_store)
+            config[MAIN_SECTION][GALLERY_MODE] = self.gallery_mode
+            config[MAIN_SECTION][GALLERY_CACHE_MB] = str(self.gallery_cache_mb)
+            config[MAIN_SECTION][GALLERY_CACHE_STATS] = str(self.gallery_cache_stats)
+            config[MAIN_SECTION][THUMBNAIL_CACHE_MB] = str(self.thumbnail_cache_mb)
+            config[MAIN_SECTION][FRAME_CACHE_MB] = str(self.frame_cache_mb)
+            config[MAIN_SECTION][MAX_LOADED_RESERVED] = str(self.max_loaded_reserved)
 
             #for dataset in self.datasets:
             #    config.add_section(dataset)
@@ -244,6 +336,7 @@ class UTrainProject:
         path_to_dataset = os.path.join(self.path, type_dataset, dataset_name).replace('\\', '/')
         if os.path.exists(path_to_dataset):
             shutil.rmtree(path_to_dataset)
+            self.release_dataset_blobs(dataset_name, type_dataset)
             print(f"Из проекта {self.name} удалена папка датасета {dataset_name}, находящаяся по пути {path_to_dataset}!")
         else:
             print(f"Функция UTrainProject.remove_dataset_folder объекта {self.name}! На найдена папка датасета {dataset_name} по пути {path_to_dataset}!")
@@ -276,6 +369,7 @@ class UTrainProject:
         self.remove_dataset(dataset)
         self.remove_all_annotations_from_dataset(dataset, type_dataset)
         shutil.rmtree(path_dataset_folder)
+        self.release_dataset_blobs(dataset, type_dataset)
 
     def swap_annotations(self, dataset_name: str, type_source: str, type_target: str):
         if type_source == type_target:
@@ -290,19 +384,80 @@ class UTrainProject:
         if dataset_name in target_ann_dict and len(target_ann_dict[dataset_name]) > 0:
             return UErrorsText.annotations_already_exist("UTrainProject.swap_annotations", dataset_name)
 
+        # Пути меняются только в части <проект>/<тип>/<датасет>/, файлы на диске не затрагиваются
+        source_root = os.path.join(self.path, type_source, dataset_name).replace('\\', '/') + '/'
+        target_root = os.path.join(self.path, type_target, dataset_name).replace('\\', '/') + '/'
         ann_list = source_ann_dict.pop(dataset_name)
         for ann_data in ann_list:
-            ann_data.image_path = ann_data.image_path.replace('/' + type_source + '/', '/' + type_target + '/')
+            self._remove_from_lookup(ann_data, type_source)
+            image_path = ann_data.get_image_path()
+            if image_path.startswith(source_root):
+                ann_data.image_path = target_root + image_path[len(source_root):]
+            else:
+                ann_data.image_path = image_path.replace('/' + type_source + '/', '/' + type_target + '/')
+            self._add_to_lookup(ann_data, type_target)
         target_ann_dict[dataset_name] = ann_list
 
+        if dataset_name in self.loaded_datasets[type_source]:
+            self.loaded_datasets[type_source].discard(dataset_name)
+            self.loaded_datasets[type_target].add(dataset_name)
+        if dataset_name in self.dataset_counts[type_source]:
+            self.dataset_counts[type_target][dataset_name] = self.dataset_counts[type_source].pop(dataset_name)
+        if dataset_name in self.annotation_tables[type_source]:
+            self.annotation_tables[type_target][dataset_name] = self.annotation_tables[type_source].pop(dataset_name)
+
+    def can_move_dataset_by_rename(self, dataset_name: str, type_source: str, type_target: str) -> bool:
+        if dataset_name not in self._get_ref_to_list(type_source) or dataset_name in self._get_ref_to_list(type_target):
+            return False
+        return UDatasetMove(self.path, dataset_name, type_source, type_target).can_rename()
+
+    def move_dataset(self, dataset_name: str, type_source: str, type_target: str):
+        # Перенос датасета между datasets и reserved одним переименованием папки в пределах файловой системы
+        move = UDatasetMove(self.path, dataset_name, type_source, type_target)
+        try:
+            move.rename()
+        except OSError as error:
+            return str(error)
+
+        self._move_dataset_in_memory(dataset_name, type_source, type_target)
+        error = self.save()
+        if error:
+            self._move_dataset_in_memory(dataset_name, type_target, type_source)
+            move.rollback()
+            return error
+        move.commit()
+
+        if self.use_blob_store:
+            UBlobStore(self.path).move_manifest(dataset_name, type_source, type_target)
+        print(f"В проекте {self.name} датасет {dataset_name} перенесен из {type_source} в {type_target}!")
+
+    def _move_dataset_in_memory(self, dataset_name: str, type_source: str, type_target: str):
+        self.swap_annotations(dataset_name, type_source, type_target)
+        self.remove_all_annotations_from_dataset(dataset_name, type_source)
+        self.remove_dataset(dataset_name, type_source)
+        self.add_dataset(dataset_name, type_target)
+
+    def recover_dataset_moves(self):
+        message = UDatasetMove.recover(
+            self.path,
+            lambda dataset_name, type_target: dataset_name in (self._get_ref_to_list(type_target) or [])
+        )
+        if message:
+            print(message)
+
     def remove_all_annotations_from_dataset(self, dataset, type_dataset: str = DATASETS):
         ref_annotation_dict = self._get_ref_to_annotation_dict(type_dataset)
         if not ref_annotation_dict:
             return UErrorsText.not_existing_type_dataset("UTrainProject.remove_annotations", type_dataset)
 
         if ref_annotation_dict.get(dataset):
+            for ann_item in ref_annotation_dict[dataset]:
+                self._remove_from_lookup(ann_item, type_dataset)
             del ref_annotation_dict[dataset]
             print(f"В проекте {self.name} из датасета {dataset} удалены все аннотации!")
+        self.loaded_datasets[type_dataset].discard(dataset)
+        self.dataset_counts[type_dataset].pop(dataset, None)
+        self.annotation_tables[type_dataset].pop(dataset, None)
 
     def add_annotation(self, dataset:str, ann_item:FAnnotationItem, type_dataset: str = DATASETS):
         ref_dataset_dict = self._get_ref_to_list(type_dataset)
@@ -314,7 +469,11 @@ class UTrainProject:
             if dataset not in ref_annotations_dict:
                 ref_annotations_dict[dataset] = list()
 
+            table = self.get_annotation_table(dataset, type_dataset)
+            if not isinstance(ann_item, FTableAnnotationItem) or ann_item.table is not table:
+                ann_item = table.add_item(ann_item)
             ref_annotations_dict[dataset].append(ann_item)
+            self._add_to_lookup(ann_item, type_dataset)
             return
         else:
             return UErrorsText.not_existing_dataset_in_project("UTrainProject.add_annotation", dataset)
@@ -329,16 +488,64 @@ class UTrainProject:
         if dataset is None or dataset not in ref_dataset_dict or dataset not in ref_annotations_dict:
             return UErrorsText.not_existing_dataset_in_project("UTrainProject.update_annotation", type_dataset)
 
-        found_data_item = next((item for item in ref_annotations_dict[dataset] if item == ann_item), None)
+        found_data_item = self.find_annotation(ann_item, type_dataset)
         if found_data_item is None or not isinstance(found_data_item, ann_item.__class__):
             return "Не существует аннотации в списке! UTrainProject.update_annotations."
         found_data_item.update_annotation_data(ann_item.get_annotation_data())
 
     def remove_annotation(self, ann_item: FAnnotationItem, type_dataset: str = DATASETS):
+        errors = self.remove_annotations([ann_item], type_dataset)
+        if errors:
+            return errors[0]
+
+    def remove_annotations(
+            self,
+            ann_items: list[FAnnotationItem],
+            type_dataset: str = DATASETS,
+            on_removed: Optional[Callable[[FAnnotationItem, str | None], None]] = None,
+            is_stopped: Optional[Callable[[], bool]] = None
+    ) -> list[str]:
+        """
+        Удаляет аннотации и их файлы. Элементы находятся по индексу, а списки датасетов
+        пересобираются один раз в конце, поэтому удаление пачки линейно. Возвращает список ошибок.
+        Если is_stopped() возвращает True, удаление прекращается, уже удаленные элементы убираются из списков
+        """
         ref_dataset_list = self._get_ref_to_list(type_dataset)
         ref_annotations_dict = self._get_ref_to_annotation_dict(type_dataset)
         if not ref_dataset_list or not ref_annotations_dict:
-            return UErrorsText.not_existing_type_dataset("UTrainProject.delete_annotation", type_dataset)
+            return [UErrorsText.not_existing_type_dataset("UTrainProject.delete_annotation", type_dataset)]
+
+        errors: list[str] = list()
+        removed_ids: dict[str, set[int]] = dict()
+        # Удаленные изображения убираются из манифестов хранилища, иначе их блобы не освободятся
+        blob_store = UBlobStore(self.path) if self.use_blob_store else None
+        for ann_item in ann_items:
+            if is_stopped and is_stopped():
+                break
+            error = self._remove_annotation_entry(ann_item, type_dataset, removed_ids, blob_store)
+            if error:
+                errors.append(error)
+            if on_removed:
+                on_removed(ann_item, error)
+        if blob_store and removed_ids:
+            blob_store.flush()
+            blob_store.collect_garbage()
+
+        for dataset, dataset_removed_ids in removed_ids.items():
+            ann_list = ref_annotations_dict[dataset]
+            # Список изменяется на месте, так как на него ссылаются виджеты
+            ann_list[:] = [item for item in ann_list if id(item) not in dataset_removed_ids]
+        return errors
+
+    def _remove_annotation_entry(
+            self,
+            ann_item: FAnnotationItem,
+            type_dataset: str,
+            removed_ids: dict[str, set[int]],
+            blob_store: Optional[UBlobStore] = None
+    ):
+        ref_dataset_list = self._get_ref_to_list(type_dataset)
+        ref_annotations_dict = self._get_ref_to_annotation_dict(type_dataset)
 
         dataset = ann_item.get_dataset_name()
         if dataset not in ref_dataset_list:
@@ -346,8 +553,17 @@ class UTrainProject:
         if dataset not in ref_annotations_dict:
             return UErrorsText.not_existing_annotations("UTrainProject.delete_annotation", dataset)
 
+        removed_item = self.find_annotation(ann_item, type_dataset)
+        if removed_item is None:
+            return UErrorsText.not_existing_annotation_in_dataset("UTrainProject.delete_annotation", dataset)
+        self._remove_from_lookup(removed_item, type_dataset)
+        removed_ids.setdefault(dataset, set()).add(id(removed_item))
+        if isinstance(removed_item, FTableAnnotationItem):
+            removed_item.remove_from_table()
+
+        if blob_store:
+            blob_store.unlink(ann_item.get_image_path())
         try:
-            ref_annotations_dict[dataset].remove(ann_item)
             os.remove(ann_item.get_image_path())
             label_path = os.path.join(
                 self._get_dir_path(dataset, type_dataset, LABELS),
@@ -357,6 +573,26 @@ class UTrainProject:
         except Exception as error:
             return UErrorsText.not_existing_annotation_in_dataset("UTrainProject.delete_annotation", dataset)
 
+    def find_annotation(self, ann_item: FAnnotationItem, type_dataset: str = DATASETS) -> FAnnotationItem | None:
+        items = self.annotation_lookup[type_dataset].get(self._get_lookup_key(ann_item))
+        return items[0] if items else None
+
+    def _add_to_lookup(self, ann_item: FAnnotationItem, type_dataset: str):
+        self.annotation_lookup[type_dataset].setdefault(self._get_lookup_key(ann_item), list()).append(ann_item)
+
+    def _remove_from_lookup(self, ann_item: FAnnotationItem, type_dataset: str):
+        key = self._get_lookup_key(ann_item)
+        items = self.annotation_lookup[type_dataset].get(key)
+        if not items:
+            return
+        items[:] = [item for item in items if item is not ann_item]
+        if not items:
+            del self.annotation_lookup[type_dataset][key]
+
+    @staticmethod
+    def _get_lookup_key(ann_item: FAnnotationItem) -> tuple[str, str]:
+        return ann_item.get_dataset_name(), ann_item.get_image_path()
+
     def get_datasets(self):
         return self.datasets
 
@@ -397,6 +633,10 @@ class UTrainProject:
         if reserved_name in self.reserved_annotations:
             return self.reserved_annotations[reserved_name]
 
+    def get_dataset_annotations(self, dataset_name: str, type_dataset: str = DATASETS) -> list[FAnnotationItem] | None:
+        ref_annotation_dict = self._get_ref_to_annotation_dict(type_dataset)
+        return ref_annotation_dict.get(dataset_name) if ref_annotation_dict is not None else None
+
     def _get_ref_to_list(self, type_dataset: str):
         if type_dataset == DATASETS:
             return self.datasets
@@ -418,12 +658,115 @@ class UTrainProject:
             self.current_annotations[dataset_name] = list()
         for reserved_name in self.reserved:
             self.reserved_annotations[reserved_name] = list()
+        for type_dataset in (DATASETS, RESERVED):
+            self.loaded_datasets[type_dataset].clear()
+            self.dataset_counts[type_dataset].clear()
+            self.annotation_tables[type_dataset].clear()
+            self.annotation_lookup[type_dataset].clear()
+        self.reserved_usage.clear()
+
+    def get_annotation_table(self, dataset_name: str, type_dataset: str = DATASETS) -> FAnnotationTable | None:
+        ref_dataset_list = self._get_ref_to_list(type_dataset)
+        if ref_dataset_list is None or dataset_name not in ref_dataset_list:
+            return None
+        tables = self.annotation_tables[type_dataset]
+        if dataset_name not in tables:
+            tables[dataset_name] = FAnnotationTable()
+        return tables[dataset_name]
+
+    def count_classes(self, dataset_list: list[str], type_list: list, type_dataset: str = DATASETS) -> dict[int, int]:
+        # Количество аннотаций каждого класса по колоночным таблицам датасетов
+        counts: dict[int, int] = dict()
+        for dataset_name in dataset_list:
+            table = self.annotation_tables[type_dataset].get(dataset_name)
+            if table is None:
+                continue
+            for class_id, count in table.count_classes(type_list).items():
+                counts[class_id] = counts.get(class_id, 0) + count
+        return counts
+
+    def register_datasets(self):
+        # Быстрая регистрация датасетов без загрузки аннотаций: количество берется из индекса или списка файлов
+        for type_dataset in (DATASETS, RESERVED):
+            for dataset_name in self._get_ref_to_list(type_dataset):
+                self.dataset_counts[type_dataset][dataset_name] = self.count_dataset_annotations(dataset_name, type_dataset)
+
+    def count_dataset_annotations(self, dataset_name: str, type_dataset: str = DATASETS) -> int:
+        dataset_path = self.get_dataset_path(dataset_name, type_dataset)
+        if dataset_path is None:
+            return 0
+        count = UAnnotationIndex.count_entries(dataset_path)
+        if count is None:
+            count = count_label_files(dataset_path, [LABELS, LABELS_SEGM])
+        return count
+
+    def get_dataset_count(self, dataset_name: str, type_dataset: str = DATASETS) -> int:
+        if self.is_dataset_loaded(dataset_name, type_dataset):
+            return len(self._get_ref_to_annotation_dict(type_dataset).get(dataset_name, []))
+        counts = self.dataset_counts[type_dataset]
+        if dataset_name not in counts:
+            counts[dataset_name] = self.count_dataset_annotations(dataset_name, type_dataset)
+        return counts[dataset_name]
+
+    def is_dataset_loaded(self, dataset_name: str, type_dataset: str = DATASETS) -> bool:
+        return dataset_name in self.loaded_datasets.get(type_dataset, set())
+
+    def set_dataset_loaded(self, dataset_name: str, type_dataset: str = DATASETS):
+        if type_dataset in self.loaded_datasets:
+            self.loaded_datasets[type_dataset].add(dataset_name)
+
+    def get_unloaded_datasets(self, dataset_list: list[str], type_dataset: str = DATASETS) -> list[str]:
+        ref_dataset_list = self._get_ref_to_list(type_dataset) or []
+        return [
+            dataset for dataset in dataset_list
+            if dataset in ref_dataset_list and not self.is_dataset_loaded(dataset, type_dataset)
+        ]
+
+    def touch_datasets(self, dataset_list: list[str], type_dataset: str = DATASETS):
+        # Отмечает использование датасетов. Зарезервированные датасеты сверх лимита выгружаются из памяти
+        if type_dataset != RESERVED:
+            return
+        for dataset in dataset_list:
+            if dataset in self.reserved_usage:
+                self.reserved_usage.remove(dataset)
+            self.reserved_usage.append(dataset)
+        # Датасеты из dataset_list не выгружаются, даже если их больше лимита: они остаются в списке
+        # использования и выгрузятся при следующих обращениях
+        excess = len(self.reserved_usage) - self.max_loaded_reserved
+        if excess <= 0:
+            return
+        evicted_list = [dataset for dataset in self.reserved_usage if dataset not in dataset_list][:excess]
+        for evicted in evicted_list:
+            self.reserved_usage.remove(evicted)
+            self.unload_dataset(evicted, RESERVED)
+
+    def unload_dataset(self, dataset_name: str, type_dataset: str = DATASETS):
+        if not self.is_dataset_loaded(dataset_name, type_dataset):
+            return
+        ann_list = self._get_ref_to_annotation_dict(type_dataset).get(dataset_name)
+        if ann_list is not None:
+            self.dataset_counts[type_dataset][dataset_name] = len(ann_list)
+        self.discard_dataset_annotations(dataset_name, type_dataset)
+        self.loaded_datasets[type_dataset].discard(dataset_name)
+        print(f"Из памяти выгружены аннотации датасета {dataset_name}!")
+
+    def discard_dataset_annotations(self, dataset_name: str, type_dataset: str = DATASETS):
+        # Также используется для датасета, загрузка которого прервана: при следующем обращении он загружается заново
+        ann_list = self._get_ref_to_annotation_dict(type_dataset).get(dataset_name)
+        if ann_list is not None:
+            for ann_item in ann_list:
+                self._remove_from_lookup(ann_item, type_dataset)
+            # Список очищается на месте, так как на него ссылаются виджеты списка датасетов
+            ann_list.clear()
+        self.annotation_tables[type_dataset].pop(dataset_name, None)
 
     def save_annotation_to_project(
             self,
             annotation_item: FAnnotationItem,
             dataset: str,
-            dataset_type: str = DATASETS
+            dataset_type: str = DATASETS,
+            label_writer: Optional[ULabelWriter] = None,
+            file_placer: Optional[UFilePlacer] = None
     ):
         if not os.path.exists(annotation_item.get_image_path()):
             return
@@ -434,19 +777,39 @@ class UTrainProject:
         target_image_path = os.path.join(image_dir, image_name).replace('\\', '/')
 
         ann_data = annotation_item.get_annotation_data()
-        annotation_list = self._get_ref_to_annotation_dict(dataset_type).get(dataset, [])
-        if annotation_item in annotation_list:
+        found_item = self.find_annotation(annotation_item, dataset_type) \
+            if annotation_item.get_dataset_name() == dataset else None
+        if found_item is not None:
             # Изменение аннотаций в памяти проекта
-            annotation_list[annotation_list.index(annotation_item)].update_annotation_data(ann_data)
+            found_item.update_annotation_data(ann_data)
         else:
-            # Копирование изображения
-            shutil.copy2(annotation_item.get_image_path(), target_image_path)
+            # Копирование изображения или ссылка на него
+            if file_placer is not None:
+                file_placer.place(annotation_item.get_image_path(), target_image_path)
+            else:
+                shutil.copy2(annotation_item.get_image_path(), target_image_path)
             # Изменение аннотаций и запись их в память проекта
-            new_ann_item = FAnnotationItem(ann_data, target_image_path, dataset)
+            new_ann_item = FAnnotationItem(ann_data, target_image_path, dataset, annotation_item.resolution)
             error = self.add_annotation(dataset, new_ann_item, dataset_type)
             print(error)
 
         # Запись аннотаций в файл
+        label_files = self.get_label_files(image_name, ann_data, dataset, dataset_type)
+        if label_writer is not None:
+            label_writer.submit(label_files)
+        else:
+            write_label_files(label_files)
+
+    def get_label_files(
+            self,
+            image_name: str,
+            ann_data: list[FAnnotationData],
+            dataset: str,
+            dataset_type: str = DATASETS
+    ) -> dict[str, list[str]]:
+        # Рамки записываются в labels, полигоны в labels_seg, каждый файл один раз
+        label_name = os.path.splitext(image_name)[0] + ".txt"
+        label_files: dict[str, list[str]] = dict()
         for annotation in ann_data:
             if isinstance(annotation, FDetectAnnotationData):
                 label_dir = self._get_dir_path(dataset, dataset_type, LABELS)
@@ -454,13 +817,24 @@ class UTrainProject:
                 label_dir = self._get_dir_path(dataset, dataset_type, LABELS_SEGM)
             else:
                 continue
-
-            pathlib.Path(label_dir).mkdir(parents=True, exist_ok=True)
-            target_label_path = os.path.join(label_dir, os.path.splitext(image_name)[0] + ".txt").replace('\\', '/')
-
-            with open(target_label_path, "w") as save_file:
-                ann_lines = [str(ann_line) + '\n' for ann_line in ann_data]
-                save_file.writelines(ann_lines)
+            target_label_path = os.path.join(label_dir, label_name).replace('\\', '/')
+            label_files.setdefault(target_label_path, list()).append(str(annotation) + '\n')
+        return label_files
+
+    def get_file_placer(self) -> UFilePlacer:
+        if self.use_blob_store:
+            return UBlobFilePlacer(UBlobStore(self.path))
+        return UFilePlacer(self.file_placement)
+
+    def release_dataset_blobs(self, dataset_name: str, type_dataset: str = DATASETS):
+        # После удаления папки датасета удаляются блобы, на которые больше нет ссылок
+        if not self.use_blob_store:
+            return
+        blob_store = UBlobStore(self.path)
+        blob_store.remove_manifest(dataset_name, type_dataset)
+        freed = blob_store.collect_garbage()
+        if freed:
+            print(f"Из хранилища изображений проекта {self.name} освобождено {freed} байт")
 
     def create_dataset_dir(self, dataset_name: str, dataset_type: str = DATASETS):
         dataset = self.get_dataset_path(dataset_name, dataset_type)
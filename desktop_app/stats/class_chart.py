@@ -9,8 +9,8 @@ class FCountColor:
         self.count = count
         self.color = color
 
-    def increment_count(self):
-        self.count += 1
+    def increment_count(self, value: int = 1):
+        self.count += value
 
     def __str__(self):
         return f"{self.count}: {self.color}"
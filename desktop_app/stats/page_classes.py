@@ -1,16 +1,24 @@
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QColor
-from PyQt5.QtWidgets import QWidget, QAbstractItemView, QMessageBox
+from PyQt5.QtWidgets import QWidget, QAbstractItemView, QMessageBox, QInputDialog
 
 from stats.class_chart import FCountColor
 from commander import UGlobalSignalHolder
+from dataset.annotation_table import FTableAnnotationItem
+from dataset.loader import UDatasetLazyLoader
 from design.classes_page import Ui_classes_page_design
-from project import UTrainProject
+from project import UTrainProject, DATASETS
 from utility import UMessageBox, EAnnotationType
 
 
 class UPageClasses(QWidget, Ui_classes_page_design):
-    def __init__(self, commander: UGlobalSignalHolder, project: UTrainProject, parent = None):
+    def __init__(
+            self,
+            commander: UGlobalSignalHolder,
+            project: UTrainProject,
+            lazy_loader: UDatasetLazyLoader,
+            parent = None
+    ):
         super().__init__(parent)
         self.setupUi(self)
 
@@ -19,7 +27,12 @@ class UPageClasses(QWidget, Ui_classes_page_design):
 
         self.list_classes.setSelectionMode(QAbstractItemView.NoSelection)
 
+        # Статистика пересчитывается при показе страницы, чтобы не загружать все датасеты при открытии проекта
+        self.lazy_loader = lazy_loader
+        self.is_chart_outdated = True
+
         self.button_add_class.clicked.connect(self.add_class_to_project)
+        self.list_classes.class_selected.connect(self.rename_class)
 
         self.combo_type.currentIndexChanged.connect(self.handle_on_type_changed)
         self.combo_type.set_members({
@@ -30,9 +43,25 @@ class UPageClasses(QWidget, Ui_classes_page_design):
         self.combo_type.setCurrentIndex(0)
 
         if self.commander:
-            self.commander.project_load_complete.connect(self.update_chart_statistics)
+            self.commander.project_load_complete.connect(self.mark_chart_outdated)
             self.commander.project_load_complete.connect(self.update_classes)
-            self.commander.project_updated_datasets.connect(self.update_chart_statistics)
+            self.commander.project_updated_datasets.connect(self.mark_chart_outdated)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.is_chart_outdated:
+            self.load_chart_statistics()
+
+    def mark_chart_outdated(self):
+        self.is_chart_outdated = True
+        if self.isVisible():
+            self.load_chart_statistics()
+
+    def load_chart_statistics(self):
+        self.is_chart_outdated = False
+        self.lazy_loader.ensure_loaded(
+            self.project.get_datasets(), DATASETS, self.update_chart_statistics, overlay_parent=self
+        )
 
     def add_class_to_project(self):
         class_name = self.lineedit_enter_class.text()
@@ -48,6 +77,23 @@ class UPageClasses(QWidget, Ui_classes_page_design):
                 self.project.save()
                 UMessageBox.show_ok(f"Добавлен новый класс {class_name} в проект!")
 
+    def rename_class(self, class_id: int, name: str, color: QColor):
+        class_name, is_ok = QInputDialog.getText(self, "Переименование класса", "Новое название класса:", text=name)
+        class_name = class_name.strip()
+        if not is_ok or not class_name or class_name == name:
+            return
+        if len(class_name) < 3:
+            UMessageBox.show_error("Название класса должно быть не короче 3 символов!")
+            return
+        error = self.project.classes.rename_class(class_id, class_name)
+        if error:
+            UMessageBox.show_error(error)
+            return
+        self.commander.classes_updated.emit()
+        self.update_classes()
+        self.update_chart_statistics()
+        self.project.save()
+
     def update_classes(self):
         self.list_classes.clear()
         for class_id in self.project.classes.get_all_ids():
@@ -70,8 +116,22 @@ class UPageClasses(QWidget, Ui_classes_page_design):
                     0,
                     self.project.classes.get_color(key) or QColor("LightGrey")
                 )
+        # Подсчет по колоночным таблицам датасетов
+        for class_id, count in self.project.count_classes(
+                list(dict_classes.keys()), self.combo_type.get_current_enum()
+        ).items():
+            class_name = self.project.classes.get_name(class_id) or str(class_id)
+            if not class_name in count_classes:
+                count_classes[class_name] = FCountColor(
+                    0,
+                    self.project.classes.get_color(class_id) or QColor("LightGrey")
+                )
+            count_classes[class_name].increment_count(count)
+
         for key, value in dict_classes.items():
             for item in value:
+                if isinstance(item, FTableAnnotationItem):
+                    continue
                 data = item.get_annotation_data()
                 for class_t in data:
                     if class_t.get_annotation_type() not in self.combo_type.get_current_enum():
@@ -30,4 +30,21 @@ class UProgressThread(QThread):
         self._is_running = False
 
     def set_finish_params(self, params: tuple):
-        self.finish_params = params
\ No newline at end of file
+        self.finish_params = params
+
+
+class UBatchProgressThread(UProgressThread):
+    """
+    Обработка всего списка одним вызовом func(data_list, *args, on_processed, is_stopped).
+    Функция сама сообщает об обработанных элементах через on_processed(item, ...) и проверяет is_stopped()
+    """
+    def run(self):
+        processed = 0
+
+        def on_processed(item, *_):
+            nonlocal processed
+            self.signal_on_process_item.emit(processed, self.count, item)
+            processed += 1
+
+        self.process_func(self.data_list, *self.args, on_processed, lambda: not self._is_running)
+        self.signal_on_finish.emit(self.finish_params)
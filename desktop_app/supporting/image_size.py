@@ -0,0 +1,114 @@
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+# Модуль используется в рабочих процессах загрузчика, поэтому не должен импортировать PyQt5
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Маркеры SOF, в которых записано разрешение JPEG (кроме DHT, JPG и DAC)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Маркеры без поля длины
+JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+
+# LRU кэш: путь -> ((время изменения, размер файла), разрешение). Как в индексе аннотаций,
+# запись считается устаревшей при изменении времени или размера файла
+SIZE_CACHE_LIMIT = 65536
+_size_cache: OrderedDict[str, tuple[tuple[int, int], tuple[int, int]]] = OrderedDict()
+_size_cache_lock = threading.Lock()
+
+
+def _read_png_size(file) -> tuple[int, int] | None:
+    header = file.read(24)
+    if len(header) < 24 or header[:8] != PNG_SIGNATURE or header[12:16] != b"IHDR":
+        return None
+    width, height = struct.unpack(">II", header[16:24])
+    return width, height
+
+
+def _read_jpeg_size(file) -> tuple[int, int] | None:
+    if file.read(2) != b"\xff\xd8":
+        return None
+    while True:
+        byte = file.read(1)
+        if not byte:
+            return None
+        if byte != b"\xff":
+            continue
+        # Пропуск байтов заполнения между маркерами
+        marker = file.read(1)
+        while marker == b"\xff":
+            marker = file.read(1)
+        if not marker:
+            return None
+
+        marker_code = marker[0]
+        if marker_code in JPEG_STANDALONE_MARKERS or marker_code == 0x00:
+            continue
+        if marker_code == 0xD9 or marker_code == 0xDA:
+            # Конец файла или начало данных изображения до SOF
+            return None
+
+        length_bytes = file.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if marker_code in JPEG_SOF_MARKERS:
+            data = file.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack(">HH", data[1:5])
+            return width, height
+        file.seek(length - 2, os.SEEK_CUR)
+
+
+def read_image_header_size(image_path: str) -> tuple[int, int] | None:
+    # Разрешение из заголовка PNG (IHDR) или JPEG (SOF) без декодирования изображения
+    with open(image_path, "rb") as file:
+        signature = file.read(2)
+        file.seek(0)
+        if signature == b"\xff\xd8":
+            return _read_jpeg_size(file)
+        if signature == PNG_SIGNATURE[:2]:
+            return _read_png_size(file)
+    return None
+
+
+def read_image_size(image_path: str) -> tuple[int, int]:
+    size = read_image_header_size(image_path)
+    if size is not None and size[0] > 0 and size[1] > 0:
+        return size
+
+    # Остальные форматы и нестандартные заголовки читаются через imageio
+    import imageio.v3 as iio
+    width_res, height_res = iio.immeta(image_path)["shape"]
+    return width_res, height_res
+
+
+def get_image_size(image_path: str, image_stat: os.stat_result = None) -> tuple[int, int]:
+    """
+    Возвращает (ширина, высота) изображения. Результат кэшируется по пути, времени изменения и размеру файла.
+    Если stat файла уже получен (например, из os.scandir), его можно передать, чтобы не обращаться к диску
+    """
+    if image_stat is None:
+        image_stat = os.stat(image_path)
+    stamp = (image_stat.st_mtime_ns, image_stat.st_size)
+
+    with _size_cache_lock:
+        cached = _size_cache.get(image_path)
+        if cached is not None and cached[0] == stamp:
+            _size_cache.move_to_end(image_path)
+            return cached[1]
+
+    size = read_image_size(image_path)
+    with _size_cache_lock:
+        _size_cache[image_path] = (stamp, size)
+        _size_cache.move_to_end(image_path)
+        while len(_size_cache) > SIZE_CACHE_LIMIT:
+            _size_cache.popitem(last=False)
+    return size
+
+
+def clear_image_size_cache():
+    with _size_cache_lock:
+        _size_cache.clear()
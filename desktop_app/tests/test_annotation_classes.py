@@ -0,0 +1,27 @@
+from dataset.annotation_table import FAnnotationTable
+from dataset.label_parser import LABEL_BOX
+from utility import FAnnotationClasses, FAnnotationData
+
+
+def test_rename_class_is_visible_in_annotations():
+    classes = FAnnotationClasses()
+    classes.add_classes_from_strings(["cat", "dog"])
+    FAnnotationData.set_classes(classes)
+    table = FAnnotationTable()
+    item = table.add_parsed_item("image.jpg", "dataset", LABEL_BOX, (100, 100), [(10, 10, 20, 20, 0, 1)])
+
+    assert classes.rename_class(1, "wolf") is None
+    annotation, = item.annotation_list
+    assert annotation.get_class_name() == "wolf"
+    assert annotation.copy().get_class_name() == "wolf"
+
+
+def test_rename_class_refuses_missing_and_duplicate_names():
+    classes = FAnnotationClasses()
+    classes.add_classes_from_strings(["cat", "dog"])
+
+    assert classes.rename_class(5, "wolf") is not None
+    assert classes.rename_class(1, "cat") is not None
+    assert classes.get_name(1) == "dog"
+    # Прежнее имя того же класса допустимо
+    assert classes.rename_class(1, "dog") is None
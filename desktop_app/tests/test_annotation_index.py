@@ -0,0 +1,67 @@
+import os
+
+from dataset.annotation_index import UAnnotationIndex
+from dataset.label_parser import LABEL_BOX
+
+ROWS = [(10, 20, 30, 40, 1, 0)]
+
+
+def create_pair(folder, name: str, label_text: str = "0 0.5 0.5 0.1 0.1\n"):
+    label_path = os.path.join(folder, "labels", name + ".txt")
+    image_path = os.path.join(folder, "images", name + ".png")
+    os.makedirs(os.path.dirname(label_path), exist_ok=True)
+    os.makedirs(os.path.dirname(image_path), exist_ok=True)
+    with open(label_path, "w") as file:
+        file.write(label_text)
+    with open(image_path, "wb") as file:
+        file.write(b"image")
+    return label_path, image_path
+
+
+def save_entry(dataset_path: str, label_path: str, image_path: str):
+    index = UAnnotationIndex(dataset_path)
+    assert index.open() is None
+    assert index.get(label_path, os.stat(label_path), image_path, os.stat(image_path)) is None
+    index.put(label_path, os.stat(label_path), image_path, os.stat(image_path), LABEL_BOX, (100, 50), ROWS)
+    index.commit()
+    index.close()
+
+
+def get_entry(dataset_path: str, label_path: str, image_path: str):
+    index = UAnnotationIndex(dataset_path)
+    index.open()
+    entry = index.get(label_path, os.stat(label_path), image_path, os.stat(image_path))
+    index.commit()
+    index.close()
+    return entry
+
+
+def test_unchanged_label_is_read_from_index(tmp_path):
+    label_path, image_path = create_pair(tmp_path, "image")
+    save_entry(str(tmp_path), label_path, image_path)
+    assert get_entry(str(tmp_path), label_path, image_path) == ((100, 50), ROWS)
+
+
+def test_changed_label_or_image_invalidates_entry(tmp_path):
+    label_path, image_path = create_pair(tmp_path, "image")
+    save_entry(str(tmp_path), label_path, image_path)
+
+    with open(label_path, "a") as file:
+        file.write("1 0.2 0.2 0.1 0.1\n")
+    assert get_entry(str(tmp_path), label_path, image_path) is None
+
+    save_entry(str(tmp_path), label_path, image_path)
+    stat = os.stat(image_path)
+    os.utime(image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert get_entry(str(tmp_path), label_path, image_path) is None
+
+
+def test_entries_of_removed_labels_are_deleted(tmp_path):
+    first = create_pair(tmp_path, "first")
+    second = create_pair(tmp_path, "second")
+    save_entry(str(tmp_path), *first)
+    # При следующей загрузке запрошен только второй файл, запись первого удаляется при сохранении
+    save_entry(str(tmp_path), *second)
+
+    assert UAnnotationIndex.count_entries(str(tmp_path)) == 1
+    assert get_entry(str(tmp_path), *first) is None
@@ -0,0 +1,95 @@
+import numpy as np
+
+from dataset.annotation_table import FAnnotationTable, COMPACT_RATIO
+from dataset.label_parser import LABEL_BOX, LABEL_POLYGON
+from utility import EAnnotationType
+
+BOXES = [EAnnotationType.BoundingBox]
+
+
+def add_image(table: FAnnotationTable, class_ids: list[int]):
+    rows = [(10, 10, 20, 20, index, class_id) for index, class_id in enumerate(class_ids)]
+    return table.add_parsed_item("image.jpg", "dataset", LABEL_BOX, (100, 100), rows)
+
+
+def test_filter_masks_match_brute_force():
+    table = FAnnotationTable(capacity=4)
+    classes = [[0], [1], [0, 1], [], [2]]
+    for class_ids in classes:
+        add_image(table, class_ids)
+
+    mask = table.filter_images({1}, BOXES)
+    expected = [1 in class_ids or not class_ids for class_ids in classes]
+    assert mask.tolist() == expected
+
+
+def test_filter_after_images_added_past_mask_capacity():
+    # Маска класса 1 не растет, пока добавляются изображения только с классом 0
+    table = FAnnotationTable(capacity=4)
+    add_image(table, [1])
+    table.filter_images({0, 1}, BOXES)
+    for _ in range(10):
+        add_image(table, [0])
+
+    mask = table.filter_images({0, 1}, BOXES)
+    assert len(mask) == 11
+    assert mask.all()
+    assert table.filter_images({1}, BOXES).tolist() == [True] + [False] * 10
+
+
+def test_class_index_follows_annotation_changes():
+    table = FAnnotationTable(capacity=4)
+    item = add_image(table, [0])
+    add_image(table, [1])
+    assert table.filter_images({0}, BOXES).tolist() == [True, False]
+
+    annotation, = item.annotation_list
+    annotation.class_id = 1
+    assert table.filter_images({0}, BOXES).tolist() == [False, False]
+
+    item.remove_from_table()
+    # Изображение без аннотаций проходит любой фильтр
+    assert table.filter_images({0}, BOXES).tolist() == [True, False]
+    assert np.array_equal(table.filter_images({1}, BOXES), [True, True])
+
+
+def test_compaction_keeps_annotations_and_views():
+    table = FAnnotationTable(capacity=4)
+    items = [add_image(table, [index % 3, 1]) for index in range(600)]
+    polygon_item = table.add_parsed_item(
+        "polygon.jpg", "dataset", LABEL_POLYGON, (100, 100), [([(1, 1), (5, 1), (5, 5)], 0, 2)]
+    )
+    view = items[-1].annotation_list[0]
+    polygon_view, = polygon_item.annotation_list
+    polygon_view.points_list = [(1, 1), (9, 1), (9, 9), (1, 9)]
+
+    # Каждое изменение помечает прежние строки невалидными, пока их не станет больше половины
+    for item in items[:450]:
+        item.annotation_list = item.annotation_list[:1]
+    assert table.invalid_boxes < table.boxes_count * COMPACT_RATIO
+    assert table.boxes_count - table.invalid_boxes == 750 and table.boxes_count < 1200
+
+    expected = [[annotation.class_id for annotation in item.annotation_list] for item in items]
+    assert expected[:450] == [[index % 3] for index in range(450)]
+    assert expected[450:] == [[index % 3, 1] for index in range(450, 600)]
+    # Представления находят свою строку после сжатия
+    assert view.class_id == 599 % 3 and view.get_bbox() == (10, 10, 20, 20)
+    view.class_id = 1
+    assert table.filter_images({1}, BOXES)[599]
+    # Прежние точки полигона освобождаются при сжатии
+    table.compact()
+    assert polygon_view.points_list == [(1, 1), (9, 1), (9, 9), (1, 9)]
+    assert table.points_count == 4 and table.invalid_points == 0
+
+
+def test_compaction_after_removing_images():
+    table = FAnnotationTable(capacity=4)
+    items = [add_image(table, [0, 1, 2]) for _ in range(500)]
+    for item in items[:300]:
+        item.remove_from_table()
+
+    assert table.boxes_count - table.invalid_boxes == 600 and table.boxes_count < 1500
+    assert all(item.annotation_list == [] for item in items[:300])
+    assert [annotation.class_id for annotation in items[-1].annotation_list] == [0, 1, 2]
+    assert table.count_classes(BOXES) == {0: 200, 1: 200, 2: 200}
+    assert table.filter_images({2}, BOXES).all()
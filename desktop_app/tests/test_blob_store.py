@@ -0,0 +1,72 @@
+import errno
+import os
+
+import pytest
+
+from dataset.blob_store import UBlobStore, UBlobFilePlacer
+
+
+@pytest.fixture
+def project(tmp_path):
+    source = tmp_path / "source.jpg"
+    source.write_bytes(b"image" * 100)
+    images = tmp_path / "project" / "datasets" / "first" / "images"
+    images.mkdir(parents=True)
+    return tmp_path / "project", str(source), str(images)
+
+
+def get_blobs(project_path) -> list[str]:
+    return [
+        os.path.join(folder, name)
+        for folder, _, names in os.walk(os.path.join(project_path, "blobs"))
+        if "manifests" not in folder for name in names
+    ]
+
+
+def test_linked_images_share_blob(project):
+    project_path, source, images = project
+    blob_store = UBlobStore(str(project_path))
+    placer = UBlobFilePlacer(blob_store)
+    first = placer.place(source, os.path.join(images, "a.jpg"))
+    second = placer.place(source, os.path.join(images, "b.jpg"))
+    placer.flush()
+
+    blob, = get_blobs(project_path)
+    assert os.path.samefile(first, blob) and os.path.samefile(second, blob)
+    assert set(blob_store.get_manifest("datasets", "first")) == {"a.jpg", "b.jpg"}
+
+
+def test_failed_link_copies_without_manifest_entry(project, monkeypatch):
+    project_path, source, images = project
+
+    def link(source_path, target_path):
+        raise OSError(errno.EXDEV, "cross-device link")
+
+    monkeypatch.setattr(os, "link", link)
+    blob_store = UBlobStore(str(project_path))
+    placer = UBlobFilePlacer(blob_store)
+    target = placer.place(source, os.path.join(images, "a.jpg"))
+    placer.flush()
+
+    assert os.stat(target).st_nlink == 1
+    assert blob_store.get_manifest("datasets", "first") == {}
+    blob_store.collect_garbage()
+    assert os.path.exists(target)
+
+
+def test_garbage_collection_keeps_blobs_in_manifests(project):
+    project_path, source, images = project
+    blob_store = UBlobStore(str(project_path))
+    placer = UBlobFilePlacer(blob_store)
+    target = placer.place(source, os.path.join(images, "a.jpg"))
+    placer.flush()
+
+    # Запись манифеста удерживает блоб, даже если жесткой ссылки уже нет
+    os.remove(target)
+    assert blob_store.collect_garbage() == 0
+    assert len(get_blobs(project_path)) == 1
+
+    blob_store.unlink(target)
+    blob_store.flush()
+    assert blob_store.collect_garbage() > 0
+    assert get_blobs(project_path) == []
@@ -0,0 +1,123 @@
+import time
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from annotation.carousel import UCarouselImageLoader, UThumbnailCarousel
+from benchmarks.synthetic import write_png
+
+
+@pytest.fixture(scope="module")
+def application():
+    return QApplication.instance() or QApplication([])
+
+
+class FThumbnail:
+    # Минимальная миниатюра: загрузчику нужны только путь, размер и установка изображения
+    def __init__(self, image_path: str, width: int = 64, height: int = 48):
+        self.image_path = image_path
+        self.width = width
+        self.height = height
+        self.pixmaps = list()
+
+    def get_image_path(self):
+        return self.image_path
+
+    def get_width(self):
+        return self.width
+
+    def get_height(self):
+        return self.height
+
+    def set_pixmap(self, pixmap):
+        self.pixmaps.append(pixmap)
+
+
+@pytest.fixture
+def loader(application):
+    loader = UCarouselImageLoader(workers=1)
+    yield loader
+    loader.shutdown()
+
+
+def wait_loaded(loader: UCarouselImageLoader):
+    deadline = time.perf_counter() + 10
+    while loader.waiting and time.perf_counter() < deadline:
+        loader.send_loaded_images()
+        time.sleep(0.01)
+
+
+def test_cached_image_is_reused(loader, tmp_path):
+    image_path = str(tmp_path / "image.png")
+    write_png(image_path, 320, 240)
+
+    first = FThumbnail(image_path)
+    loader.request(first, 0)
+    wait_loaded(loader)
+    assert len(first.pixmaps) == 1 and not first.pixmaps[0].isNull()
+
+    # Та же миниатюра после очистки карусели берется из кэша без постановки в пул
+    loader.clear()
+    loader.pool.submit = lambda *args: pytest.fail("изображение из кэша не должно загружаться повторно")
+    second = FThumbnail(image_path)
+    loader.request(second, 0)
+    assert second.pixmaps == first.pixmaps and not loader.waiting
+
+    # Другой размер миниатюры - другой ключ кэша
+    assert loader.pixmap_cache.get(loader.get_key(FThumbnail(image_path, 32, 24))) is None
+
+
+def test_cancel_keeps_shared_request(loader):
+    submitted, cancelled = list(), list()
+    loader.pool.submit = lambda key, payload, priority: submitted.append((key, priority))
+    loader.pool.cancel = lambda keys: cancelled.extend(keys)
+
+    first, second = FThumbnail("image.png"), FThumbnail("image.png")
+    loader.request(first, 2)
+    loader.request(second, 1)
+    # Повторный запрос той же миниатюры только меняет приоритет
+    loader.request(first, 0)
+    key = loader.get_key(first)
+    assert submitted == [(key, 2), (key, 1), (key, 0)]
+    assert loader.waiting[key] == [first, second]
+
+    # Загрузка отменяется, когда ее больше не ждет ни одна миниатюра
+    loader.cancel(first)
+    assert not cancelled
+    loader.cancel(second)
+    loader.cancel(second)
+    assert cancelled == [key] and key not in loader.waiting
+
+
+@pytest.fixture
+def carousel(application):
+    carousel = UThumbnailCarousel()
+    carousel.resize(1000, 240)
+    yield carousel
+    carousel.image_loader.shutdown()
+    carousel.frame_prefetcher.shutdown()
+
+
+def test_display_range_is_empty_without_sources(carousel):
+    assert carousel.get_display_range() == range(0)
+
+
+def test_display_range_at_edges(carousel):
+    carousel.sources = [f"{index}.png" for index in range(100)]
+    carousel.update()
+    pitch = carousel.get_pitch()
+
+    # Начало полосы: запас слева обрезается нулем
+    carousel.horizontalScrollBar().setValue(0)
+    display_range = carousel.get_display_range()
+    right = carousel.viewport().width() + carousel.display_margin
+    assert display_range.start == 0 and display_range.stop - 1 == right // pitch
+
+    # Конец полосы: запас справа обрезается последним индексом
+    carousel.horizontalScrollBar().setValue(carousel.horizontalScrollBar().maximum())
+    display_range = carousel.get_display_range()
+    assert display_range.stop == 100 and display_range.start > 0
+    left = carousel.mapToScene(carousel.viewport().rect().topLeft()).x() - carousel.display_margin
+    # Первая миниатюра диапазона пересекается с областью, предыдущая - нет
+    assert display_range.start * pitch + carousel.thumbnail_width > left
+    assert (display_range.start - 1) * pitch + carousel.thumbnail_width <= left
@@ -0,0 +1,126 @@
+import os
+
+import pytest
+from PyQt5.QtCore import Qt, QCoreApplication
+
+from benchmarks.synthetic import create_dataset
+from dataset.loader import UThreadDatasetLoadAnnotations, UDatasetLazyLoader
+from project import UTrainProject, DATASETS
+from utility import EAnnotationType
+
+IMAGES_COUNT = 40
+BOXES = [EAnnotationType.BoundingBox]
+
+
+@pytest.fixture(scope="module")
+def application():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = UTrainProject()
+    project.path = str(tmp_path).replace('\\', '/')
+    project.datasets = ["first", "second"]
+    for dataset in project.datasets:
+        create_dataset(os.path.join(project.path, DATASETS, dataset), IMAGES_COUNT, polygons_every=0)
+    project._init_dicts()
+    return project
+
+
+def run_thread(thread: UThreadDatasetLoadAnnotations):
+    thread.start()
+    assert thread.wait(30000)
+
+
+def test_streamed_load_reaches_full_progress(application, project, capsys):
+    # Аннотация без изображения не разбирается и не должна учитываться в общем количестве
+    with open(os.path.join(project.path, DATASETS, "first", "labels", "orphan.txt"), "w") as file:
+        file.write("0 0.5 0.5 0.1 0.1\n")
+    thread = UThreadDatasetLoadAnnotations(project, ["first"], DATASETS, workers=1, chunk_size=8, use_index=False)
+    progress, batches = list(), list()
+    thread.signal_loaded_label.connect(lambda _, current, total: progress.append((current, total)), Qt.DirectConnection)
+    thread.signal_loaded_batch.connect(lambda _, __, batch: batches.append(len(batch)), Qt.DirectConnection)
+    run_thread(thread)
+
+    assert progress[-1] == (IMAGES_COUNT, IMAGES_COUNT)
+    assert sum(batches) == IMAGES_COUNT
+    assert project.is_dataset_loaded("first", DATASETS)
+    assert thread.scan_reports[(DATASETS, "first")].orphan_labels
+    # Отчет о непарных файлах хранится в scan_reports и не выводится в консоль
+    assert "без изображений" not in capsys.readouterr().out
+
+
+def test_interrupted_load_leaves_dataset_unloaded(application, project):
+    thread = UThreadDatasetLoadAnnotations(
+        project, ["first", "second"], DATASETS, workers=1, chunk_size=8, use_index=False
+    )
+    # Прерывание после первой пачки, как при выборе другого датасета в галерее
+    thread.signal_loaded_batch.connect(lambda *_: thread.requestInterruption(), Qt.DirectConnection)
+    ended = list()
+    thread.signal_end_load.connect(ended.append, Qt.DirectConnection)
+    run_thread(thread)
+
+    assert thread.interrupted_dataset == ("first", DATASETS)
+    assert not ended
+    assert not project.is_dataset_loaded("first", DATASETS)
+    assert 0 < len(project.current_annotations["first"]) < IMAGES_COUNT
+
+    project.discard_dataset_annotations("first", DATASETS)
+    assert project.current_annotations["first"] == []
+    # После прерывания датасет загружается заново целиком
+    run_thread(UThreadDatasetLoadAnnotations(project, ["first"], DATASETS, workers=1, chunk_size=8, use_index=False))
+    assert len(project.current_annotations["first"]) == IMAGES_COUNT
+
+
+def test_lazy_loader_applies_batches_in_main_thread(application, project):
+    lazy_loader = UDatasetLazyLoader(project, None)
+    batches, ended = list(), list()
+    lazy_loader.ensure_loaded(["first"], DATASETS, lambda: ended.append(True), lambda *args: batches.append(args[2]))
+    assert lazy_loader.thread_load.wait(30000)
+    # Поток только разбирает файлы: пока главный поток не обработал сигналы, проект не изменен
+    assert project.current_annotations["first"] == []
+    assert not project.is_dataset_loaded("first", DATASETS)
+
+    application.processEvents()
+    assert ended
+    assert project.is_dataset_loaded("first", DATASETS)
+    assert sum(len(batch) for batch in batches) == len(project.current_annotations["first"]) == IMAGES_COUNT
+    assert len(project.get_annotation_table("first", DATASETS).filter_images({0}, BOXES)) == IMAGES_COUNT
+
+
+def test_lazy_loader_cancel_drops_queued_batches(application, project):
+    lazy_loader = UDatasetLazyLoader(project, None)
+    batches = list()
+    lazy_loader.ensure_loaded(["first", "second"], DATASETS, lambda: None, lambda *args: batches.append(args))
+    assert lazy_loader.thread_load.wait(30000)
+
+    assert lazy_loader.cancel()
+    application.processEvents()
+    assert not batches
+    for dataset in ("first", "second"):
+        assert not project.is_dataset_loaded(dataset, DATASETS)
+        assert project.current_annotations[dataset] == []
+
+
+def test_lazy_loader_queues_overlapping_requests(application, project):
+    lazy_loader = UDatasetLazyLoader(project, None)
+    first_batches, second_batches, ended = list(), list(), list()
+    lazy_loader.ensure_loaded(
+        ["first"], DATASETS, lambda: ended.append("first"), lambda *args: first_batches.append(args)
+    )
+    # Запрос другой страницы ждет в очереди и не запускает второй поток для того же датасета
+    lazy_loader.ensure_loaded(
+        ["first", "second"], DATASETS, lambda: ended.append("second"), lambda *args: second_batches.append(args)
+    )
+    assert len(lazy_loader.requests) == 1
+
+    while lazy_loader.is_running() or lazy_loader.requests:
+        lazy_loader.thread_load.wait(30000)
+        application.processEvents()
+
+    assert ended == ["first", "second"]
+    assert len(project.current_annotations["first"]) == len(project.current_annotations["second"]) == IMAGES_COUNT
+    # Датасет, загруженный первым запросом, передается ожидавшему запросу одной пачкой
+    assert second_batches[0][0] == "first" and len(second_batches[0][2]) == IMAGES_COUNT
+    assert sum(len(batch) for dataset, _, batch in second_batches if dataset == "second") == IMAGES_COUNT
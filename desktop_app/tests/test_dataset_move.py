@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from dataset.dataset_move import UDatasetMove, get_journal_path
+from project import UTrainProject, DATASETS, RESERVED
+
+
+@pytest.fixture
+def project_path(tmp_path):
+    images = tmp_path / DATASETS / "first" / "images"
+    images.mkdir(parents=True)
+    (images / "a.jpg").write_bytes(b"image")
+    (tmp_path / RESERVED).mkdir()
+    return str(tmp_path)
+
+
+def test_crash_before_save_rolls_back(project_path):
+    move = UDatasetMove(project_path, "first", DATASETS, RESERVED)
+    assert move.can_rename()
+    move.rename()
+    # Проект не успел сохраниться: датасет в файле проекта остался в прежнем положении
+    message = UDatasetMove.recover(project_path, lambda dataset, target: False)
+
+    assert message and "Отменен" in message
+    assert os.path.isfile(os.path.join(project_path, DATASETS, "first", "images", "a.jpg"))
+    assert not os.path.exists(os.path.join(project_path, RESERVED, "first"))
+    assert not os.path.exists(get_journal_path(project_path))
+
+
+def test_crash_after_save_completes_move(project_path):
+    move = UDatasetMove(project_path, "first", DATASETS, RESERVED)
+    move.rename()
+    message = UDatasetMove.recover(project_path, lambda dataset, target: (dataset, target) == ("first", RESERVED))
+
+    assert message and "Завершен" in message
+    assert os.path.isfile(os.path.join(project_path, RESERVED, "first", "images", "a.jpg"))
+    assert not os.path.exists(os.path.join(project_path, DATASETS, "first"))
+    assert not os.path.exists(get_journal_path(project_path))
+
+
+def test_unfinished_journal_blocks_next_move(project_path):
+    UDatasetMove(project_path, "first", DATASETS, RESERVED).rename()
+    os.makedirs(os.path.join(project_path, DATASETS, "second"))
+    assert not UDatasetMove(project_path, "second", DATASETS, RESERVED).can_rename()
+
+
+def test_broken_journal_is_removed(project_path):
+    with open(get_journal_path(project_path), "w") as file:
+        file.write("{")
+    assert UDatasetMove.recover(project_path, lambda dataset, target: True) is None
+    assert not os.path.exists(get_journal_path(project_path))
+    assert os.path.isdir(os.path.join(project_path, DATASETS, "first"))
+
+
+def test_project_recovers_move_on_load(project_path):
+    project = UTrainProject()
+    project.name = "project"
+    project.path = project_path
+    project.datasets = ["first"]
+    project.save()
+
+    UDatasetMove(project_path, "first", DATASETS, RESERVED).rename()
+    loaded = UTrainProject()
+    loaded.load(os.path.join(project_path, "project.cfg"))
+
+    assert loaded.datasets == ["first"]
+    assert os.path.isdir(os.path.join(project_path, DATASETS, "first"))
+    assert not os.path.exists(get_journal_path(project_path))
@@ -0,0 +1,101 @@
+import threading
+import time
+
+from dataset.decode_pool import UPriorityWorkerPool
+
+
+def wait_idle(pool: UPriorityWorkerPool, timeout: float = 5) -> list:
+    results = list()
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        results.extend(pool.take_results())
+        if pool.is_idle():
+            return results
+        time.sleep(0.001)
+    raise TimeoutError
+
+
+class FBlockingTask:
+    # Задача, которая ждет разрешения на завершение, чтобы проверить состояние пула во время выполнения
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, payload):
+        self.started.set()
+        self.release.wait(5)
+        return payload
+
+
+def test_results_follow_priority():
+    task = FBlockingTask()
+    order = list()
+
+    def run(payload):
+        if payload == "first":
+            task(payload)
+        order.append(payload)
+        return payload
+
+    pool = UPriorityWorkerPool(run, workers=1)
+    pool.submit("first", "first")
+    assert task.started.wait(5)
+    for key, priority in (("low", 3), ("high", 1), ("middle", 2)):
+        pool.submit(key, key, priority)
+    # Повторная постановка меняет приоритет ожидающего ключа
+    pool.submit("low", "low", 0)
+    task.release.set()
+    wait_idle(pool)
+    pool.shutdown()
+    assert order == ["first", "low", "high", "middle"]
+
+
+def test_cancelled_keys_are_skipped():
+    task = FBlockingTask()
+    pool = UPriorityWorkerPool(task, workers=1)
+    pool.submit(0, 0)
+    assert task.started.wait(5)
+    pool.submit(1, 1)
+    pool.submit(2, 2)
+    pool.cancel([1])
+    assert not pool.is_pending(1)
+    task.release.set()
+    results = wait_idle(pool)
+    pool.shutdown()
+    assert sorted(results) == [(0, 0), (2, 2)]
+
+
+def test_clear_drops_results_of_started_tasks():
+    task = FBlockingTask()
+    pool = UPriorityWorkerPool(task, workers=1)
+    pool.submit(5, "old")
+    assert task.started.wait(5)
+    pool.clear()
+    task.release.set()
+    assert wait_idle(pool) == []
+    pool.shutdown()
+
+
+def test_resubmit_after_clear_while_running():
+    # Ключ, поставленный заново после clear во время выполнения, не теряется
+    task = FBlockingTask()
+    pool = UPriorityWorkerPool(task, workers=1)
+    pool.submit(5, "old")
+    assert task.started.wait(5)
+    pool.clear()
+    pool.submit(5, "new")
+    assert pool.is_pending(5)
+    task.release.set()
+    assert wait_idle(pool) == [(5, "new")]
+    pool.shutdown()
+
+
+def test_resubmit_while_running_is_ignored():
+    task = FBlockingTask()
+    pool = UPriorityWorkerPool(task, workers=2)
+    pool.submit(5, "first")
+    assert task.started.wait(5)
+    pool.submit(5, "second")
+    task.release.set()
+    assert wait_idle(pool) == [(5, "first")]
+    pool.shutdown()
@@ -0,0 +1,69 @@
+import errno
+import os
+
+import pytest
+
+from dataset.export_thread import UExportWorker
+from dataset.file_placement import UFilePlacer, PLACEMENT_AUTO, PLACEMENT_COPY, PLACEMENT_HARDLINK
+from project import UTrainProject
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source.jpg"
+    path.write_bytes(b"image" * 100)
+    target_dir = tmp_path / "target"
+    target_dir.mkdir()
+    return str(path), str(target_dir)
+
+
+def test_default_placement_copies(source):
+    source_path, target_dir = source
+    placer = UFilePlacer()
+    target = placer.place(source_path, target_dir)
+    assert not os.path.samefile(source_path, target)
+    assert placer.stats.copied == 1 and placer.stats.hardlinked == 0
+
+
+def test_auto_placement_links(source):
+    source_path, target_dir = source
+    placer = UFilePlacer(PLACEMENT_AUTO)
+    target = placer.place(source_path, os.path.join(target_dir, "a.jpg"))
+    assert os.path.samefile(source_path, target)
+    assert placer.stats.hardlinked == 1
+
+
+def test_unsupported_link_falls_back_to_copy_once(source, monkeypatch):
+    source_path, target_dir = source
+    calls = list()
+
+    def link(source_link, target_link):
+        calls.append(target_link)
+        raise OSError(errno.EXDEV, "другое устройство")
+
+    monkeypatch.setattr(os, "link", link)
+    placer = UFilePlacer(PLACEMENT_HARDLINK)
+    placer.place(source_path, os.path.join(target_dir, "a.jpg"))
+    placer.place(source_path, os.path.join(target_dir, "b.jpg"))
+    # Для пары устройств жесткая ссылка больше не пробуется
+    assert len(calls) == 1
+    assert placer.stats.copied == 2
+
+
+def test_link_without_fallback_raises(source, monkeypatch):
+    source_path, target_dir = source
+
+    def link(source_link, target_link):
+        raise OSError(errno.EXDEV, "другое устройство")
+
+    monkeypatch.setattr(os, "link", link)
+    placer = UFilePlacer(PLACEMENT_HARDLINK, fallback_copy=False)
+    with pytest.raises(OSError):
+        placer.place(source_path, os.path.join(target_dir, "a.jpg"))
+    assert os.listdir(target_dir) == []
+
+
+def test_export_copies_by_default(tmp_path):
+    assert UTrainProject().export_placement == PLACEMENT_COPY
+    worker = UExportWorker(dict(), str(tmp_path), list())
+    assert worker.file_placer.get_methods() == (PLACEMENT_COPY,)
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from annotation.frame_prefetch import UFramePrefetcher
+from benchmarks.synthetic import write_png
+
+
+@pytest.fixture(scope="module")
+def application():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def prefetcher(application):
+    prefetcher = UFramePrefetcher(radius=2, workers=1)
+    yield prefetcher
+    prefetcher.shutdown()
+
+
+def record_pool(prefetcher: UFramePrefetcher):
+    # Постановки и отмены пула записываются вместо декодирования
+    submitted, cancelled = list(), list()
+    prefetcher.pool.submit = lambda key, payload, priority: submitted.append((key, priority))
+    prefetcher.pool.cancel = lambda keys: cancelled.extend(keys)
+    return submitted, cancelled
+
+
+def get_path(index: int) -> str:
+    return f"{index}.png"
+
+
+def test_neighbours_in_direction_of_travel_go_first(prefetcher):
+    submitted, cancelled = record_pool(prefetcher)
+    prefetcher.prefetch_around(5, 10, get_path)
+    assert sorted(submitted, key=lambda item: item[1]) == [("6.png", 0.5), ("4.png", 1), ("7.png", 1.5), ("3.png", 2)]
+
+    submitted.clear()
+    prefetcher.prefetch_around(4, 10, get_path)
+    # При движении назад раньше загружаются предыдущие изображения
+    assert min(submitted, key=lambda item: item[1]) == ("3.png", 0.5)
+    # Выбранное изображение декодирует сцена, поэтому его загрузка в пуле отменяется
+    assert "4.png" in cancelled and "4.png" not in prefetcher.requested
+
+
+def test_stale_requests_are_cancelled(prefetcher):
+    submitted, cancelled = record_pool(prefetcher)
+    prefetcher.prefetch_around(5, 10, get_path)
+    prefetcher.prefetch_around(8, 10, get_path)
+
+    assert sorted(cancelled) == ["3.png", "4.png"]
+    assert prefetcher.requested == {"6.png", "7.png", "9.png"}
+    # Соседи у края списка не выходят за его границы
+    assert all(0 <= int(key.split(".")[0]) < 10 for key, _ in submitted)
+
+
+def test_prefetched_frame_is_taken_without_decoding(prefetcher, tmp_path):
+    paths = list()
+    for index in range(3):
+        path = str(tmp_path / f"{index}.png")
+        write_png(path, 64, 48)
+        paths.append(path)
+
+    prefetcher.prefetch_around(0, len(paths), lambda index: paths[index])
+    deadline = time.perf_counter() + 10
+    while prefetcher.requested and time.perf_counter() < deadline:
+        prefetcher.take_loaded_frames()
+        time.sleep(0.01)
+
+    frame = prefetcher.get_frame(paths[1])
+    assert frame is not None and frame.matrix.shape == (48, 64, 3)
+    assert prefetcher.stats.stalls == 0 and prefetcher.stats.hits == 1
+
+
+def test_budget_change_evicts_frames(prefetcher, tmp_path):
+    paths = list()
+    for index in range(3):
+        path = str(tmp_path / f"{index}.png")
+        write_png(path, 512, 512)
+        paths.append(path)
+        prefetcher.get_frame(path)
+    assert len(prefetcher.frames) == 3
+
+    prefetcher.set_budget_mb(1)
+    assert len(prefetcher.frames) == 1 and paths[2] in prefetcher.frames
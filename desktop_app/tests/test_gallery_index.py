@@ -0,0 +1,53 @@
+from dataset.annotation_table import FAnnotationTable
+from dataset.gallery_index import UGalleryIndex
+from dataset.label_parser import LABEL_BOX
+from utility import FAnnotationItem, FDetectAnnotationData, EAnnotationType
+
+BOXES = [EAnnotationType.BoundingBox]
+
+
+def create_items(table: FAnnotationTable, classes: list[list[int]]) -> list[FAnnotationItem]:
+    # Изображения чередуются: строки таблицы аннотаций и обычные элементы без таблицы
+    items = list()
+    for index, class_ids in enumerate(classes):
+        if index % 2:
+            rows = [(10, 10, 20, 20, object_id, class_id) for object_id, class_id in enumerate(class_ids)]
+            items.append(table.add_parsed_item(f"{index}.jpg", "dataset", LABEL_BOX, (100, 100), rows))
+        else:
+            annotations = [
+                FDetectAnnotationData(10, 10, 20, 20, object_id, class_id, 100, 100)
+                for object_id, class_id in enumerate(class_ids)
+            ]
+            items.append(FAnnotationItem(annotations, f"{index}.jpg", "dataset", (100, 100)))
+    return items
+
+
+def get_expected(classes: list[list[int]], selected: set[int]) -> list[int]:
+    return [index for index, class_ids in enumerate(classes) if set(class_ids) & selected or not class_ids]
+
+
+def test_filter_matches_brute_force():
+    classes = [[0], [1], [0, 1], [], [2], [2, 1], [], [0]]
+    gallery_index = UGalleryIndex()
+    gallery_index.set_annotations(create_items(FAnnotationTable(capacity=4), classes))
+    gallery_index.filter({0: False, 1: True, 2: False}, BOXES)
+
+    expected = get_expected(classes, {1})
+    assert gallery_index.filtered_order == expected
+    assert gallery_index.filtered_indexes == {index: position for position, index in enumerate(expected)}
+
+
+def test_appended_annotations_use_current_filter():
+    classes = [[0], [1], [2], [1], [], [0], [1, 2], [2]]
+    table = FAnnotationTable(capacity=4)
+    items = create_items(table, classes)
+    gallery_index = UGalleryIndex()
+    gallery_index.set_annotations(items[:3])
+    gallery_index.filter({0: False, 1: True, 2: True}, BOXES)
+
+    # Догрузка датасета: позиции уже показанных изображений не меняются
+    start_position = gallery_index.append_annotations(items[3:])
+    expected = get_expected(classes, {1, 2})
+    assert start_position == len(get_expected(classes[:3], {1, 2}))
+    assert gallery_index.filtered_order == expected
+    assert len(gallery_index) == len(expected)
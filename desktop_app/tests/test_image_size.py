@@ -0,0 +1,41 @@
+import os
+
+from benchmarks.synthetic import write_png
+from supporting import image_size
+from supporting.image_size import get_image_size, clear_image_size_cache
+
+
+def test_png_size_from_header(tmp_path):
+    path = str(tmp_path / "image.png")
+    write_png(path, 64, 48)
+    clear_image_size_cache()
+    assert get_image_size(path) == (64, 48)
+
+
+def test_rewritten_image_is_read_again(tmp_path):
+    path = str(tmp_path / "image.png")
+    write_png(path, 64, 48)
+    clear_image_size_cache()
+    assert get_image_size(path) == (64, 48)
+
+    # Время изменения может совпасть при быстрой перезаписи, тогда запись отличается размером файла
+    stat = os.stat(path)
+    write_png(path, 32, 16)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert get_image_size(path) == (32, 16)
+
+
+def test_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_size, "SIZE_CACHE_LIMIT", 3)
+    clear_image_size_cache()
+    paths = list()
+    for index in range(5):
+        path = str(tmp_path / f"image_{index}.png")
+        write_png(path, 8 + index, 8)
+        paths.append(path)
+        get_image_size(path)
+
+    assert list(image_size._size_cache) == paths[2:]
+    # Повторное обращение переносит запись в конец очереди вытеснения
+    get_image_size(paths[2])
+    assert list(image_size._size_cache) == [paths[3], paths[4], paths[2]]
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from dataset.label_writer import ULabelWriter, write_label_file, write_label_files
+
+
+def read(path) -> str:
+    with open(path) as file:
+        return file.read()
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    label_path = str(tmp_path / "a.txt")
+    write_label_file(label_path, ["0 0.5 0.5 0.1 0.1\n"])
+    # Ошибка посреди записи: первая строка уже записана во временный файл
+    with pytest.raises(TypeError):
+        write_label_file(label_path, ["1 0.5 0.5 0.2 0.2\n", None])
+
+    assert read(label_path) == "0 0.5 0.5 0.1 0.1\n"
+    assert os.listdir(tmp_path) == ["a.txt"]
+
+
+def test_label_folders_are_created(tmp_path):
+    label_path = str(tmp_path / "labels" / "a.txt")
+    write_label_files({label_path: ["0 0.5 0.5 0.1 0.1\n"]})
+    assert read(label_path) == "0 0.5 0.5 0.1 0.1\n"
+
+
+def test_writer_keeps_last_submitted_content(tmp_path):
+    label_path = str(tmp_path / "labels" / "a.txt")
+    with ULabelWriter() as label_writer:
+        for index in range(50):
+            label_writer.submit({label_path: [f"{index} 0.5 0.5 0.1 0.1\n"]})
+        label_writer.flush()
+        assert read(label_path) == "49 0.5 0.5 0.1 0.1\n"
+    assert not label_writer.errors
+    assert 1 <= label_writer.written <= 50
+
+
+def test_writer_collects_errors(tmp_path):
+    # На месте файла аннотаций папка: запись не удается, остальные файлы записываются
+    (tmp_path / "b.txt").mkdir()
+    label_writer = ULabelWriter(max_pending=1)
+    label_writer.submit({str(tmp_path / "a.txt"): ["0\n"], str(tmp_path / "b.txt"): ["1\n"]})
+    errors = label_writer.close()
+
+    assert len(errors) == 1 and "b.txt" in errors[0]
+    assert read(tmp_path / "a.txt") == "0\n"
+    assert sorted(os.listdir(tmp_path)) == ["a.txt", "b.txt"]
@@ -0,0 +1,48 @@
+import os
+
+from dataset.pixmap_cache import UPixmapCache
+from project import UTrainProject
+
+
+def create_cache(budget_mb: float, evicted: list) -> UPixmapCache:
+    # Вместо QPixmap в кэше хранятся размеры значений в байтах
+    return UPixmapCache(budget_mb, evicted.append, get_size=lambda size: size)
+
+
+def test_cache_is_bounded_by_bytes():
+    evicted = list()
+    cache = create_cache(1, evicted)
+    for key in range(4):
+        cache.put(key, 2 ** 18)
+    assert cache.get(0) == 2 ** 18
+
+    cache.put(4, 2 ** 18)
+    # Вытесняется давно не использованное изображение, а не первое добавленное
+    assert evicted == [1]
+    assert cache.used_bytes == 2 ** 20
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (1, 0, 1)
+    assert cache.get(1) is None and cache.stats.misses == 1
+
+
+def test_budget_change_evicts():
+    evicted = list()
+    cache = create_cache(1, evicted)
+    for key in range(4):
+        cache.put(key, 2 ** 18)
+    cache.set_budget_mb(0.5)
+    assert evicted == [0, 1]
+    assert len(cache) == 2
+
+
+def test_gallery_cache_settings_are_saved(tmp_path):
+    project = UTrainProject()
+    project.name = "project"
+    project.path = str(tmp_path)
+    project.gallery_cache_mb = 64.0
+    project.gallery_cache_stats = True
+    project.save()
+
+    loaded = UTrainProject()
+    loaded.load(os.path.join(str(tmp_path), "project.cfg"))
+    assert loaded.gallery_cache_mb == 64.0
+    assert loaded.gallery_cache_stats
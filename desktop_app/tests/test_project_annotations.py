@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from project import UTrainProject, DATASETS, IMAGES, LABELS
+from supporting.custom_threads import UBatchProgressThread
+from utility import FAnnotationItem
+
+IMAGES_COUNT = 6
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = UTrainProject()
+    project.path = str(tmp_path).replace('\\', '/')
+    project.datasets = ["first"]
+    project._init_dicts()
+    project.create_dataset_dir("first")
+    for index in range(IMAGES_COUNT):
+        image_path = os.path.join(project.path, DATASETS, "first", IMAGES, f"image_{index}.jpg").replace('\\', '/')
+        open(image_path, "wb").close()
+        open(os.path.join(project.path, DATASETS, "first", LABELS, f"image_{index}.txt"), "w").close()
+        project.add_annotation("first", FAnnotationItem([], image_path, "first", (100, 100)))
+    project.set_dataset_loaded("first")
+    return project
+
+
+def test_remove_annotations_updates_lookup_and_files(project):
+    items = list(project.current_annotations["first"])
+    errors = project.remove_annotations(items[:2])
+
+    assert errors == []
+    assert project.current_annotations["first"] == items[2:]
+    for item in items[:2]:
+        assert project.find_annotation(item) is None
+        assert not os.path.exists(item.get_image_path())
+    assert project.find_annotation(items[2]) is items[2]
+
+
+def test_batch_delete_reports_progress_and_stops(project):
+    items = list(project.current_annotations["first"])
+    thread = UBatchProgressThread(items, project.remove_annotations, DATASETS)
+    progress = list()
+
+    def on_item(index, count, item):
+        progress.append((index, count))
+        if index == 2:
+            thread.stop()
+
+    thread.signal_on_process_item.connect(on_item)
+    finished = list()
+    thread.signal_on_finish.connect(finished.append)
+    thread.run()
+
+    assert progress == [(0, IMAGES_COUNT), (1, IMAGES_COUNT), (2, IMAGES_COUNT)]
+    assert finished == [()]
+    # Остановка после третьего элемента: удаленные убраны из списка, остальные остались
+    assert project.current_annotations["first"] == items[3:]
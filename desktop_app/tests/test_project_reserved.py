@@ -0,0 +1,32 @@
+from project import UTrainProject, RESERVED
+
+
+def create_project(names: list[str], limit: int = 3) -> UTrainProject:
+    project = UTrainProject()
+    project.max_loaded_reserved = limit
+    project.reserved = list(names)
+    for name in names:
+        project.reserved_annotations[name] = list()
+        project.set_dataset_loaded(name, RESERVED)
+    return project
+
+
+def test_least_recently_used_reserved_are_unloaded():
+    project = create_project(["a", "b", "c", "d"])
+    for name in ["a", "b", "c", "d"]:
+        project.touch_datasets([name], RESERVED)
+    assert not project.is_dataset_loaded("a", RESERVED)
+    assert project.reserved_usage == ["b", "c", "d"]
+
+
+def test_datasets_touched_together_stay_tracked():
+    names = ["a", "b", "c", "d", "e"]
+    project = create_project(names + ["f"])
+    project.touch_datasets(names, RESERVED)
+    # Все датасеты одного обращения остаются загруженными и отслеживаемыми
+    assert project.reserved_usage == names
+    assert all(project.is_dataset_loaded(name, RESERVED) for name in names)
+
+    project.touch_datasets(["f"], RESERVED)
+    assert project.reserved_usage == ["d", "e", "f"]
+    assert [name for name in names if project.is_dataset_loaded(name, RESERVED)] == ["d", "e"]
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from annotation.annotation_scene import UAnnotationGraphicsView
+from benchmarks.synthetic import write_png
+from commander import UAnnotationSignalHolder
+from utility import FAnnotationClasses, FAnnotationData, EColorOrder
+
+
+@pytest.fixture(scope="module")
+def application():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def scene(application, tmp_path):
+    classes = FAnnotationClasses()
+    classes.add_classes_from_strings(["class_0", "class_1"])
+    FAnnotationData.set_classes(classes)
+
+    image_path = str(tmp_path / "image.png")
+    write_png(image_path, 64, 48)
+    scene = UAnnotationGraphicsView()
+    scene.set_scene_parameters(UAnnotationSignalHolder(), None)
+    scene.display_image((7, image_path, []), 1)
+    return scene
+
+
+def test_bgr_matrix_is_read_only_view(scene):
+    t_id, matrix = scene.get_selectable_matrix(EColorOrder.BGR)
+    assert t_id == 7 and matrix.shape == (48, 64, 3)
+    assert np.shares_memory(matrix, scene.display_matrix)
+    assert not matrix.flags.writeable
+    with pytest.raises(ValueError):
+        matrix[0, 0, 0] = 0
+
+
+def test_rgb_matrix_is_not_a_copy(scene):
+    _, matrix = scene.get_selectable_matrix(EColorOrder.RGB)
+    assert np.shares_memory(matrix, scene.display_matrix)
+    assert not matrix.flags.writeable
+    assert np.array_equal(matrix, scene.display_matrix[..., ::-1])
+
+
+def test_no_matrix_without_image(application):
+    assert UAnnotationGraphicsView().get_selectable_matrix() == (None, None)
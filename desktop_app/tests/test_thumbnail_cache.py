@@ -0,0 +1,54 @@
+import time
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from benchmarks.synthetic import write_png
+from dataset.thumbnail_cache import UThumbnailCache
+
+
+@pytest.fixture(scope="module")
+def application():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def images(tmp_path):
+    paths = list()
+    for index in range(6):
+        path = str(tmp_path / f"image_{index}.png")
+        write_png(path, 256 + index, 256)
+        paths.append(path)
+    return paths
+
+
+def test_thumbnail_is_read_from_disk(application, images, tmp_path):
+    thumbnail_cache = UThumbnailCache(str(tmp_path / "thumbnails"))
+    assert not thumbnail_cache.get_or_create(images[0], 64).isNull()
+
+    thumbnail_cache = UThumbnailCache(str(tmp_path / "thumbnails"))
+    image = thumbnail_cache.get(images[0], 64)
+    assert image is not None and max(image.width(), image.height()) <= 64
+    assert thumbnail_cache.disk_hits == 1
+
+
+def test_disk_cache_is_bounded(application, images, tmp_path):
+    thumbnail_cache = UThumbnailCache(str(tmp_path / "thumbnails"), memory_items=0)
+    thumbnail_cache.get_or_create(images[0], 64)
+    size = thumbnail_cache.get_disk_bytes()
+    # Лимит примерно на три миниатюры
+    thumbnail_cache.max_disk_bytes = size * 3 + size // 2
+
+    for image_path in images[1:]:
+        # Пауза больше шага времени изменения файлов, иначе порядок файлов с одинаковым временем не определен
+        time.sleep(0.05)
+        thumbnail_cache.get_or_create(image_path, 64)
+        # Первая миниатюра читается с диска после каждой записи и остается самой свежей
+        time.sleep(0.05)
+        assert thumbnail_cache.get(images[0], 64) is not None
+
+    assert thumbnail_cache.get_disk_bytes() <= thumbnail_cache.max_disk_bytes
+    assert thumbnail_cache.get_disk_bytes() == sum(size for _, size, _ in thumbnail_cache._scan_disk())
+    assert thumbnail_cache.contains(images[0], 64)
+    assert thumbnail_cache.contains(images[-1], 64)
+    assert not thumbnail_cache.contains(images[1], 64)
@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 from typing import Optional
 
@@ -5,6 +6,7 @@ from PyQt5.QtCore import pyqtSlot, QThread
 from PyQt5.QtWidgets import QApplication, QMainWindow
 
 from dataset.export_thread import UExportWorker
+from dataset.loader import UDatasetLazyLoader
 from design.train_app import Ui_TrainApp
 from commander import UGlobalSignalHolder, ECommanderStatus
 from annotation.page_annotation import UPageAnnotation
@@ -29,10 +31,13 @@ class TrainApp(QMainWindow, Ui_TrainApp):
         self.export_thread: Optional[QThread] = None
         self.export_worker: Optional[UExportWorker] = None
 
+        # Общий для страниц загрузчик аннотаций: один датасет не загружается двумя страницами одновременно
+        self.lazy_loader = UDatasetLazyLoader(self.project, self)
+
         self.page_save_load = UPageLoader(self.global_signal_holder, self.project)
-        self.page_dataset = UPageDataset(self.global_signal_holder, self.project)
-        self.page_annotation = UPageAnnotation(self.global_signal_holder, self.project)
-        self.page_classes = UPageClasses(self.global_signal_holder, self.project)
+        self.page_dataset = UPageDataset(self.global_signal_holder, self.project, self.lazy_loader)
+        self.page_annotation = UPageAnnotation(self.global_signal_holder, self.project, self.lazy_loader)
+        self.page_classes = UPageClasses(self.global_signal_holder, self.project, self.lazy_loader)
         self.page_model = UPageModel(self.global_signal_holder, self.project)
 
         self.stacked_page_loader.addWidget(self.page_save_load)
@@ -85,7 +90,8 @@ class TrainApp(QMainWindow, Ui_TrainApp):
             self.project.get_current_annotations(),
             path,
             dataset_list,
-            refactor_dict
+            refactor_dict,
+            self.project.export_placement
         )
         self.export_worker.moveToThread(self.export_thread)
 
@@ -130,6 +136,8 @@ class TrainApp(QMainWindow, Ui_TrainApp):
         self.export_worker = None
 
 def main():
+    # Нужно для пула процессов загрузчика аннотаций в собранном приложении
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = TrainApp()
     window.show()
@@ -14,6 +14,7 @@ import random
 from PyQt5.QtWidgets import QMessageBox
 
 from supporting.functions import clamp, polygon_area
+from supporting.image_size import get_image_size
 
 GColorList = [
     QColor(255, 0, 0),
@@ -39,11 +40,18 @@ class EImagesType(Enum):
     Valid = 2
     Test = 3
 
+UNRESOLVED_CLASS_NAME = "Unresolved"
+UNRESOLVED_CLASS_COLOR = QColor("#606060")
+
 class EAnnotationType(Enum):
     BoundingBox = 1
     Segmentation = 2
     NoType = 3
 
+class EColorOrder(Enum):
+    BGR = 1
+    RGB = 2
+
 class FAnnotationClasses:
     class FClassData:
         def __init__(self, name: str, color: QColor):
@@ -80,6 +88,14 @@ class FAnnotationClasses:
             return None
         return self.class_dict[class_id].Color
 
+    def rename_class(self, class_id: int, name: str):
+        # Аннотации не хранят имя класса, поэтому новое имя видно во всех аннотациях класса сразу
+        if class_id not in self.class_dict:
+            return f"Ошибка! Класса под ID {class_id} не существует!"
+        if any(class_data.Name == name for key, class_data in self.class_dict.items() if key != class_id):
+            return f"Ошибка! Класс {name} уже существует!"
+        self.class_dict[class_id].Name = name
+
     def get_name(self, class_id: int):
         if class_id not in self.class_dict:
             return None
@@ -132,14 +148,31 @@ class FAnnotationClasses:
         return QColor.fromHsv(hue, saturation, value)
 
 class FAnnotationData:
-    def __init__(self, object_id: int, class_id: int, class_name: str, color: QColor, res_w = 1920, res_h = 1400):
+    # Объект хранит только ID класса и геометрию. Имя и цвет берутся из общего списка классов проекта
+    __slots__ = ("object_id", "class_id", "w_resolution", "h_resolution")
+
+    classes: Optional[FAnnotationClasses] = None
+
+    def __init__(self, object_id: int, class_id: int, res_w = 1920, res_h = 1400):
         self.object_id = object_id
         self.class_id = class_id
-        self.class_name = class_name
-        self.color = color
         self.w_resolution = res_w
         self.h_resolution = res_h
 
+    @staticmethod
+    def set_classes(classes: FAnnotationClasses):
+        FAnnotationData.classes = classes
+
+    @property
+    def class_name(self) -> str:
+        class_name = self.classes.get_name(self.class_id) if self.classes else None
+        return UNRESOLVED_CLASS_NAME if class_name is None else class_name
+
+    @property
+    def color(self) -> QColor:
+        color = self.classes.get_color(self.class_id) if self.classes else None
+        return UNRESOLVED_CLASS_COLOR if color is None else color
+
     @abstractmethod
     def clamp_cords(self):
         pass
@@ -157,7 +190,7 @@ class FAnnotationData:
         pass
 
     def _copy_init_args(self):
-        return self.object_id, self.class_id, self.class_name, QColor(self.color), self.w_resolution, self.h_resolution
+        return self.object_id, self.class_id, self.w_resolution, self.h_resolution
 
     def copy(self):
         return FAnnotationData(*self._copy_init_args())
@@ -204,8 +237,6 @@ class FAnnotationData:
         return (
                 self.object_id == other.object_id and
                 self.class_id == other.class_id and
-                self.class_name == other.class_name and
-                self.color == other.color and
                 self.w_resolution == other.w_resolution and
                 self.h_resolution == other.h_resolution
         )
@@ -214,8 +245,10 @@ class FAnnotationData:
         return not self == other
 
 class FDetectAnnotationData(FAnnotationData):
-    def __init__(self, x, y, width, height, object_id: int, class_id: int, class_name: str, color: QColor, res_w = 1920, res_h = 1400):
-        super().__init__(object_id, class_id, class_name, color, res_w, res_h)
+    __slots__ = ("X", "Y", "Width", "Height")
+
+    def __init__(self, x, y, width, height, object_id: int, class_id: int, res_w = 1920, res_h = 1400):
+        super().__init__(object_id, class_id, res_w, res_h)
         self.X = x
         self.Y = y
         self.Width = width
@@ -270,8 +303,8 @@ class FDetectAnnotationData(FAnnotationData):
                 (self.X, self.Y, self.Width, self.Height))
 
     def update_data(self, data: tuple[int, int, str, QColor, tuple[int, int, int, int]]):
-        self.object_id, self.class_id, self.class_name, color, (self.X, self.Y, self.Width, self.Height) = data
-        self.color = QColor(color)
+        # Имя и цвет в кортеже игнорируются, они определяются ID класса
+        self.object_id, self.class_id, _, _, (self.X, self.Y, self.Width, self.Height) = data
 
     def get_rect_to_draw(self):
         top_left = QPoint(int(self.X), int(self.Y))
@@ -294,8 +327,10 @@ class FDetectAnnotationData(FAnnotationData):
 
 
 class FPolygonAnnotationData(FAnnotationData):
-    def __init__(self, points_list: list[tuple[float, float]], annotation_id: int, class_id: int, class_name: str, color: QColor, res_w = 1920, res_h = 1400):
-        super().__init__(annotation_id, class_id, class_name, color, res_w, res_h)
+    __slots__ = ("points_list",)
+
+    def __init__(self, points_list: list[tuple[float, float]], annotation_id: int, class_id: int, res_w = 1920, res_h = 1400):
+        super().__init__(annotation_id, class_id, res_w, res_h)
         self.points_list = points_list
 
     def clamp_cords(self):
@@ -353,8 +388,7 @@ class FPolygonAnnotationData(FAnnotationData):
         return QPolygonF([QPointF(x, y) for x, y in self.points_list])
 
     def update_data(self, data: tuple[int, int, str, QColor, list[tuple[float, float]]]):
-        self.object_id, self.class_id, self.class_name, color, list_points = data
-        self.color = QColor(color)
+        self.object_id, self.class_id, _, _, list_points = data
         self.points_list = list_points[:]
 
     def get_rect_to_draw(self):
@@ -378,18 +412,38 @@ class FPolygonAnnotationData(FAnnotationData):
         return not self == other
 
 class FAnnotationItem:
-    def __init__(self, ann_list: list[FAnnotationData], image_path: str, dataset_name: str | None):
+    def __init__(
+            self,
+            ann_list: list[FAnnotationData],
+            image_path: str,
+            dataset_name: str | None,
+            resolution: tuple[int, int] | None = None
+    ):
         self.annotation_list = ann_list
         self.image_path = image_path
         self.dataset: Optional[str] = dataset_name
+        self.resolution: Optional[tuple[int, int]] = resolution
 
     def copy(self):
         return self.__class__(
             [annotation.copy() for annotation in self.annotation_list],
             str(self.image_path),
-            str(self.dataset)
+            str(self.dataset),
+            self.resolution
         )
 
+    def get_resolution(self) -> tuple[int, int] | None:
+        # Разрешение берется из аннотаций, а при их отсутствии читается из заголовка изображения
+        if self.resolution is None:
+            if self.annotation_list:
+                self.resolution = self.annotation_list[0].get_resolution()
+            else:
+                try:
+                    self.resolution = get_image_size(self.get_image_path())
+                except Exception as error:
+                    print(f"Не удалось получить разрешение изображения {self.image_path}: {str(error)}")
+        return self.resolution
+
     def update_annotation_data(self, annotation_data: list[FAnnotationData]):
         self.annotation_list.clear()
         self.annotation_list = list(annotation_data)